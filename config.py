@@ -18,6 +18,39 @@ class Config:
         f"sqlite:///{BASE_DIR / 'mi_comuna.db'}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Perfil del motor: "auto" (según DATABASE_URL) | "sqlite" | "postgres" | "none"
+    DB_PROFILE = os.environ.get("DB_PROFILE", "auto")
+    # db.create_all() al arrancar, solo para bases desechables (tests): el
+    # esquema lo arma `flask db upgrade`, con SQLite y con PostgreSQL
+    DB_CREATE_ALL = os.environ.get("DB_CREATE_ALL", "0") == "1"
+    # PRAGMA de cada conexión SQLite nueva (perfil "sqlite"), en este orden
+    SQLITE_PRAGMAS = {
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),  # ms esperando un lock
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -20000,  # KiB por conexión
+        "mmap_size": 134217728,  # 128 MiB
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    }
+    # wal_checkpoint(TRUNCATE) + PRAGMA optimize en cada worker (segundos; 0 = solo `flask sqlite mantenimiento`)
+    SQLITE_MAINTENANCE_INTERVAL = int(os.environ.get("SQLITE_MAINTENANCE_INTERVAL", 3600))
+    # Perfil "postgres": un pool por worker de gunicorn, con una conexión por
+    # hilo (GUNICORN_THREADS) más las de IMAGE_WORKERS; PG_POOL_SIZE lo fija a mano
+    GUNICORN_WORKERS = int(os.environ.get("GUNICORN_WORKERS", os.environ.get("WEB_CONCURRENCY", 2)))
+    GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", 4))
+    PG_POOL_SIZE = int(os.environ["PG_POOL_SIZE"]) if os.environ.get("PG_POOL_SIZE") else None
+    PG_POOL_OVERFLOW = int(os.environ.get("PG_POOL_OVERFLOW", 2))
+    PG_POOL_TIMEOUT = int(os.environ.get("PG_POOL_TIMEOUT", 10))  # s esperando una conexión libre
+    PG_POOL_RECYCLE = int(os.environ.get("PG_POOL_RECYCLE", 1800))  # s antes de reabrir una conexión
+    # Cancela en el servidor las consultas más largas (ms; 0 = sin límite)
+    PG_STATEMENT_TIMEOUT = int(os.environ.get("PG_STATEMENT_TIMEOUT", 15000))
+    # Nombre en pg_stat_activity y en los logs del servidor
+    PG_APPLICATION_NAME = os.environ.get("PG_APPLICATION_NAME", "mi_comuna")
+    # Detrás de PgBouncer en modo transaction: sin sentencias preparadas ni
+    # parámetros de sesión; el statement_timeout va con SET LOCAL en cada
+    # transacción y, para lo demás, en el rol (ALTER ROLE ... SET)
+    PG_PGBOUNCER = os.environ.get("PG_PGBOUNCER", "0") == "1"
 
     # -----------------------
     # 📂 Archivos subidos
@@ -34,12 +67,108 @@ class Config:
         # Limitar el tamaño máximo de carga a 16 MB
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
 
+    # Backend del almacén de subidas: "local" (UPLOAD_FOLDER) o "s3"
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+    # Niveles de subcarpetas por hash: 2 → uploads/ab/cd/<sha256>.ext
+    STORAGE_SHARD_DEPTH = int(os.environ.get("STORAGE_SHARD_DEPTH", 2))
+    # URL base opcional si las subidas locales las sirve otro servidor (nginx, CDN)
+    UPLOAD_URL_BASE = os.environ.get("UPLOAD_URL_BASE")
+
+    # S3 o compatible (MinIO, R2...); solo con STORAGE_BACKEND="s3"
+    S3_BUCKET = os.environ.get("S3_BUCKET")
+    S3_PREFIX = os.environ.get("S3_PREFIX", "uploads")
+    S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
+    S3_REGION = os.environ.get("S3_REGION")
+    S3_ACCESS_KEY_ID = os.environ.get("S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY = os.environ.get("S3_SECRET_ACCESS_KEY")
+    S3_PUBLIC_URL = os.environ.get("S3_PUBLIC_URL")
+
+    # -----------------------
+    # 🖼️ Variantes de imágenes (requiere Pillow)
+    # -----------------------
+    # Anchos en px; solo se generan los menores que el original
+    IMAGE_VARIANTS = {"thumb": 160, "card": 480, "hero": 1200}
+    # "thread" (pool en segundo plano) | "sync" (tests/CLI) | "off"
+    IMAGE_PROCESSING = os.environ.get("IMAGE_PROCESSING", "thread")
+    IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+    IMAGE_QUALITY = 80
+
+    # -----------------------
+    # 🧱 Estáticos
+    # -----------------------
+    # Usa static/dist/manifest.json (de `flask assets build`) para url_for('static', ...)
+    ASSETS_FINGERPRINT = os.environ.get("ASSETS_FINGERPRINT", "1") != "0"
+    # CLI de Tailwind v3 para `flask assets css` (binario standalone o npx)
+    TAILWIND_BIN = os.environ.get("TAILWIND_BIN", "npx tailwindcss@3")
+
     # -----------------------
     # 🌐 Configuración del sitio
     # -----------------------
     SITE_NAME = "Mi Portal Parral"
     MUNICIPALITY_NAME = "Municipalidad de Parral"
     DEFAULT_LANGUAGE = "es"
+    # Idiomas servidos; la caché de páginas usa el mejor según Accept-Language
+    LANGUAGES = ["es"]
+
+    # -----------------------
+    # ⚡ Caché
+    # -----------------------
+    # Negocios destacados por categoría en /negocios (0 desactiva la caché)
+    NEGOCIOS_TOP_POR_CATEGORIA = 3
+    NEGOCIOS_TOP_CACHE_TTL = int(os.environ.get("NEGOCIOS_TOP_CACHE_TTL", 300))
+    # Categorías (nav y choices de formularios); se invalidan al escribir la tabla
+    CATEGORIAS_CACHE_TTL = int(os.environ.get("CATEGORIAS_CACHE_TTL", 3600))
+    # Datos de sesión del usuario autenticado (current_user), por worker
+    SESION_CACHE_TTL = int(os.environ.get("SESION_CACHE_TTL", 60))
+    # Perfil de empresa del usuario en sesión, por worker (0 desactiva la caché)
+    PERFIL_CACHE_TTL = int(os.environ.get("PERFIL_CACHE_TTL", 30))
+    # Contadores del panel de administración (segundos)
+    ADMIN_METRICS_TTL = int(os.environ.get("ADMIN_METRICS_TTL", 30))
+    # Páginas públicas completas para visitantes anónimos
+    PAGE_CACHE = os.environ.get("PAGE_CACHE", "1") != "0"
+    # "memory" (LRU por worker) | "redis" (compartida, PAGE_CACHE_REDIS_URL)
+    PAGE_CACHE_BACKEND = os.environ.get("PAGE_CACHE_BACKEND", "memory")
+    PAGE_CACHE_REDIS_URL = os.environ.get("PAGE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", 300))
+    PAGE_CACHE_MAXSIZE = 512
+    # Fragmentos de plantilla ({% cache %}), también para usuarios autenticados
+    FRAGMENT_CACHE = os.environ.get("FRAGMENT_CACHE", "1") != "0"
+    FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", 600))
+    FRAGMENT_CACHE_MAXSIZE = 1024
+    # ETag / Last-Modified y 304 en las páginas de contenido
+    CONDITIONAL_GET = os.environ.get("CONDITIONAL_GET", "1") != "0"
+    # Cambiarla invalida todos los ETag (p. ej. al desplegar plantillas nuevas)
+    CONDITIONAL_VERSION = os.environ.get("CONDITIONAL_VERSION", "1")
+    # Agrega X-Cache-Invalidated con los tags que invalidó cada request
+    INVALIDATION_DEBUG = os.environ.get("INVALIDATION_DEBUG", "0") == "1"
+
+    # -----------------------
+    # 🔎 Búsqueda
+    # -----------------------
+    # Configuración de texto de PostgreSQL para to_tsvector / to_tsquery
+    SEARCH_TS_CONFIG = os.environ.get("SEARCH_TS_CONFIG", "spanish")
+
+    # -----------------------
+    # 🔑 Contraseñas
+    # -----------------------
+    # Método y costo de werkzeug ("scrypt:N:r:p" | "pbkdf2:sha256:iteraciones");
+    # al cambiarlo, cada hash se recalcula en el siguiente login. Medir con `flask passwords bench`
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Hashes simultáneos por worker de gunicorn; el resto espera en cola
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 1))
+    # Espera máxima en la cola antes de responder 503 (segundos)
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+    # "thread" (pool acotado) | "sync" (tests/CLI)
+    PASSWORD_HASH_EXECUTOR = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")
+
+    # Límite de intentos por balde de tokens: (capacidad, segundos para recuperarla)
+    RATELIMIT = os.environ.get("RATELIMIT", "1") != "0"
+    # "memory" (por worker) | "redis" (compartido, RATELIMIT_REDIS_URL)
+    RATELIMIT_BACKEND = os.environ.get("RATELIMIT_BACKEND", "memory")
+    RATELIMIT_REDIS_URL = os.environ.get("RATELIMIT_REDIS_URL", "redis://localhost:6379/1")
+    RATELIMIT_LOGIN_IP = (20, 60)
+    RATELIMIT_LOGIN_EMAIL = (5, 300)
+    RATELIMIT_REGISTER_IP = (5, 3600)
 
     # -----------------------
     # 🔒 Sesiones / Cookies
@@ -4,11 +4,18 @@ from mi_comuna.extensions import db, migrate, login_manager, csrf
 from config import Config
 from datetime import datetime
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Ajustes sobre Config (p.ej. tests contra otra base) antes de crear el motor
+    if config:
+        app.config.update(config)
 
+    # Perfil del motor (pool de PostgreSQL, PRAGMA de SQLite, mantenimiento del WAL)
+    from mi_comuna import database
+    database.configurar(app)
     db.init_app(app)
+    database.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
@@ -33,7 +40,35 @@ def create_app():
     def inject_now():
         return {"now": datetime.utcnow, "current_year": datetime.utcnow().year}
 
-    with app.app_context():
-        db.create_all()
+    # Estáticos con huella (`flask assets build`)
+    from mi_comuna import assets
+    assets.init_app(app)
+
+    # Almacén de subidas (modelo Blob y comandos `flask uploads`)
+    from mi_comuna import storage
+    storage.init_app(app)
+
+    # Bus de invalidación de cachés (tags por commit)
+    from mi_comuna import invalidation
+    invalidation.init_app(app)
+
+    # Límite de intentos de login y registro (429 antes de tocar la base)
+    from mi_comuna import ratelimit
+    ratelimit.init_app(app)
+
+    # Hash de contraseñas en un pool acotado (`flask passwords bench`)
+    from mi_comuna.modules.auth import passwords
+    passwords.init_app(app)
+
+    # Caché de páginas para anónimos (`flask pagecache clear`)
+    from mi_comuna import pagecache
+    pagecache.init_app(app)
+
+    # Solo con DB_CREATE_ALL (tests); el esquema lo arma `flask db upgrade`
+    database.crear_tablas(app)
+
+    # Índice de texto completo de negocios (FTS5 / tsvector)
+    from mi_comuna.modules.negocios import search as negocios_search
+    negocios_search.init_app(app)
 
     return app
@@ -0,0 +1,89 @@
+# mi_comuna/assets/__init__.py
+"""Archivos estáticos con huella de contenido (``img/plaza.3f9c1a2b7d0e.jpg``).
+
+``flask assets build`` copia /static (salvo las subidas) a ``static/dist``
+con el hash en el nombre, agrega hermanos ``.gz``/``.br`` para los tipos
+comprimibles y escribe ``dist/manifest.json``. Si el manifiesto existe,
+``url_for('static', filename=...)`` resuelve al nombre con huella y esas URLs
+se sirven con ``Cache-Control: immutable`` y la variante precomprimida que
+acepte el navegador.
+
+El manifiesto se lee al crear la app (reiniciar los workers tras el build).
+Sin manifiesto (desarrollo) todo sigue igual; tras editar un archivo estático
+hay que volver a correr el build o borrar ``static/dist``.
+"""
+import json
+import mimetypes
+import os
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+DIST = "dist"
+MANIFIESTO = "manifest.json"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Variantes precomprimidas, en orden de preferencia
+CODIFICACIONES = (("br", ".br"), ("gzip", ".gz"))
+
+
+def init_app(app):
+    from .cli import assets_cli
+    app.cli.add_command(assets_cli)
+    app.extensions["assets"] = cargar_manifiesto(app)
+    app.url_defaults(_con_huella)
+    app.add_template_global(asset_disponible)
+    # Más específica que /static/<path:filename>: la ruta de Flask no la intercepta
+    app.add_url_rule(f"{app.static_url_path}/{DIST}/<path:filename>", endpoint="assets", view_func=servir)
+
+
+def cargar_manifiesto(app):
+    if not app.config.get("ASSETS_FINGERPRINT", True):
+        return {}
+    try:
+        with open(os.path.join(app.static_folder, DIST, MANIFIESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_disponible(nombre):
+    """True si existe ``static/<nombre>`` (se evalúa una vez por proceso).
+
+    Las plantillas lo usan para preferir el CSS compilado y los archivos de
+    static/vendor, con el CDN como respaldo mientras no se hayan generado.
+    """
+    disponibles = current_app.extensions.setdefault("assets_disponibles", {})
+    if nombre not in disponibles:
+        disponibles[nombre] = os.path.isfile(os.path.join(current_app.static_folder, *nombre.split("/")))
+    return disponibles[nombre]
+
+
+def _con_huella(endpoint, values):
+    """``url_defaults``: reescribe ``filename`` de ``url_for('static', ...)`` según el manifiesto."""
+    if endpoint != "static":
+        return
+    manifiesto = current_app.extensions.get("assets")
+    nombre = values.get("filename")
+    if manifiesto and nombre in manifiesto:
+        values["filename"] = manifiesto[nombre]
+
+
+def servir(filename):
+    ruta = safe_join(current_app.static_folder, DIST, filename)
+    if ruta is None or not os.path.isfile(ruta):
+        abort(404)
+
+    tipo = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+    codificacion = None
+    for nombre, ext in CODIFICACIONES:
+        if request.accept_encodings[nombre] > 0 and os.path.isfile(ruta + ext):
+            ruta, codificacion = ruta + ext, nombre
+            break
+
+    resp = send_file(ruta, mimetype=tipo, conditional=True)
+    if codificacion:
+        resp.headers["Content-Encoding"] = codificacion
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = CACHE_CONTROL
+    return resp
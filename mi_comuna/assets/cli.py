@@ -0,0 +1,169 @@
+# mi_comuna/assets/cli.py
+"""Comandos ``flask assets ...``."""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from . import DIST, MANIFIESTO, tailwind
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan .gz
+    brotli = None
+
+assets_cli = AppGroup("assets", help="Archivos estáticos con huella de contenido.")
+
+# Formatos de texto; imágenes, video y woff2 ya vienen comprimidos
+COMPRIMIBLES = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".xml", ".html", ".ico", ".ttf", ".otf"}
+
+_BLOQUE = 64 * 1024
+_URL_CSS = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _recorrer(raiz, excluir):
+    for directorio, carpetas, archivos in os.walk(raiz):
+        rel_dir = os.path.relpath(directorio, raiz).replace(os.sep, "/")
+        if rel_dir == ".":
+            carpetas[:] = [c for c in carpetas if c not in excluir]
+            rel_dir = ""
+        carpetas[:] = [c for c in carpetas if not c.startswith(".")]
+        for nombre in archivos:
+            if not nombre.startswith("."):
+                yield posixpath.join(rel_dir, nombre)
+
+
+def _huella_archivo(ruta):
+    digest = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(_BLOQUE), b""):
+            digest.update(bloque)
+    return digest.hexdigest()[:12]
+
+
+def _reescribir_css(texto, rel, manifiesto, url_static):
+    """Apunta los url(...) del CSS a los nombres con huella."""
+    carpeta = posixpath.dirname(rel)
+
+    def reemplazo(m):
+        comilla, ref = m.groups()
+        limpio = ref.split("#", 1)[0].split("?", 1)[0]
+        sufijo = ref[len(limpio):]
+        if limpio.startswith(url_static + "/"):
+            destino = manifiesto.get(limpio[len(url_static) + 1:])
+            nuevo = f"{url_static}/{destino}" if destino else None
+        elif limpio.startswith(("data:", "http:", "https:", "//", "/")) or not limpio:
+            nuevo = None
+        else:
+            destino = manifiesto.get(posixpath.normpath(posixpath.join(carpeta, limpio)))
+            # Mismo árbol dentro de dist/: el enlace relativo se conserva
+            nuevo = posixpath.relpath(destino[len(DIST) + 1:], carpeta or ".") if destino else None
+        return f"url({comilla}{nuevo}{sufijo}{comilla})" if nuevo else m.group(0)
+
+    return _URL_CSS.sub(reemplazo, texto)
+
+
+def _comprimir(ruta):
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    salidas = [(".gz", gzip.compress(datos, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        salidas.append((".br", brotli.compress(datos, quality=11)))
+    for ext, comprimido in salidas:
+        if len(comprimido) < len(datos):
+            with open(ruta + ext, "wb") as f:
+                f.write(comprimido)
+
+
+@assets_cli.command("build")
+def build_command():
+    """Genera static/dist con nombres con huella, .gz/.br y el manifiesto."""
+    static = current_app.static_folder
+    destino = os.path.join(static, DIST)
+    shutil.rmtree(destino, ignore_errors=True)
+
+    excluir = {DIST, current_app.config.get("UPLOAD_URL_PREFIX", "uploads")}
+    # Los CSS al final: sus url(...) se reescriben con las huellas ya calculadas
+    archivos = sorted(_recorrer(static, excluir), key=lambda rel: (rel.endswith(".css"), rel))
+
+    manifiesto = {}
+    comprimidos = 0
+    for rel in archivos:
+        origen = os.path.join(static, *rel.split("/"))
+        base, ext = posixpath.splitext(rel)
+        contenido = None
+        if ext.lower() == ".css":
+            with open(origen, encoding="utf-8") as f:
+                contenido = _reescribir_css(f.read(), rel, manifiesto, current_app.static_url_path).encode("utf-8")
+            huella = hashlib.sha256(contenido).hexdigest()[:12]
+        else:
+            huella = _huella_archivo(origen)
+
+        nuevo = f"{base}.{huella}{ext}"
+        salida = os.path.join(destino, *nuevo.split("/"))
+        os.makedirs(os.path.dirname(salida), exist_ok=True)
+        if contenido is not None:
+            with open(salida, "wb") as f:
+                f.write(contenido)
+        else:
+            # Copia (no enlace duro): editar el original no debe cambiar un archivo "inmutable"
+            shutil.copy2(origen, salida)
+        if ext.lower() in COMPRIMIBLES:
+            _comprimir(salida)
+            comprimidos += 1
+        manifiesto[rel] = f"{DIST}/{nuevo}"
+
+    with open(os.path.join(destino, MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    current_app.extensions["assets"] = manifiesto
+
+    extra = "" if brotli is not None else " (sin brotli instalado: solo .gz)"
+    click.echo(f"✅ {len(manifiesto)} archivo(s) con huella; {comprimidos} precomprimido(s){extra}.")
+
+
+@assets_cli.command("css")
+@click.option("--watch", is_flag=True, help="Recompila al cambiar las plantillas (desarrollo).")
+def css_command(watch):
+    """Compila Tailwind a static/css/app.css (purgado y minificado)."""
+    try:
+        codigo = tailwind.compilar(watch=watch)
+    except FileNotFoundError:
+        raise click.ClickException(
+            f"No se encontró el CLI de Tailwind ({current_app.config.get('TAILWIND_BIN')}); "
+            "instala Node o el binario standalone y ajusta TAILWIND_BIN."
+        )
+    if codigo:
+        raise click.ClickException(f"Tailwind terminó con código {codigo}.")
+    if not watch:
+        click.echo(f"✅ {tailwind.SALIDA} compilado; corre `flask assets build` para la huella.")
+
+
+@assets_cli.command("check-css")
+def check_css_command():
+    """Falla si alguna plantilla usa una clase que no está en el CSS compilado."""
+    try:
+        faltantes = tailwind.clases_faltantes()
+    except FileNotFoundError:
+        raise click.ClickException(f"No existe static/{tailwind.SALIDA}; corre `flask assets css`.")
+    for clase, plantillas in sorted(faltantes.items()):
+        click.echo(f"❌ {clase}  ({', '.join(sorted(set(plantillas))[:3])})")
+    if faltantes:
+        raise click.ClickException(f"{len(faltantes)} clase(s) sin CSS; recompila con `flask assets css`.")
+    click.echo("✅ Todas las clases de las plantillas están en el CSS compilado.")
+
+
+@assets_cli.command("vendor")
+@click.option("--forzar", is_flag=True, help="Vuelve a descargar aunque ya existan.")
+def vendor_command(forzar):
+    """Descarga Alpine.js y la fuente Inter a static/vendor."""
+    escritos = tailwind.descargar_vendor(forzar=forzar)
+    for rel in escritos:
+        click.echo(f"⬇️  {rel}")
+    click.echo(f"✅ {len(escritos)} archivo(s) descargado(s).")
@@ -0,0 +1,126 @@
+# mi_comuna/assets/tailwind.py
+"""CSS de Tailwind compilado en build (reemplaza el JIT de cdn.tailwindcss.com).
+
+``flask assets css`` corre el CLI de Tailwind v3 (``TAILWIND_BIN``: binario
+standalone o ``npx tailwindcss@3``) sobre las plantillas de
+``mi_comuna/templates`` y ``mi_comuna/modules/*/templates`` y escribe
+``static/css/app.css`` purgado y minificado; ``flask assets build`` le pone
+la huella. ``flask assets check-css`` falla si una plantilla usa una clase
+que no está en el CSS compilado.
+
+``flask assets vendor`` descarga Alpine.js y la fuente Inter a
+``static/vendor`` para no depender de unpkg ni de Google Fonts.
+"""
+import glob
+import os
+import re
+import shlex
+import subprocess
+import urllib.request
+
+from flask import current_app
+
+ENTRADA = os.path.join(os.path.dirname(__file__), "tailwind.css")
+SALIDA = "css/app.css"
+
+# Archivos de terceros servidos desde static/ (versiones fijas)
+VENDOR = {
+    "vendor/alpine.min.js": "https://cdn.jsdelivr.net/npm/alpinejs@3.14.1/dist/cdn.min.js",
+    "vendor/inter-latin-wght-normal.woff2": (
+        "https://cdn.jsdelivr.net/npm/@fontsource-variable/inter@5.1.0/files/inter-latin-wght-normal.woff2"
+    ),
+}
+
+# Clases sin CSS propio (marcadores de Tailwind) que no deben reportarse
+CLASES_SIN_CSS = {"group", "peer"}
+
+# `class="..."` literal; se excluye el `:class` de Alpine (expresión JS)
+_ATRIBUTO_CLASS = re.compile(r"""(?<![:\w-])class\s*=\s*(["'])(.*?)\1""", re.S)
+_BLOQUE_JINJA = re.compile(r"\{%.*?%\}|\{#.*?#\}", re.S)
+# Clase armada con una expresión: text-{{ m.color }}-600 (puede tener espacios)
+_CLASE_DINAMICA = re.compile(r"\S*\{\{.*?\}\}\S*", re.S)
+_ESTILO = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_SELECTOR = re.compile(r"\.((?:\\.|[\w-])+)")
+
+
+def _raiz_repo():
+    return os.path.dirname(current_app.root_path)
+
+
+def plantillas():
+    raiz = current_app.root_path
+    patrones = (os.path.join(raiz, "templates", "**", "*.html"),
+                os.path.join(raiz, "modules", "*", "templates", "**", "*.html"))
+    return sorted({p for patron in patrones for p in glob.glob(patron, recursive=True)})
+
+
+def comando(*extra):
+    """Línea de comando del CLI de Tailwind para compilar a static/css/app.css."""
+    cfg = current_app.config
+    return [
+        *shlex.split(cfg.get("TAILWIND_BIN", "npx tailwindcss@3")),
+        "-c", os.path.join(_raiz_repo(), "tailwind.config.js"),
+        "-i", ENTRADA,
+        "-o", os.path.join(current_app.static_folder, *SALIDA.split("/")),
+        "--minify",
+        *extra,
+    ]
+
+
+def compilar(watch=False):
+    # cwd en la raíz: los globs de `content` son relativos a ella
+    return subprocess.run(comando("--watch") if watch else comando(), cwd=_raiz_repo()).returncode
+
+
+# ---------------------------------------------------------------------
+# Verificación de clases
+# ---------------------------------------------------------------------
+def _selectores(css):
+    return {re.sub(r"\\(.)", r"\1", s) for s in _SELECTOR.findall(css)}
+
+
+def clases_usadas():
+    """{clase: [plantillas]} de los atributos class literales.
+
+    Las clases armadas con ``{{ ... }}`` se omiten: se cubren con el
+    ``safelist`` de tailwind.config.js.
+    """
+    usadas = {}
+    propias = set()
+    for ruta in plantillas():
+        with open(ruta, encoding="utf-8") as f:
+            html = f.read()
+        # Clases definidas en <style> de la propia plantilla
+        for estilo in _ESTILO.findall(html):
+            propias |= _selectores(estilo)
+        for _, valor in _ATRIBUTO_CLASS.findall(html):
+            for clase in _CLASE_DINAMICA.sub(" ", _BLOQUE_JINJA.sub(" ", valor)).split():
+                usadas.setdefault(clase, []).append(os.path.relpath(ruta, current_app.root_path))
+    for clase in propias | CLASES_SIN_CSS:
+        usadas.pop(clase, None)
+    return usadas
+
+
+def clases_faltantes():
+    """{clase: [plantillas]} usadas en plantillas y ausentes de static/css/app.css."""
+    with open(os.path.join(current_app.static_folder, *SALIDA.split("/")), encoding="utf-8") as f:
+        compiladas = _selectores(f.read())
+    return {c: p for c, p in clases_usadas().items() if c not in compiladas}
+
+
+# ---------------------------------------------------------------------
+# Vendor
+# ---------------------------------------------------------------------
+def descargar_vendor(forzar=False):
+    """Descarga VENDOR a static/; devuelve la lista de archivos escritos."""
+    escritos = []
+    for rel, url in VENDOR.items():
+        destino = os.path.join(current_app.static_folder, *rel.split("/"))
+        if os.path.exists(destino) and not forzar:
+            continue
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as resp, open(destino + ".part", "wb") as f:
+            f.write(resp.read())
+        os.replace(destino + ".part", destino)
+        escritos.append(rel)
+    return escritos
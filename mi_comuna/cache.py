@@ -0,0 +1,60 @@
+# mi_comuna/cache.py
+"""Caché en proceso con expiración por entrada y desalojo LRU.
+
+Cada worker de gunicorn tiene su propia copia: usar TTL cortos para datos
+que otros procesos pueden modificar.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+class TTLCache:
+    """Diccionario thread-safe con TTL por entrada y tamaño máximo (LRU)."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave, default=None):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave, _AUSENTE)
+            if entrada is _AUSENTE:
+                return default
+            valor, expira = entrada
+            if expira <= ahora:
+                del self._datos[clave]
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def get_or_set(self, clave, factory, ttl):
+        """Devuelve el valor cacheado o lo calcula con `factory()` y lo guarda."""
+        valor = self.get(clave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = factory()
+            self.set(clave, valor, ttl)
+        return valor
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
@@ -0,0 +1,133 @@
+# mi_comuna/conditional.py
+"""GET condicional (ETag / Last-Modified) para vistas de contenido.
+
+``@condicional(Noticia, ...)`` calcula, antes de ejecutar la vista, una firma
+barata de los datos de los que depende: ``max(actualizado_en)`` y la
+cantidad de filas de cada fuente, en un solo SELECT. Si el navegador ya
+tiene esa versión (``If-None-Match`` / ``If-Modified-Since``) se responde
+304 sin consultar nada más ni renderizar Jinja.
+
+Cada fuente es un modelo (toda la tabla), una tupla ``(modelo, *condiciones)``
+o una función que recibe los argumentos de la vista y devuelve una lista de
+ellas. Los modelos sin ``actualizado_en`` usan ``creado_en`` o la clave
+primaria: detectan altas y bajas, no ediciones.
+
+El ETag incluye además la URL, el usuario, el día (avisos y eventos vigentes)
+y ``CONDITIONAL_VERSION`` + el manifiesto de estáticos (cambian al desplegar).
+"""
+import hashlib
+import json
+from datetime import date, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, request, session
+from flask_login import current_user
+from sqlalchemy import func, inspect, select
+
+from mi_comuna.extensions import db
+
+
+def _marca(modelo):
+    for nombre in ("actualizado_en", "creado_en"):
+        columna = getattr(modelo, nombre, None)
+        if columna is not None:
+            return columna
+    return inspect(modelo).primary_key[0]
+
+
+def _resolver(fuentes, kwargs):
+    resultado = []
+    for fuente in fuentes:
+        if isinstance(fuente, tuple):
+            resultado.append(fuente)
+        elif isinstance(fuente, type):
+            resultado.append((fuente,))
+        else:
+            resultado.extend(_resolver(fuente(**kwargs), kwargs))
+    return resultado
+
+
+def firma(fuentes):
+    """(max(marca), count) de cada fuente, en una sola consulta."""
+    columnas = []
+    for modelo, *condiciones in fuentes:
+        columnas.append(select(func.max(_marca(modelo))).where(*condiciones).scalar_subquery())
+        columnas.append(select(func.count()).select_from(modelo).where(*condiciones).scalar_subquery())
+    return tuple(db.session.execute(select(*columnas)).one())
+
+
+def _sal():
+    sal = current_app.extensions.get("conditional_salt")
+    if sal is None:
+        manifiesto = json.dumps(current_app.extensions.get("assets") or {}, sort_keys=True)
+        sal = current_app.extensions["conditional_salt"] = hashlib.sha1(
+            f"{current_app.config.get('CONDITIONAL_VERSION', '')}|{manifiesto}".encode("utf-8")
+        ).hexdigest()
+    return sal
+
+
+def _etag(valores):
+    args = sorted(request.args.items(multi=True))
+    usuario = current_user.get_id() if current_user.is_authenticated else "-"
+    crudo = f"{_sal()}|{date.today()}|{usuario}|{request.path}?{urlencode(args)}|{valores!r}"
+    return hashlib.sha1(crudo.encode("utf-8")).hexdigest()[:24]
+
+
+def _ultima_modificacion(fuentes, valores):
+    """Máximo de ``actualizado_en`` si todas las fuentes lo tienen; si no, None."""
+    if any(getattr(modelo, "actualizado_en", None) is None for modelo, *_ in fuentes):
+        return None
+    fechas = [m for m in valores[::2] if m is not None]
+    return max(fechas).replace(tzinfo=timezone.utc, microsecond=0) if fechas else None
+
+
+def _validadores(resp, etag, ultima):
+    resp.set_etag(etag, weak=True)
+    if ultima is not None:
+        resp.last_modified = ultima
+    # El navegador guarda la página pero la revalida siempre
+    resp.cache_control.no_cache = True
+    if current_user.is_authenticated:
+        resp.cache_control.private = True
+    resp.vary.add("Cookie")
+
+
+def _no_modificado(etag, ultima):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # If-Modified-Since solo si no vino ETag (las bajas no mueven la fecha)
+    return ultima is not None and request.if_modified_since is not None and ultima <= request.if_modified_since
+
+
+def condicional(*fuentes):
+    """Decorador: 304 si los datos de `fuentes` no cambiaron desde la copia del cliente."""
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if (
+                not current_app.config.get("CONDITIONAL_GET", True)
+                or request.method not in ("GET", "HEAD")
+                # Un flash pendiente cambia la página aunque los datos no
+                or "_flashes" in session
+            ):
+                return vista(*args, **kwargs)
+
+            resueltas = _resolver(fuentes, kwargs)
+            valores = firma(resueltas)
+            etag = _etag(valores)
+            ultima = _ultima_modificacion(resueltas, valores)
+            if _no_modificado(etag, ultima):
+                resp = current_app.response_class(status=304)
+                _validadores(resp, etag, ultima)
+                return resp
+
+            resp = current_app.make_response(vista(*args, **kwargs))
+            if resp.status_code == 200 and "ETag" not in resp.headers:
+                _validadores(resp, etag, ultima)
+            return resp
+
+        return envoltura
+
+    return decorador
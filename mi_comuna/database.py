@@ -0,0 +1,238 @@
+# mi_comuna/database.py
+"""Perfil del motor de base de datos según ``DB_PROFILE``.
+
+``"auto"`` elige por el dialecto de ``SQLALCHEMY_DATABASE_URI``; ``"none"``
+deja el motor como lo crea Flask-SQLAlchemy.
+
+Perfil ``sqlite``: cada conexión nueva recibe ``SQLITE_PRAGMAS`` (WAL,
+synchronous=NORMAL, busy_timeout, caché, mmap, temporales en memoria y
+claves foráneas, sin las cuales los ``ondelete="CASCADE"`` no hacen nada).
+Con WAL los lectores no bloquean al escritor y varios workers de gunicorn
+pueden compartir el archivo; el WAL se recorta y las estadísticas del
+planificador se actualizan cada ``SQLITE_MAINTENANCE_INTERVAL`` segundos en
+cada worker, o a mano con ``flask sqlite mantenimiento``.
+
+Perfil ``postgres``: ``configurar(app)`` arma ``SQLALCHEMY_ENGINE_OPTIONS``
+antes de crear el motor. Cada worker de gunicorn tiene su pool, de una
+conexión por hilo más las del pool de imágenes (``PG_POOL_SIZE`` lo fija a
+mano) y ``PG_POOL_OVERFLOW`` extra; ``pool_pre_ping`` descarta conexiones
+caídas y ``pool_recycle`` las renueva. El servidor cancela las consultas que
+pasan de ``PG_STATEMENT_TIMEOUT`` y etiqueta la conexión con
+``PG_APPLICATION_NAME``. Con ``PG_PGBOUNCER`` (modo transaction) no se envían
+parámetros de sesión y psycopg 3 no prepara sentencias: el límite va con
+``SET LOCAL statement_timeout`` al empezar cada transacción (una ida y vuelta
+más), y lo que corra fuera de una transacción de SQLAlchemy depende del
+valor del rol (``ALTER ROLE ... SET statement_timeout``), que entonces hay que
+configurar. ``flask postgres info`` compara el total de conexiones con
+``max_connections`` y avisa si las consultas quedan sin límite.
+"""
+import os
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event
+
+from mi_comuna.extensions import db
+
+sqlite_cli = AppGroup("sqlite", help="Mantenimiento de la base SQLite.")
+postgres_cli = AppGroup("postgres", help="Pool y parámetros de PostgreSQL.")
+
+# PID del proceso que ya tiene su hilo de mantenimiento (gunicorn hace fork)
+_mantenimiento = {"pid": None}
+_lock = threading.Lock()
+
+
+def perfil(app):
+    nombre = app.config.get("DB_PROFILE", "auto")
+    if nombre != "auto":
+        return nombre
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if uri.startswith("sqlite"):
+        return "sqlite"
+    if uri.startswith(("postgresql", "postgres:")):
+        return "postgres"
+    return "none"
+
+
+def configurar(app):
+    """Se llama antes de ``db.init_app(app)``: opciones con que se crea el motor."""
+    if perfil(app) != "postgres":
+        return
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if uri.startswith("postgres:"):
+        # Formato de Heroku y similares; SQLAlchemy 2 solo acepta "postgresql"
+        app.config["SQLALCHEMY_DATABASE_URI"] = uri = "postgresql" + uri[len("postgres"):]
+    opciones = opciones_postgres(app.config, uri)
+    # Lo que ya venga en SQLALCHEMY_ENGINE_OPTIONS tiene prioridad
+    opciones.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opciones
+
+
+def init_app(app):
+    """Se llama después de ``db.init_app(app)``: el motor ya existe."""
+    if perfil(app) == "postgres":
+        app.cli.add_command(postgres_cli)
+        timeout = int(app.config.get("PG_STATEMENT_TIMEOUT", 0))
+        if app.config.get("PG_PGBOUNCER") and timeout:
+            with app.app_context():
+                event.listen(db.engine, "begin", _timeout_transaccion(timeout))
+    if perfil(app) != "sqlite":
+        return
+    with app.app_context():
+        event.listen(db.engine, "connect", _conectar_sqlite(dict(app.config.get("SQLITE_PRAGMAS", {}))))
+    app.cli.add_command(sqlite_cli)
+    if app.config.get("SQLITE_MAINTENANCE_INTERVAL", 3600) > 0:
+        app.before_request(_iniciar_mantenimiento)
+
+
+def crear_tablas(app):
+    """``db.create_all()`` si ``DB_CREATE_ALL`` está activo.
+
+    Apagado por defecto con cualquier motor: una base vacía la arma ``flask
+    db upgrade`` desde el esquema inicial, y las tablas que ``create_all()``
+    crea al arrancar (también al correr ``flask db``) harían fallar las
+    migraciones que agregan sus columnas.
+    """
+    if not app.config.get("DB_CREATE_ALL"):
+        return
+    with app.app_context():
+        db.create_all()
+
+
+# ---------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------
+def _conectar_sqlite(pragmas):
+    def conectar(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nombre, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nombre}={valor}")
+        finally:
+            cursor.close()
+
+    return conectar
+
+
+def mantenimiento():
+    """``wal_checkpoint(TRUNCATE)`` + ``PRAGMA optimize``; devuelve (ocupado, páginas en el WAL, copiadas)."""
+    with db.engine.connect() as conn:
+        resultado = tuple(conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one())
+        conn.exec_driver_sql("PRAGMA optimize")
+    return resultado
+
+
+def _iniciar_mantenimiento():
+    # En el primer request de cada worker: un hilo creado antes del fork
+    # (gunicorn --preload) no existiría en los workers
+    if _mantenimiento["pid"] == os.getpid():
+        return
+    with _lock:
+        if _mantenimiento["pid"] == os.getpid():
+            return
+        _mantenimiento["pid"] = os.getpid()
+        app = current_app._get_current_object()
+        threading.Thread(target=_ciclo, args=(app,), name="sqlite-mantenimiento", daemon=True).start()
+
+
+def _ciclo(app):
+    intervalo = app.config.get("SQLITE_MAINTENANCE_INTERVAL", 3600)
+    while True:
+        time.sleep(intervalo)
+        with app.app_context():
+            try:
+                ocupado, paginas, copiadas = mantenimiento()
+                app.logger.info("SQLite: checkpoint %s/%s páginas (ocupado=%s)", copiadas, paginas, ocupado)
+            except Exception:
+                app.logger.exception("Falló el mantenimiento de SQLite")
+
+
+@sqlite_cli.command("mantenimiento")
+def mantenimiento_command():
+    """Recorta el WAL y actualiza las estadísticas del planificador (para cron)."""
+    ocupado, paginas, copiadas = mantenimiento()
+    aviso = " (había lectores activos: repetir más tarde)" if ocupado else ""
+    click.echo(f"✅ Checkpoint: {copiadas}/{paginas} páginas del WAL copiadas{aviso}; PRAGMA optimize listo.")
+
+
+@sqlite_cli.command("pragmas")
+def pragmas_command():
+    """Muestra los PRAGMA efectivos de una conexión del pool."""
+    with db.engine.connect() as conn:
+        for nombre in current_app.config.get("SQLITE_PRAGMAS", {}):
+            click.echo(f"{nombre} = {conn.exec_driver_sql(f'PRAGMA {nombre}').scalar()}")
+
+
+# ---------------------------------------------------------------------
+# PostgreSQL
+# ---------------------------------------------------------------------
+def tamano_pool(config):
+    """Conexiones fijas por worker: una por hilo de gunicorn más las del pool de imágenes."""
+    if config.get("PG_POOL_SIZE"):
+        return config["PG_POOL_SIZE"]
+    imagenes = config.get("IMAGE_WORKERS", 0) if config.get("IMAGE_PROCESSING") == "thread" else 0
+    return max(1, config.get("GUNICORN_THREADS", 1)) + imagenes
+
+
+def conexiones_maximas(config):
+    """Conexiones que pueden abrir todos los workers juntos en el peor caso."""
+    return max(1, config.get("GUNICORN_WORKERS", 1)) * (tamano_pool(config) + config.get("PG_POOL_OVERFLOW", 0))
+
+
+def opciones_postgres(config, uri):
+    connect_args = {"application_name": config.get("PG_APPLICATION_NAME", "mi_comuna")}
+    if config.get("PG_PGBOUNCER"):
+        # PgBouncer rechaza "options" al conectar, y en modo transaction una
+        # sentencia preparada queda en una conexión del servidor que el
+        # siguiente request quizá no reciba. psycopg2 nunca prepara en el servidor
+        if uri.startswith("postgresql+psycopg:"):
+            connect_args["prepare_threshold"] = None
+    else:
+        connect_args["options"] = f"-c statement_timeout={int(config.get('PG_STATEMENT_TIMEOUT', 0))}"
+    return {
+        "pool_size": tamano_pool(config),
+        "max_overflow": config.get("PG_POOL_OVERFLOW", 2),
+        "pool_timeout": config.get("PG_POOL_TIMEOUT", 10),
+        "pool_recycle": config.get("PG_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+
+def _timeout_transaccion(ms):
+    # PgBouncer no deja fijar el parámetro en la sesión: se repite en cada
+    # transacción y el servidor lo olvida con el COMMIT/ROLLBACK
+    def empezar(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+
+    return empezar
+
+
+@postgres_cli.command("info")
+def postgres_info_command():
+    """Pool calculado, parámetros efectivos de una conexión y presupuesto de conexiones."""
+    config = current_app.config
+    pool = db.engine.pool
+    click.echo(
+        f"Pool por worker: {pool.size()} + {pool._max_overflow} extra · "
+        f"{config['GUNICORN_WORKERS']} worker(s) × {config['GUNICORN_THREADS']} hilo(s)"
+        f"{' · PgBouncer' if config.get('PG_PGBOUNCER') else ''}"
+    )
+    with db.engine.connect() as conn:
+        for nombre in ("server_version", "application_name", "statement_timeout"):
+            click.echo(f"{nombre} = {conn.exec_driver_sql(f'SHOW {nombre}').scalar()}")
+        sin_limite = conn.exec_driver_sql("SHOW statement_timeout").scalar() == "0"
+        maximo = int(conn.exec_driver_sql("SHOW max_connections").scalar())
+        reservadas = int(conn.exec_driver_sql("SHOW superuser_reserved_connections").scalar())
+    if sin_limite:
+        click.echo("⚠️  statement_timeout = 0: una consulta colgada retiene su conexión sin límite "
+                   "(PG_STATEMENT_TIMEOUT, o ALTER ROLE ... SET statement_timeout detrás de PgBouncer).")
+    total = conexiones_maximas(config)
+    disponibles = maximo - reservadas
+    if total > disponibles and not config.get("PG_PGBOUNCER"):
+        click.echo(f"⚠️  Hasta {total} conexiones y el servidor admite {disponibles}: bajar hilos/overflow o usar PgBouncer.")
+    else:
+        click.echo(f"✅ Hasta {total} conexiones de {disponibles} disponibles en el servidor.")
@@ -0,0 +1,190 @@
+# mi_comuna/invalidation.py
+"""Bus de invalidación de cachés dirigido por los eventos del ORM.
+
+En cada flush se recolectan las filas insertadas, modificadas o borradas y
+se traducen a tags:
+
+- siempre ``<tabla>`` y ``<tabla>:<pk>`` (p. ej. ``negocio`` y ``negocio:42``);
+- los que agreguen las reglas del modelo (``etiquetar`` / ``@etiquetas``),
+  p. ej. ``home`` o ``categoria:3:list``;
+- en UPDATE/DELETE masivos, que no pasan por el flush, ``<tabla>``,
+  ``<tabla>:*`` (cualquier fila) y los tags gruesos que declaran las reglas
+  (``home``, ``categoria:*``); ``marcar()`` agrega tags explícitos.
+
+Tras un commit exitoso cada caché suscrita (``suscribir``) recibe, una sola
+vez por transacción, el conjunto de tags que le interesan. Un rollback
+descarta lo recolectado.
+
+Con ``INVALIDATION_DEBUG`` cada respuesta lleva ``X-Cache-Invalidated`` con
+los tags que invalidó el request (también se registran en el log a nivel
+DEBUG).
+"""
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+_TAGS = "invalidation_tags"
+
+# clase → [función(obj) → tags]
+_reglas = {}
+# clase → tags de sus reglas para UPDATE/DELETE masivos (sin filas que leer)
+_masivos = {}
+# (nombre, callback(tags), tablas o None)
+_suscriptores = []
+
+
+def init_app(app):
+    app.after_request(_reportar)
+
+
+# ---------------------------------------------------------------------
+# Registro de reglas y cachés
+# ---------------------------------------------------------------------
+def etiquetas(modelo, masivos=()):
+    """Decorador: ``funcion(obj)`` devuelve tags extra al cambiar `modelo`.
+
+    `masivos` son los tags que cubren a los de la regla cuando no hay filas
+    que leer (UPDATE/DELETE masivos): ``categoria:*`` por ``categoria:<id>:list``.
+    """
+
+    def registrar(funcion):
+        _reglas.setdefault(modelo, []).append(funcion)
+        _masivos.setdefault(modelo, set()).update(masivos)
+        return funcion
+
+    return registrar
+
+
+def etiquetar(modelo, *tags):
+    """Tags fijos que se invalidan con cualquier cambio de `modelo`."""
+    etiquetas(modelo, masivos=tags)(lambda obj: tags)
+
+
+def suscribir(nombre, callback, tablas=None):
+    """Registra una caché: ``callback(tags)`` tras cada commit que la afecte.
+
+    Con `tablas` solo recibe los tags cuyo prefijo (antes de ``:``) esté en
+    ese conjunto; sin él, todos los tags de la transacción.
+    """
+    _suscriptores.append((nombre, callback, frozenset(tablas) if tablas else None))
+
+
+def con_comodines(tags):
+    """`tags` más ``<tabla>:*`` por cada tag con ``:``.
+
+    Las cachés indexan así sus entradas finas (``negocio:42``) para que
+    también las purgue un UPDATE/DELETE masivo sobre la tabla.
+    """
+    resultado = set(tags)
+    resultado.update(t.split(":", 1)[0] + ":*" for t in list(resultado) if ":" in t)
+    return resultado
+
+
+def marcar(session, *tags):
+    """Agrega tags a invalidar en el próximo commit de `session`."""
+    session.info.setdefault(_TAGS, set()).update(tags)
+
+
+# ---------------------------------------------------------------------
+# Traducción de filas a tags
+# ---------------------------------------------------------------------
+def valores(obj, atributo):
+    """Valor actual y anterior (si cambió en este flush) de `atributo`.
+
+    Sirve en las reglas para invalidar también el grupo de origen, p. ej. la
+    categoría anterior de un negocio que se movió de categoría.
+    """
+    historia = inspect(obj).attrs[atributo].history
+    return {v for v in (*historia.added, *historia.unchanged, *historia.deleted) if v is not None}
+
+
+def _sin_efecto(target, value, oldvalue, initiator):
+    pass
+
+
+def con_historial(*atributos):
+    """Carga el valor anterior al reasignar `atributos` en objetos expirados.
+
+    Sin esto, tras un commit el ORM no conoce el valor viejo y ``valores()``
+    solo vería el nuevo.
+    """
+    for atributo in atributos:
+        event.listen(atributo, "set", _sin_efecto, active_history=True)
+
+
+def tags_de(obj):
+    mapper = inspect(obj).mapper
+    tabla = mapper.local_table.name
+    tags = {tabla}
+    pk = mapper.primary_key_from_instance(obj)
+    if None not in pk:
+        tags.add(f"{tabla}:{':'.join(map(str, pk))}")
+    for clase in type(obj).__mro__:
+        for regla in _reglas.get(clase, ()):
+            tags.update(regla(obj))
+    return tags
+
+
+@event.listens_for(Session, "after_flush")
+def _recolectar(session, flush_context):
+    # El historial de atributos sigue disponible hasta after_flush_postexec
+    cambiados = [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+    tags = set()
+    for obj in (*session.new, *cambiados, *session.deleted):
+        if hasattr(obj, "__table__"):
+            tags |= tags_de(obj)
+    if tags:
+        marcar(session, *tags)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _recolectar_masivos(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        tags = set()
+        for mapper in orm_execute_state.all_mappers:
+            tags |= {mapper.local_table.name, f"{mapper.local_table.name}:*"}
+            for clase in mapper.class_.__mro__:
+                tags |= _masivos.get(clase, set())
+        marcar(orm_execute_state.session, *tags)
+
+
+# ---------------------------------------------------------------------
+# Publicación tras el commit
+# ---------------------------------------------------------------------
+def publicar(tags):
+    """Entrega `tags` a cada caché suscrita (una llamada por caché)."""
+    tags = set(tags)
+    for nombre, callback, tablas in _suscriptores:
+        propios = tags if tablas is None else {t for t in tags if t.split(":", 1)[0] in tablas}
+        if not propios:
+            continue
+        try:
+            callback(propios)
+        except Exception:
+            # El commit ya ocurrió: una caché que falla no debe romper el request
+            if has_app_context():
+                current_app.logger.exception("Falló la invalidación de la caché %s", nombre)
+
+    if has_request_context():
+        g.setdefault("tags_invalidados", set()).update(tags)
+    if has_app_context():
+        current_app.logger.debug("Tags invalidados: %s", " ".join(sorted(tags)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_tras_commit(session):
+    tags = session.info.pop(_TAGS, None)
+    if tags:
+        publicar(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_tras_rollback(session):
+    session.info.pop(_TAGS, None)
+
+
+def _reportar(response):
+    tags = g.get("tags_invalidados")
+    if tags and current_app.config.get("INVALIDATION_DEBUG"):
+        response.headers["X-Cache-Invalidated"] = " ".join(sorted(tags))
+    return response
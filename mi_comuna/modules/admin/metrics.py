@@ -0,0 +1,72 @@
+# mi_comuna/modules/admin/metrics.py
+"""Métricas del panel de administración en una sola consulta.
+
+Todos los contadores salen de un único SELECT con subconsultas escalares
+(el de negocios con un conteo condicional por estado) y se cachean durante
+``ADMIN_METRICS_TTL`` segundos o hasta el próximo commit que toque esas
+tablas.
+"""
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from mi_comuna.cache import TTLCache
+from mi_comuna.extensions import db
+from mi_comuna.invalidation import suscribir
+from mi_comuna.modules.auth.models import Usuario
+from mi_comuna.modules.inicio.models import Noticia, Aviso, Evento
+from mi_comuna.modules.negocios.models import Negocio, Categoria
+
+Metricas = namedtuple(
+    "Metricas",
+    "total_negocios aprobados pendientes rechazados usuarios categorias noticias avisos eventos",
+)
+
+_cache = TTLCache(maxsize=1)
+
+
+def _contar(modelo):
+    return select(func.count(modelo.id)).scalar_subquery()
+
+
+def _contar_negocios(estado):
+    return (
+        select(func.coalesce(func.sum(case((Negocio.estado == estado, 1), else_=0)), 0))
+        .scalar_subquery()
+    )
+
+
+def _consultar():
+    fila = db.session.execute(
+        select(
+            _contar(Negocio),
+            _contar_negocios("aprobado"),
+            _contar_negocios("pendiente"),
+            _contar_negocios("rechazado"),
+            _contar(Usuario),
+            _contar(Categoria),
+            _contar(Noticia),
+            _contar(Aviso),
+            _contar(Evento),
+        )
+    ).one()
+    return Metricas(*fila)
+
+
+def obtener_metricas():
+    """Contadores del panel; cacheados por un TTL corto y configurable."""
+    ttl = current_app.config.get("ADMIN_METRICS_TTL", 30)
+    if ttl <= 0:
+        return _consultar()
+    return _cache.get_or_set("metricas", _consultar, ttl)
+
+
+def invalidar_metricas():
+    _cache.clear()
+
+
+suscribir(
+    "admin_metricas", lambda tags: invalidar_metricas(),
+    tablas={"negocio", "usuario", "categoria", "noticia", "aviso", "evento"},
+)
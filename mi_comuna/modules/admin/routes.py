@@ -1,64 +1,167 @@
 # mi_comuna/modules/admin/routes.py
-import os
-from datetime import datetime
-from flask import render_template, redirect, url_for, flash, request
+from datetime import datetime, time
+from flask import current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required
-from werkzeug.utils import secure_filename
+from sqlalchemy.orm import joinedload
 
 from mi_comuna.extensions import db
 from . import admin_bp  # ← usa el bp que definiste en __init__
 from mi_comuna.modules.admin.decorators import admin_required
+from mi_comuna.modules.admin.metrics import obtener_metricas
+from mi_comuna.pagecache.fragmentos import estadisticas
+from mi_comuna.pagination import paginar_keyset
+from mi_comuna.ratelimit import estadisticas as limites_estadisticas
+from mi_comuna.storage import guardar_imagen, descontar
 from mi_comuna.modules.inicio.models import Noticia, Aviso, Evento
-from mi_comuna.modules.negocios.models import Negocio, Categoria
+from mi_comuna.modules.negocios.models import Negocio
+from mi_comuna.modules.negocios import search
+from mi_comuna.modules.negocios.queries import categorias
 from mi_comuna.modules.auth.models import Usuario
 
-UPLOAD_FOLDER = os.path.join("mi_comuna", "static", "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-def save_image(file_storage):
-    if not file_storage or file_storage.filename == "":
-        return None
-    filename = secure_filename(file_storage.filename)
-    path = os.path.join(UPLOAD_FOLDER, filename)
-    file_storage.save(path)
-    return f"uploads/{filename}"
-
 # ---------- Panel principal ----------
 @admin_bp.route("/", methods=["GET"], endpoint="dashboard")
 @login_required
 @admin_required
 def dashboard():
-    total_negocios = Negocio.query.count()
-    pendientes = Negocio.query.filter_by(estado="pendiente").count()
-    aprobados = Negocio.query.filter_by(estado="aprobado").count()
-    usuarios = Usuario.query.count()
-    categorias = Categoria.query.count()
-    noticias = Noticia.query.count()
     return render_template(
         "admin/dashboard.html",
-        usuarios=Usuario.query.count(),
-        aprobados=Negocio.query.filter_by(estado="aprobado").count(),
-        pendientes=Negocio.query.filter_by(estado="pendiente").count(),
-        categorias=Categoria.query.count(),
-        noticias=Noticia.query.count(),
-        avisos_activos=Aviso.query.count(),
-        negocios=Negocio.query.order_by(Negocio.id.desc()).limit(5).all(),
+        metricas=obtener_metricas(),
+        negocios=Negocio.query.options(joinedload(Negocio.categoria)).order_by(Negocio.id.desc()).limit(5).all(),
         ultimos_usuarios=Usuario.query.order_by(Usuario.id.desc()).limit(5).all(),
         ultimas_noticias=Noticia.query.order_by(Noticia.fecha.desc()).limit(5).all(),
     )
 
 
+@admin_bp.route("/metricas.json", methods=["GET"], endpoint="metricas")
+@login_required
+@admin_required
+def metricas():
+    """Mismos contadores del panel en JSON, para refrescarlos sin recargar la página."""
+    return jsonify(obtener_metricas()._asdict())
+
+
+@admin_bp.route("/cache.json", methods=["GET"], endpoint="cache")
+@login_required
+@admin_required
+def cache():
+    """Aciertos/fallos por fragmento de plantilla y tamaño de la caché de páginas (este worker)."""
+    return jsonify(
+        fragmentos={n: {"aciertos": a, "fallos": f} for n, (a, f) in estadisticas().items()},
+        paginas=len(current_app.extensions["pagecache"]),
+    )
+
+
+@admin_bp.route("/limites.json", methods=["GET"], endpoint="limites")
+@login_required
+@admin_required
+def limites():
+    """Intentos permitidos/rechazados por límite de login y registro (este worker)."""
+    return jsonify({n: {"permitidos": p, "rechazados": r} for n, (p, r) in limites_estadisticas().items()})
+
+
 # ---------- Negocios ----------
 @admin_bp.route("/negocios", methods=["GET"])
 @login_required
 @admin_required
 def admin_negocios():
-    estado = request.args.get("estado")
-    query = Negocio.query
+    """Cola de moderación: filtros por estado/categoría/fecha y paginación por keyset."""
+    estado = request.args.get("estado") or None
+    categoria_id = request.args.get("categoria", type=int)
+    desde = _fecha_arg("desde")
+    hasta = _fecha_arg("hasta")
+
+    query = Negocio.query.options(joinedload(Negocio.categoria), joinedload(Negocio.usuario))
     if estado:
-        query = query.filter_by(estado=estado)
-    negocios = query.order_by(Negocio.id.desc()).all()
-    return render_template("admin/negocios.html", negocios=negocios, estado=estado)
+        query = query.filter(Negocio.estado == estado)
+    if categoria_id:
+        query = query.filter(Negocio.categoria_id == categoria_id)
+    if desde:
+        query = query.filter(Negocio.creado_en >= datetime.combine(desde, time.min))
+    if hasta:
+        query = query.filter(Negocio.creado_en <= datetime.combine(hasta, time.max))
+
+    per_page = max(1, min(request.args.get("per_page", 50, type=int), 200))
+    pagina = paginar_keyset(query, Negocio.id, antes=request.args.get("antes"), limite=per_page)
+
+    # Solo los filtros activos: se reenvían tal cual en el enlace "Siguiente"
+    filtros = {
+        k: v
+        for k, v in (
+            ("estado", estado),
+            ("categoria", categoria_id),
+            ("desde", desde.isoformat() if desde else None),
+            ("hasta", hasta.isoformat() if hasta else None),
+        )
+        if v
+    }
+    return render_template(
+        "admin/negocios.html",
+        negocios=pagina.items,
+        siguiente=pagina.siguiente,
+        estado=estado,
+        filtros=filtros,
+        categorias=categorias(),
+    )
+
+
+def _fecha_arg(nombre):
+    valor = request.args.get(nombre, "").strip()
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date() if valor else None
+    except ValueError:
+        return None
+
+
+# Acciones masivas: un solo UPDATE/DELETE para cientos de IDs
+ACCIONES_LOTE = {
+    "aprobar": ("aprobado", "✅ {n} negocio(s) aprobado(s)."),
+    "rechazar": ("rechazado", "🚫 {n} negocio(s) rechazado(s)."),
+    "eliminar": (None, "🗑️ {n} negocio(s) eliminado(s)."),
+}
+
+
+def _ruta_local(url):
+    """`url` si es una ruta de este sitio; si no, None.
+
+    ``urlparse`` no ve un host en ``/\\evil.com`` ni en ``///evil.com`` y el
+    navegador sí (y descarta tabs y saltos de línea): solo se acepta una "/"
+    que no siga con "/" ni "\\", sin caracteres de control.
+    """
+    if url and url.startswith("/") and url[1:2] not in ("/", "\\") and url.isprintable():
+        return url
+    return None
+
+
+@admin_bp.route("/negocios/lote", methods=["POST"])
+@login_required
+@admin_required
+def negocios_lote():
+    accion = request.form.get("accion")
+    ids = sorted({int(i) for i in request.form.getlist("ids") if i.isdigit()})
+    volver = _ruta_local(request.form.get("next")) or url_for("admin.admin_negocios")
+
+    if accion not in ACCIONES_LOTE or not ids:
+        flash("⚠️ Selecciona al menos un negocio y una acción.", "warning")
+        return redirect(volver)
+
+    nuevo_estado, mensaje = ACCIONES_LOTE[accion]
+    seleccion = Negocio.query.filter(Negocio.id.in_(ids))
+    if nuevo_estado:
+        n = seleccion.update({Negocio.estado: nuevo_estado}, synchronize_session=False)
+    else:
+        imagenes = db.session.scalars(db.select(Negocio.imagen).where(Negocio.id.in_(ids))).all()
+        search.desindexar_ids(db.session.connection(), ids)
+        n = seleccion.delete(synchronize_session=False)
+        descontar(db.session, imagenes)
+
+    # Los UPDATE/DELETE masivos no disparan los hooks del ORM (índice, blobs);
+    # las cachés se invalidan igual por el bus: negocio, negocio:* y los tags
+    # masivos de sus reglas (home, categoria:*)
+    db.session.commit()
+
+    flash(mensaje.format(n=n), "success")
+    return redirect(volver)
+
 
 @admin_bp.route("/negocios/<int:id>/aprobar", methods=["POST"])
 @login_required
@@ -158,8 +261,11 @@ def crear_noticia():
             flash("⚠️ Título y contenido son obligatorios.", "warning")
             return redirect(url_for("admin.crear_noticia"))
         fecha = datetime.now().date()
-        imagen_file = request.files.get("imagen")
-        imagen_rel = save_image(imagen_file) if imagen_file else None
+        try:
+            imagen_rel = guardar_imagen(request.files.get("imagen"))
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for("admin.crear_noticia"))
         noticia = Noticia(titulo=titulo, contenido=contenido, fecha=fecha, imagen=imagen_rel)
         db.session.add(noticia)
         db.session.commit()
@@ -206,7 +312,11 @@ def crear_evento():
             flash("Formato de fecha inválido.", "danger")
             return redirect(url_for("admin.crear_evento"))
 
-        imagen_rel = save_image(imagen_file) if imagen_file else None
+        try:
+            imagen_rel = guardar_imagen(imagen_file)
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for("admin.crear_evento"))
 
         evento = Evento(
             titulo=titulo,
@@ -0,0 +1,45 @@
+# mi_comuna/modules/auth/cli.py
+"""Comandos ``flask passwords ...``."""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash
+
+from .passwords import metodo
+
+passwords_cli = AppGroup("passwords", help="Hash de contraseñas.")
+
+
+def _medir(metodo_hash, hilos, segundos):
+    """Hashes por segundo con `hilos` hilos en paralelo durante ~`segundos`."""
+    fin = time.perf_counter() + segundos
+
+    def trabajar():
+        n = 0
+        while time.perf_counter() < fin:
+            generate_password_hash("contraseña de prueba", metodo_hash)
+            n += 1
+        return n
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        total = sum(pool.map(lambda _: trabajar(), range(hilos)))
+    return total / (time.perf_counter() - inicio)
+
+
+@passwords_cli.command("bench")
+@click.option("--metodo", "metodos", multiple=True, help="Métodos de werkzeug a medir (repetible); por defecto PASSWORD_HASH_METHOD.")
+@click.option("--segundos", default=3.0, show_default=True, help="Duración de cada medición.")
+def bench_command(metodos, segundos):
+    """Hashes por segundo por núcleo, para elegir el costo de PASSWORD_HASH_METHOD."""
+    nucleos = os.cpu_count() or 1
+    for metodo_hash in metodos or (metodo(),):
+        uno = _medir(metodo_hash, 1, segundos)
+        todos = _medir(metodo_hash, nucleos, segundos)
+        click.echo(
+            f"{metodo_hash}: {1000 / uno:.0f} ms por hash · {uno:.1f} hash/s en 1 núcleo · "
+            f"{todos / nucleos:.1f} hash/s por núcleo con {nucleos} hilo(s) ({todos:.1f} en total)"
+        )
@@ -1,7 +1,12 @@
+from collections import namedtuple
+from mi_comuna.cache import TTLCache
 from mi_comuna.extensions import db, login_manager
+from mi_comuna.invalidation import etiquetar, suscribir
+from flask import current_app, g
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, inspect
 from datetime import datetime
+from . import passwords
 
 
 class Usuario(UserMixin, db.Model):
@@ -14,30 +19,134 @@ class Usuario(UserMixin, db.Model):
     rol = db.Column(db.String(50), default="ciudadano", nullable=False)  # admin | ciudadano | otro
 
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
-
+    # Sube con set_password o al cambiar el rol: invalida las sesiones abiertas
+    sesion_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     # -----------------------------------------------------------------
     # Métodos de autenticación
     # -----------------------------------------------------------------
     def set_password(self, password: str) -> None:
-        """Genera un hash seguro para la contraseña."""
-        self.password_hash = generate_password_hash(password)
+        """Genera un hash seguro para la contraseña (y cierra las demás sesiones)."""
+        self.password_hash = passwords.generar_hash(password)
+        self.sesion_version = (self.sesion_version or 0) + 1
 
     def check_password(self, password: str) -> bool:
-        """Verifica si la contraseña coincide con el hash almacenado."""
-        return check_password_hash(self.password_hash, password)
+        """Verifica si la contraseña coincide con el hash almacenado.
+
+        Si el hash usa otro método o costo que PASSWORD_HASH_METHOD se
+        recalcula; queda pendiente hasta el próximo commit.
+        """
+        if not passwords.verificar(self.password_hash, password):
+            return False
+        if passwords.requiere_rehash(self.password_hash):
+            self.password_hash = passwords.generar_hash(password)
+        return True
 
     # -----------------------------------------------------------------
     # Métodos de utilidad
     # -----------------------------------------------------------------
+    def get_id(self):
+        """ID de sesión de Flask-Login: ``"<id>:<sesion_version>"``."""
+        return f"{self.id}:{self.sesion_version or 1}"
+
     def __repr__(self):
         return f"<Usuario {self.email} ({self.rol})>"
 
 
+# Contador de usuarios de la portada
+etiquetar(Usuario, "home")
+
+
+@event.listens_for(Usuario, "before_update")
+def _nueva_version_sesion(mapper, connection, usuario):
+    if inspect(usuario).attrs.rol.history.has_changes():
+        usuario.sesion_version = (usuario.sesion_version or 1) + 1
+
+
 # ---------------------------------------------------------------------
 # Flask-Login: carga de usuario por ID
 # ---------------------------------------------------------------------
+class UsuarioSesion(namedtuple("UsuarioSesion", "id nombre email rol perfil_id version"), UserMixin):
+    """Lo que las plantillas y decoradores leen de ``current_user``, sin ORM.
+
+    Cualquier otro atributo (``check_password``, ``fecha_registro``...) se
+    delega al ``Usuario`` completo, que se carga una sola vez por request y
+    solo si alguna vista lo pide (también disponible como ``.usuario``).
+    """
+
+    __slots__ = ()
+
+    def get_id(self):
+        return f"{self.id}:{self.version}"
+
+    @property
+    def usuario(self):
+        if "usuario" not in g:
+            g.usuario = db.session.get(Usuario, self.id)
+        return g.usuario
+
+    def __getattr__(self, nombre):
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        return getattr(self.usuario, nombre)
+
+
+# Un snapshot por usuario y worker; se descarta tras cualquier commit sobre su
+# fila o sobre perfil_empresa. El TTL acota la desactualización (p. ej. un
+# cambio de rol) en los demás workers de gunicorn.
+_sesiones_cache = TTLCache(maxsize=4096)
+
+
+def _consultar_sesion(usuario_id):
+    from mi_comuna.modules.ciudadano.models import PerfilEmpresa
+
+    fila = db.session.execute(
+        db.select(Usuario.id, Usuario.nombre, Usuario.email, Usuario.rol, PerfilEmpresa.id, Usuario.sesion_version)
+        .outerjoin(PerfilEmpresa, PerfilEmpresa.usuario_id == Usuario.id)
+        .where(Usuario.id == usuario_id)
+    ).first()
+    return UsuarioSesion(*fila) if fila else None
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Función que indica a Flask-Login cómo cargar un usuario desde su ID."""
-    return Usuario.query.get(int(user_id))
+    """Función que indica a Flask-Login cómo cargar un usuario desde su ID.
+
+    `user_id` es ``"<id>:<sesion_version>"``; una versión vieja (contraseña
+    o rol cambiados) o un ID sin versión cierran la sesión.
+    """
+    try:
+        usuario_id, version = (int(parte) for parte in user_id.split(":"))
+    except ValueError:
+        return None
+
+    ttl = current_app.config.get("SESION_CACHE_TTL", 60)
+    sesion = _sesiones_cache.get(usuario_id) if ttl > 0 else None
+    if sesion is None or sesion.version != version:
+        sesion = _consultar_sesion(usuario_id)
+        if sesion is None:
+            return None
+        if ttl > 0:
+            _sesiones_cache.set(usuario_id, sesion, ttl)
+    return sesion if sesion.version == version else None
+
+
+def invalidar_sesion(usuario_id=None):
+    if usuario_id is None:
+        _sesiones_cache.clear()
+    else:
+        _sesiones_cache.delete(usuario_id)
+
+
+def _purgar(tags):
+    # perfil_id: altas y bajas de perfiles (no sabemos de qué usuario)
+    if "usuario:*" in tags or "perfil_empresa" in tags:
+        invalidar_sesion()
+        return
+    for tag in tags:
+        tabla, _, pk = tag.partition(":")
+        if tabla == "usuario" and pk.isdigit():
+            invalidar_sesion(int(pk))
+
+
+suscribir("sesiones", _purgar, tablas={"usuario", "perfil_empresa"})
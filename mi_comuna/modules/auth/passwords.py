@@ -0,0 +1,78 @@
+# mi_comuna/modules/auth/passwords.py
+"""Hash de contraseñas fuera del hilo del request.
+
+Los hashes (scrypt o pbkdf2 de werkzeug, con el costo de
+``PASSWORD_HASH_METHOD``) corren en un pool de ``PASSWORD_HASH_WORKERS``
+hilos por worker de gunicorn: una ráfaga de logins hace cola en el pool en
+vez de ocupar todos los hilos y la CPU que necesitan las demás rutas
+(hashlib libera el GIL mientras calcula). Si un hash espera más de
+``PASSWORD_HASH_TIMEOUT`` segundos se lanza ``ServicioOcupado``.
+
+Al iniciar sesión con un hash de otro método o costo se recalcula con el
+actual (``requiere_rehash``), sin que el usuario haga nada.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ServicioOcupado(RuntimeError):
+    """El pool de hashes no atendió el pedido dentro de PASSWORD_HASH_TIMEOUT."""
+
+
+def init_app(app):
+    from .cli import passwords_cli
+    app.cli.add_command(passwords_cli)
+
+
+def metodo():
+    return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+
+def _obtener_pool(app):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=app.config.get("PASSWORD_HASH_WORKERS", 1),
+                thread_name_prefix="passwords",
+            )
+        return _pool
+
+
+def _ejecutar(funcion, *args):
+    """Corre `funcion` en el pool (``PASSWORD_HASH_EXECUTOR``: thread | sync)."""
+    app = current_app._get_current_object()
+    if app.config.get("PASSWORD_HASH_EXECUTOR", "thread") == "sync":
+        return funcion(*args)
+    futuro = _obtener_pool(app).submit(funcion, *args)
+    try:
+        return futuro.result(timeout=app.config.get("PASSWORD_HASH_TIMEOUT", 10))
+    except TimeoutError:
+        futuro.cancel()
+        raise ServicioOcupado("Demasiados inicios de sesión simultáneos") from None
+
+
+def generar_hash(password):
+    return _ejecutar(generate_password_hash, password, metodo())
+
+
+def verificar(password_hash, password):
+    return _ejecutar(check_password_hash, password_hash, password)
+
+
+@lru_cache(maxsize=8)
+def _prefijo(metodo):
+    # werkzeug completa los parámetros omitidos ("scrypt" → "scrypt:32768:8:1")
+    return generate_password_hash("", metodo).split("$", 1)[0]
+
+
+def requiere_rehash(password_hash):
+    """True si `password_hash` no usa el método y costo configurados."""
+    return password_hash.split("$", 1)[0] != _prefijo(metodo())
@@ -5,10 +5,13 @@ from flask_login import login_user, logout_user, login_required, current_user
 
 from . import auth_bp
 from .models import Usuario
+from .passwords import ServicioOcupado
 from .forms import LoginForm, RegisterForm
 from mi_comuna.extensions import db
+from mi_comuna.ratelimit import limitar
 
 @auth_bp.route("/register", methods=["GET", "POST"])
+@limitar("register", ip="RATELIMIT_REGISTER_IP")
 def register():
     if current_user.is_authenticated:
         flash("Ya has iniciado sesión.", "info")
@@ -24,7 +27,11 @@ def register():
             email=form.email.data.strip().lower(),
             rol="ciudadano",
         )
-        nuevo.set_password(form.password.data)
+        try:
+            nuevo.set_password(form.password.data)
+        except ServicioOcupado:
+            flash("⏳ Hay mucha demanda en este momento. Intenta de nuevo en unos segundos.", "warning")
+            return render_template("auth/register.html", form=form), 503
         db.session.add(nuevo)
         db.session.commit()
         flash("✅ Cuenta creada con éxito. Ahora inicia sesión.", "success")
@@ -32,6 +39,7 @@ def register():
     return render_template("auth/register.html", form=form)
 
 @auth_bp.route("/login", methods=["GET", "POST"])
+@limitar("login", ip="RATELIMIT_LOGIN_IP", email="RATELIMIT_LOGIN_EMAIL")
 def login():
     if current_user.is_authenticated:
         flash("Ya has iniciado sesión.", "info")
@@ -39,7 +47,14 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         usuario = Usuario.query.filter_by(email=form.email.data.strip().lower()).first()
-        if usuario and usuario.check_password(form.password.data):
+        try:
+            valido = usuario is not None and usuario.check_password(form.password.data)
+        except ServicioOcupado:
+            flash("⏳ Hay mucha demanda en este momento. Intenta de nuevo en unos segundos.", "warning")
+            return render_template("auth/login.html", form=form), 503
+        if valido:
+            # Guarda el hash recalculado si cambió PASSWORD_HASH_METHOD
+            db.session.commit()
             login_user(usuario, remember=getattr(form, "remember_me", None) and form.remember_me.data)
             flash("✅ Sesión iniciada correctamente.", "success")
 
@@ -1,6 +1,12 @@
 # mi_comuna/modules/ciudadano/models.py
+from collections import namedtuple
 from datetime import datetime, date
+from functools import cached_property
 from mi_comuna.extensions import db
+from mi_comuna.invalidation import etiquetas, valores
+from mi_comuna.storage import rastrear
+
+ConteoPublicaciones = namedtuple("ConteoPublicaciones", "avisos eventos noticias ofertas total")
 
 
 # ======================================================
@@ -40,10 +46,36 @@ class PerfilEmpresa(db.Model):
     def __repr__(self):
         return f"<PerfilEmpresa {self.nombre} (usuario_id={self.usuario_id})>"
 
+    @cached_property
+    def counts(self):
+        """Conteo de publicaciones por tipo en una sola consulta (sin cargar filas hijas).
+
+        Se calcula una vez por instancia, es decir, una vez por request.
+        """
+        def contar(modelo):
+            return (
+                db.select(db.func.count(modelo.id))
+                .where(modelo.perfil_id == self.id)
+                .scalar_subquery()
+            )
+
+        fila = db.session.execute(
+            db.select(
+                contar(AvisoCiudadano),
+                contar(EventoCiudadano),
+                contar(NoticiaEmpresa),
+                contar(OfertaCiudadano),
+            )
+        ).one()
+        return ConteoPublicaciones(*fila, total=sum(fila))
+
     @property
     def total_publicaciones(self):
         """Cantidad total de contenidos publicados (noticias + avisos + eventos + ofertas)."""
-        return len(self.noticias) + len(self.avisos) + len(self.eventos) + len(self.ofertas)
+        return self.counts.total
+
+
+rastrear(PerfilEmpresa, "logo")
 
 
 # ======================================================
@@ -51,6 +83,13 @@ class PerfilEmpresa(db.Model):
 # ======================================================
 class EventoCiudadano(db.Model):
     __tablename__ = "evento_ciudadano"
+    __table_args__ = (
+        # Listados del ciudadano: WHERE perfil_id = ? ORDER BY creado_en DESC NULLS LAST, id DESC
+        db.Index(
+            "ix_evento_ciudadano_perfil_id_creado_en", "perfil_id", "creado_en", "id",
+            postgresql_ops={"creado_en": "DESC NULLS LAST", "id": "DESC"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
@@ -84,6 +123,13 @@ class EventoCiudadano(db.Model):
 # ======================================================
 class AvisoCiudadano(db.Model):
     __tablename__ = "aviso_ciudadano"
+    __table_args__ = (
+        # Listados del ciudadano: WHERE perfil_id = ? ORDER BY creado_en DESC NULLS LAST, id DESC
+        db.Index(
+            "ix_aviso_ciudadano_perfil_id_creado_en", "perfil_id", "creado_en", "id",
+            postgresql_ops={"creado_en": "DESC NULLS LAST", "id": "DESC"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(150), nullable=False)
@@ -107,6 +153,13 @@ class AvisoCiudadano(db.Model):
 # ======================================================
 class NoticiaEmpresa(db.Model):
     __tablename__ = "noticia_empresa"
+    __table_args__ = (
+        # Listados del ciudadano: WHERE perfil_id = ? ORDER BY fecha_publicacion DESC NULLS LAST, id DESC
+        db.Index(
+            "ix_noticia_empresa_perfil_id_fecha_publicacion", "perfil_id", "fecha_publicacion", "id",
+            postgresql_ops={"fecha_publicacion": "DESC NULLS LAST", "id": "DESC"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
@@ -137,6 +190,13 @@ class NoticiaEmpresa(db.Model):
 # ======================================================
 class OfertaCiudadano(db.Model):
     __tablename__ = "oferta_ciudadano"
+    __table_args__ = (
+        # Listados del ciudadano: WHERE perfil_id = ? ORDER BY creado_en DESC NULLS LAST, id DESC
+        db.Index(
+            "ix_oferta_ciudadano_perfil_id_creado_en", "perfil_id", "creado_en", "id",
+            postgresql_ops={"creado_en": "DESC NULLS LAST", "id": "DESC"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(150), nullable=False)
@@ -165,3 +225,13 @@ class OfertaCiudadano(db.Model):
         if self.fecha_fin and self.fecha_fin < hoy:
             return False
         return True
+
+
+def _tags_feed(publicacion):
+    # Feed de actividad del perfil en negocios.detalle
+    return {f"perfil_empresa:{p}:feed" for p in valores(publicacion, "perfil_id")}
+
+
+for _modelo in (EventoCiudadano, AvisoCiudadano, NoticiaEmpresa, OfertaCiudadano):
+    rastrear(_modelo, "imagen")
+    etiquetas(_modelo, masivos=("perfil_empresa:*",))(_tags_feed)
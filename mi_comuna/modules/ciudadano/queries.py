@@ -0,0 +1,82 @@
+# mi_comuna/modules/ciudadano/queries.py
+from flask import abort, current_app, g
+from flask_login import current_user
+from sqlalchemy import delete, select
+
+from mi_comuna.cache import TTLCache
+from mi_comuna.extensions import db
+from mi_comuna.invalidation import marcar, suscribir
+from mi_comuna.storage import descontar
+from .models import PerfilEmpresa
+
+
+# ---------- Perfil del usuario actual ----------
+# Se resuelve una vez por request (g.perfil). Entre requests se guarda una
+# copia desacoplada de la sesión por usuario durante PERFIL_CACHE_TTL
+# segundos y se adjunta a la sesión del request con merge(load=False), sin
+# consultar la base de datos. Cualquier commit sobre perfil_empresa vacía la
+# caché; el TTL acota la desactualización en los demás workers.
+_perfiles_cache = TTLCache(maxsize=1024)
+_SIN_PERFIL = "sin-perfil"
+
+
+def _consultar_perfil(usuario_id):
+    perfil = db.session.scalars(select(PerfilEmpresa).where(PerfilEmpresa.usuario_id == usuario_id)).first()
+    if perfil is None:
+        return _SIN_PERFIL
+    # La copia cacheada no queda ligada a la sesión (ni la expira su commit)
+    db.session.expunge(perfil)
+    return perfil
+
+
+def _cargar_perfil(usuario_id):
+    ttl = current_app.config.get("PERFIL_CACHE_TTL", 30)
+    if ttl <= 0:
+        return db.session.scalars(select(PerfilEmpresa).where(PerfilEmpresa.usuario_id == usuario_id)).first()
+    perfil = _perfiles_cache.get_or_set(usuario_id, lambda: _consultar_perfil(usuario_id), ttl)
+    if perfil is _SIN_PERFIL:
+        return None
+    return db.session.merge(perfil, load=False)
+
+
+def perfil_actual():
+    """PerfilEmpresa del usuario autenticado (o None), memorizado en ``g.perfil``."""
+    if "perfil" not in g:
+        g.perfil = _cargar_perfil(current_user.id) if current_user.is_authenticated else None
+    return g.perfil
+
+
+def invalidar_perfiles():
+    _perfiles_cache.clear()
+
+
+def _purgar(tags):
+    # Altas, ediciones y bajas de perfiles; no los tags perfil_empresa:<id>:feed
+    # que publican avisos, eventos, noticias y ofertas
+    if "perfil_empresa" in tags:
+        invalidar_perfiles()
+
+
+suscribir("perfil_actual", _purgar, tablas={"perfil_empresa"})
+
+
+# ---------- Borrado de publicaciones propias ----------
+def eliminar_publicacion(modelo, id):
+    """Borra la publicación `id` del perfil actual en un solo DELETE.
+
+    Responde 404 si no existe o es de otro perfil (no se distingue para no
+    revelar publicaciones ajenas). Como el DELETE masivo no pasa por los
+    hooks del ORM, libera la imagen y marca el feed del perfil a mano.
+    """
+    perfil = perfil_actual()
+    if perfil is None:
+        abort(404)
+    imagen = db.session.execute(
+        delete(modelo)
+        .where(modelo.id == id, modelo.perfil_id == perfil.id)
+        .returning(modelo.imagen)
+    ).first()
+    if imagen is None:
+        abort(404)
+    descontar(db.session, [imagen.imagen])
+    marcar(db.session, f"perfil_empresa:{perfil.id}:feed")
@@ -1,43 +1,42 @@
-import os, uuid
-from flask import render_template, redirect, url_for, flash, request, current_app, abort
+from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from datetime import datetime
 
 from mi_comuna.extensions import db
+from mi_comuna.pagination import paginar_keyset
+from mi_comuna.storage import guardar_imagen
 from mi_comuna.modules.ciudadano import ciudadano_bp
 from mi_comuna.modules.ciudadano.decorators import ciudadano_required
 from mi_comuna.modules.ciudadano.models import (
     PerfilEmpresa, EventoCiudadano, AvisoCiudadano, NoticiaEmpresa, OfertaCiudadano
 )
-from mi_comuna.modules.negocios.models import Categoria
+from mi_comuna.modules.ciudadano.queries import eliminar_publicacion, perfil_actual
+from mi_comuna.modules.negocios.queries import opciones_categorias
 from mi_comuna.modules.ciudadano.forms import (
     PerfilEmpresaForm, AvisoForm, EventoForm, NoticiaForm, OfertaForm
 )
 
 
 # ======================================================
-# 🔹 Guardar imagen de forma segura
+# 📄 Listados paginados por keyset (ORDER BY en la base de datos)
 # ======================================================
-def save_image(file_storage):
-    if not file_storage or file_storage.filename == "":
-        return None
+def _pagina(modelo, columna, perfil):
+    per_page = max(1, min(request.args.get("per_page", 12, type=int), 50))
+    return paginar_keyset(
+        modelo.query.filter_by(perfil_id=perfil.id),
+        columna,
+        modelo.id,
+        antes=request.args.get("antes"),
+        limite=per_page,
+    )
 
-    allowed = {"png", "jpg", "jpeg", "webp", "gif"}
-    ext = file_storage.filename.rsplit(".", 1)[-1].lower()
-    if ext not in allowed:
-        raise ValueError("Formato de imagen no permitido")
 
-    filename = secure_filename(file_storage.filename)
-    unique = f"{uuid.uuid4().hex}_{filename}"
-
-    upload_root = current_app.config.get("UPLOAD_FOLDER") or os.path.join("mi_comuna", "static", "uploads")
-    os.makedirs(upload_root, exist_ok=True)
-
-    path = os.path.join(upload_root, unique)
-    file_storage.save(path)
-
-    return f"uploads/{unique}"
+def _render_listado(nombre, form, perfil, pagina):
+    """Página completa, o solo los items con ?parcial=1 (scroll infinito)."""
+    contexto = {nombre: pagina.items, "siguiente": pagina.siguiente, "form": form}
+    if request.args.get("parcial"):
+        return render_template(f"ciudadano/_{nombre}.html", **contexto)
+    return render_template(f"ciudadano/{nombre}.html", perfil=perfil, **contexto)
 
 
 # ======================================================
@@ -49,7 +48,7 @@ def dashboard():
     if current_user.rol == "admin":
         return redirect(url_for("admin.dashboard"))
 
-    perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+    perfil = perfil_actual()
     if current_user.rol == "ciudadano" and not perfil:
         return redirect(url_for("ciudadano.perfil"))
 
@@ -63,11 +62,10 @@ def dashboard():
 @login_required
 @ciudadano_required
 def perfil():
-    perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+    perfil = perfil_actual()
     form = PerfilEmpresaForm(obj=perfil)
 
-    categorias = Categoria.query.order_by(Categoria.nombre.asc()).all()
-    form.categoria_id.choices = [(c.id, c.nombre) for c in categorias]
+    form.categoria_id.choices = opciones_categorias()
 
     if form.validate_on_submit():
         if not perfil:
@@ -88,7 +86,7 @@ def perfil():
 
         if form.logo.data:
             try:
-                perfil.logo = save_image(form.logo.data)
+                perfil.logo = guardar_imagen(form.logo.data)
             except ValueError as e:
                 flash(str(e), "danger")
 
@@ -107,7 +105,7 @@ def perfil():
 @login_required
 @ciudadano_required
 def avisos():
-    perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+    perfil = perfil_actual()
     if not perfil:
         flash("⚠️ Debes crear tu perfil antes de publicar avisos.", "warning")
         return redirect(url_for("ciudadano.perfil"))
@@ -115,10 +113,10 @@ def avisos():
     form = AvisoForm()
     if form.validate_on_submit():
         try:
-            imagen_rel = save_image(form.imagen.data) if form.imagen.data else None
+            imagen_rel = guardar_imagen(form.imagen.data) if form.imagen.data else None
         except ValueError as e:
             flash(str(e), "danger")
-            return render_template("ciudadano/avisos.html", form=form, avisos=perfil.avisos, perfil=perfil)
+            return _render_listado("avisos", form, perfil, _pagina(AvisoCiudadano, AvisoCiudadano.creado_en, perfil))
 
         nuevo = AvisoCiudadano(
             titulo=form.titulo.data.strip(),
@@ -131,19 +129,14 @@ def avisos():
         flash("✅ Aviso publicado correctamente", "success")
         return redirect(url_for("ciudadano.avisos"))
 
-    avisos = sorted(perfil.avisos, key=lambda a: a.creado_en, reverse=True)
-    return render_template("ciudadano/avisos.html", form=form, avisos=avisos, perfil=perfil)
+    return _render_listado("avisos", form, perfil, _pagina(AvisoCiudadano, AvisoCiudadano.creado_en, perfil))
 
 
 @ciudadano_bp.route("/avisos/<int:id>/eliminar", methods=["POST"])
 @login_required
 @ciudadano_required
 def eliminar_aviso(id):
-    aviso = AvisoCiudadano.query.get_or_404(id)
-    if not aviso.perfil or aviso.perfil.usuario_id != current_user.id:
-        abort(403)
-
-    db.session.delete(aviso)
+    eliminar_publicacion(AvisoCiudadano, id)
     db.session.commit()
     flash("🗑 Aviso eliminado correctamente.", "success")
     return redirect(url_for("ciudadano.avisos"))
@@ -156,7 +149,7 @@ def eliminar_aviso(id):
 @login_required
 @ciudadano_required
 def noticias():
-    perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+    perfil = perfil_actual()
     if not perfil:
         flash("⚠️ Debes crear tu perfil antes de publicar noticias.", "warning")
         return redirect(url_for("ciudadano.perfil"))
@@ -164,10 +157,10 @@ def noticias():
     form = NoticiaForm()
     if form.validate_on_submit():
         try:
-            imagen_rel = save_image(form.imagen.data) if form.imagen.data else None
+            imagen_rel = guardar_imagen(form.imagen.data) if form.imagen.data else None
         except ValueError as e:
             flash(str(e), "danger")
-            return render_template("ciudadano/noticias.html", form=form, noticias=perfil.noticias, perfil=perfil)
+            return _render_listado("noticias", form, perfil, _pagina(NoticiaEmpresa, NoticiaEmpresa.fecha_publicacion, perfil))
 
         nueva = NoticiaEmpresa(
             titulo=form.titulo.data.strip(),
@@ -180,18 +173,14 @@ def noticias():
         flash("✅ Noticia publicada correctamente", "success")
         return redirect(url_for("ciudadano.noticias"))
 
-    noticias = sorted(perfil.noticias, key=lambda n: n.fecha_publicacion, reverse=True)
-    return render_template("ciudadano/noticias.html", form=form, noticias=noticias, perfil=perfil)
+    return _render_listado("noticias", form, perfil, _pagina(NoticiaEmpresa, NoticiaEmpresa.fecha_publicacion, perfil))
 
 
 @ciudadano_bp.route("/noticias/<int:id>/eliminar", methods=["POST"])
 @login_required
 @ciudadano_required
 def eliminar_noticia(id):
-    noticia = NoticiaEmpresa.query.get_or_404(id)
-    if not noticia.perfil or noticia.perfil.usuario_id != current_user.id:
-        abort(403)
-    db.session.delete(noticia)
+    eliminar_publicacion(NoticiaEmpresa, id)
     db.session.commit()
     flash("✅ Noticia eliminada correctamente", "success")
     return redirect(url_for("ciudadano.noticias"))
@@ -204,7 +193,7 @@ def eliminar_noticia(id):
 @login_required
 @ciudadano_required
 def eventos():
-    perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+    perfil = perfil_actual()
     if not perfil:
         flash("⚠️ Debes crear tu perfil antes de publicar eventos.", "warning")
         return redirect(url_for("ciudadano.perfil"))
@@ -212,10 +201,10 @@ def eventos():
     form = EventoForm()
     if form.validate_on_submit():
         try:
-            imagen_rel = save_image(form.imagen.data) if form.imagen.data else None
+            imagen_rel = guardar_imagen(form.imagen.data) if form.imagen.data else None
         except ValueError as e:
             flash(str(e), "danger")
-            return render_template("ciudadano/eventos.html", form=form, eventos=perfil.eventos, perfil=perfil)
+            return _render_listado("eventos", form, perfil, _pagina(EventoCiudadano, EventoCiudadano.creado_en, perfil))
 
         nuevo = EventoCiudadano(
             titulo=form.titulo.data.strip(),
@@ -231,18 +220,14 @@ def eventos():
         flash("✅ Evento publicado correctamente", "success")
         return redirect(url_for("ciudadano.eventos"))
 
-    eventos = sorted(perfil.eventos, key=lambda e: e.creado_en, reverse=True)
-    return render_template("ciudadano/eventos.html", form=form, eventos=eventos, perfil=perfil)
+    return _render_listado("eventos", form, perfil, _pagina(EventoCiudadano, EventoCiudadano.creado_en, perfil))
 
 
 @ciudadano_bp.route("/eventos/<int:id>/eliminar", methods=["POST"])
 @login_required
 @ciudadano_required
 def eliminar_evento(id):
-    evento = EventoCiudadano.query.get_or_404(id)
-    if not evento.perfil or evento.perfil.usuario_id != current_user.id:
-        abort(403)
-    db.session.delete(evento)
+    eliminar_publicacion(EventoCiudadano, id)
     db.session.commit()
     flash("✅ Evento eliminado correctamente", "success")
     return redirect(url_for("ciudadano.eventos"))
@@ -255,7 +240,7 @@ def eliminar_evento(id):
 @login_required
 @ciudadano_required
 def ofertas():
-    perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+    perfil = perfil_actual()
     if not perfil:
         flash("⚠️ Debes crear tu perfil antes de publicar ofertas.", "warning")
         return redirect(url_for("ciudadano.perfil"))
@@ -263,10 +248,10 @@ def ofertas():
     form = OfertaForm()
     if form.validate_on_submit():
         try:
-            imagen_rel = save_image(form.imagen.data) if form.imagen.data else None
+            imagen_rel = guardar_imagen(form.imagen.data) if form.imagen.data else None
         except ValueError as e:
             flash(str(e), "danger")
-            return render_template("ciudadano/ofertas.html", form=form, ofertas=perfil.ofertas, perfil=perfil)
+            return _render_listado("ofertas", form, perfil, _pagina(OfertaCiudadano, OfertaCiudadano.creado_en, perfil))
 
         nueva = OfertaCiudadano(
             titulo=form.titulo.data.strip(),
@@ -281,18 +266,14 @@ def ofertas():
         flash("✅ Oferta publicada correctamente", "success")
         return redirect(url_for("ciudadano.ofertas"))
 
-    ofertas = sorted(perfil.ofertas, key=lambda o: o.creado_en, reverse=True)
-    return render_template("ciudadano/ofertas.html", form=form, ofertas=ofertas, perfil=perfil)
+    return _render_listado("ofertas", form, perfil, _pagina(OfertaCiudadano, OfertaCiudadano.creado_en, perfil))
 
 
 @ciudadano_bp.route("/ofertas/<int:id>/eliminar", methods=["POST"])
 @login_required
 @ciudadano_required
 def eliminar_oferta(id):
-    oferta = OfertaCiudadano.query.get_or_404(id)
-    if not oferta.perfil or oferta.perfil.usuario_id != current_user.id:
-        abort(403)
-    db.session.delete(oferta)
+    eliminar_publicacion(OfertaCiudadano, id)
     db.session.commit()
     flash("✅ Oferta eliminada correctamente", "success")
     return redirect(url_for("ciudadano.ofertas"))
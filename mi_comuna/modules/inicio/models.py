@@ -1,5 +1,7 @@
 from datetime import datetime
 from mi_comuna.extensions import db
+from mi_comuna.invalidation import etiquetar
+from mi_comuna.storage import rastrear
 
 
 # ---------------------------------------------------------------------
@@ -13,6 +15,7 @@ class Noticia(db.Model):
     contenido = db.Column(db.Text, nullable=False)
     fecha = db.Column(db.Date, default=datetime.utcnow, nullable=False)
     imagen = db.Column(db.String(255), nullable=True)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
 # ---------------------------------------------------------------------
@@ -26,6 +29,7 @@ class Aviso(db.Model):
     fecha_inicio = db.Column(db.Date, nullable=False)
     fecha_fin = db.Column(db.Date, nullable=True)
     imagen = db.Column(db.String(255), nullable=True)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
 # ---------------------------------------------------------------------
@@ -41,3 +45,10 @@ class Evento(db.Model):
     hora = db.Column(db.Time, nullable=True)
     descripcion = db.Column(db.Text, nullable=True)
     imagen = db.Column(db.String(255), nullable=True)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
+for _modelo in (Noticia, Aviso, Evento):
+    rastrear(_modelo, "imagen")
+    # La portada muestra los últimos de cada tipo
+    etiquetar(_modelo, "home")
@@ -4,12 +4,17 @@ from . import inicio_bp
 from .models import Noticia, Aviso, Evento
 from mi_comuna.modules.negocios.models import Negocio
 from mi_comuna.modules.auth.models import Usuario
+from mi_comuna.conditional import condicional
+from mi_comuna.pagecache import pagina_cacheada
+from mi_comuna.storage.models import Variante
 
 
 # ---------------------------------------------------------------------
 # Página principal
 # ---------------------------------------------------------------------
 @inicio_bp.route("/")
+@condicional(Noticia, Aviso, Evento, Negocio, Usuario, Variante)
+@pagina_cacheada("home", "blob_variante")
 def index():
     """Portada con últimas noticias, eventos, avisos y estadísticas generales."""
     noticias = (
@@ -41,12 +46,12 @@ def index():
         "resenas": 0  # Placeholder, se actualizará cuando se agregue el modelo de reseñas
     }
 
-    # ⭐ Negocios destacados: últimos aprobados
+    # ⭐ Negocios destacados: últimos aprobados. Sin .all(): la consulta corre
+    # al iterarla en la plantilla, o no corre si el fragmento está en caché
     negocios = (
         Negocio.query.filter_by(estado="aprobado")
         .order_by(Negocio.id.desc())
         .limit(6)
-        .all()
     )
 
     return render_template(
@@ -63,6 +68,8 @@ def index():
 # Noticias
 # ---------------------------------------------------------------------
 @inicio_bp.route("/noticias")
+@condicional(Noticia)
+@pagina_cacheada("noticia")
 def noticias():
     """Listado completo de noticias, ordenadas por fecha descendente."""
     noticias = Noticia.query.order_by(Noticia.fecha.desc()).all()
@@ -70,6 +77,7 @@ def noticias():
 
 
 @inicio_bp.route("/noticia/<int:id>")
+@condicional(lambda id: [(Noticia, Noticia.id == id)])
 def ver_noticia(id):
     """Detalle de una noticia específica."""
     noticia = Noticia.query.get_or_404(id)
@@ -80,6 +88,8 @@ def ver_noticia(id):
 # Avisos
 # ---------------------------------------------------------------------
 @inicio_bp.route("/avisos")
+@condicional(Aviso)
+@pagina_cacheada("aviso")
 def avisos():
     """Lista solo los avisos activos (vigentes)."""
     hoy = date.today()
@@ -97,6 +107,8 @@ def avisos():
 # Eventos
 # ---------------------------------------------------------------------
 @inicio_bp.route("/eventos")
+@condicional(Evento)
+@pagina_cacheada("evento")
 def eventos():
     """Listado completo de eventos futuros y recientes."""
     eventos = Evento.query.order_by(Evento.fecha.desc()).all()
@@ -0,0 +1,154 @@
+# mi_comuna/modules/negocios/feed.py
+"""Feed de actividad de un PerfilEmpresa resuelto en SQL.
+
+Una sola consulta UNION ALL sobre avisos, eventos, noticias y ofertas con una
+proyección común, ordenada por (fecha, tipo, id) descendente y paginada por
+keyset: la memoria por request queda acotada por el tamaño de página. Las
+publicaciones sin fecha van al final.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import (
+    Boolean, Date, DateTime, String, and_, case, cast, func, literal, null, or_,
+    select, type_coerce, union_all,
+)
+
+from mi_comuna.extensions import db
+from mi_comuna.pagination import codificar_valores, decodificar_valores, despues_de, orden_descendente
+from mi_comuna.modules.ciudadano.models import (
+    AvisoCiudadano, EventoCiudadano, NoticiaEmpresa, OfertaCiudadano
+)
+
+# El template de detalle corta las noticias en 280 caracteres
+LARGO_NOTICIA = 281
+
+Publicacion = namedtuple(
+    "Publicacion", "tipo fecha id titulo descripcion imagen inicio fin lugar vigente"
+)
+
+
+def _fecha(col, dialecto):
+    """Fecha común comparable entre Date y DateTime."""
+    if dialecto == "sqlite":
+        # Mismo formato para DATE y DATETIME, así la comparación de texto es válida
+        return func.strftime("%Y-%m-%d %H:%M:%f", col)
+    return cast(col, DateTime)
+
+
+def _nulo(tipo):
+    return cast(null(), tipo)
+
+
+def _consulta_union(perfil_id, dialecto, hoy):
+    avisos = select(
+        literal("aviso", String).label("tipo"),
+        _fecha(AvisoCiudadano.creado_en, dialecto).label("fecha"),
+        AvisoCiudadano.id.label("id"),
+        AvisoCiudadano.titulo.label("titulo"),
+        AvisoCiudadano.descripcion.label("descripcion"),
+        AvisoCiudadano.imagen.label("imagen"),
+        _nulo(Date).label("inicio"),
+        _nulo(Date).label("fin"),
+        _nulo(String).label("lugar"),
+        _nulo(Boolean).label("vigente"),
+    ).where(AvisoCiudadano.perfil_id == perfil_id)
+
+    eventos = select(
+        literal("evento", String),
+        _fecha(EventoCiudadano.fecha_inicio, dialecto),
+        EventoCiudadano.id,
+        EventoCiudadano.titulo,
+        EventoCiudadano.descripcion,
+        EventoCiudadano.imagen,
+        EventoCiudadano.fecha_inicio,
+        EventoCiudadano.fecha_fin,
+        EventoCiudadano.lugar,
+        _nulo(Boolean),
+    ).where(EventoCiudadano.perfil_id == perfil_id)
+
+    noticias = select(
+        literal("noticia", String),
+        _fecha(NoticiaEmpresa.fecha_publicacion, dialecto),
+        NoticiaEmpresa.id,
+        NoticiaEmpresa.titulo,
+        func.substr(NoticiaEmpresa.contenido, 1, LARGO_NOTICIA),
+        NoticiaEmpresa.imagen,
+        _nulo(Date),
+        _nulo(Date),
+        _nulo(String),
+        _nulo(Boolean),
+    ).where(NoticiaEmpresa.perfil_id == perfil_id)
+
+    vigente = and_(
+        or_(OfertaCiudadano.fecha_inicio.is_(None), OfertaCiudadano.fecha_inicio <= hoy),
+        or_(OfertaCiudadano.fecha_fin.is_(None), OfertaCiudadano.fecha_fin >= hoy),
+    )
+    ofertas = select(
+        literal("oferta", String),
+        _fecha(func.coalesce(OfertaCiudadano.fecha_inicio, OfertaCiudadano.creado_en), dialecto),
+        OfertaCiudadano.id,
+        OfertaCiudadano.titulo,
+        OfertaCiudadano.descripcion,
+        OfertaCiudadano.imagen,
+        OfertaCiudadano.fecha_inicio,
+        OfertaCiudadano.fecha_fin,
+        _nulo(String),
+        case((vigente, True), else_=False),
+    ).where(OfertaCiudadano.perfil_id == perfil_id)
+
+    return union_all(avisos, eventos, noticias, ofertas).subquery("feed")
+
+
+# ---------------------------------------------------------------------
+# Cursor keyset: "<fecha iso | null>~<tipo>~<id>"
+# ---------------------------------------------------------------------
+def codificar_cursor(pub):
+    return codificar_valores(pub.fecha, pub.tipo, pub.id)
+
+
+def decodificar_cursor(valor):
+    """Devuelve (fecha, tipo, id) —fecha None si era NULL— o None si el cursor no es válido."""
+    return decodificar_valores(valor, datetime, str, int)
+
+
+def _param_fecha(fecha, dialecto):
+    if fecha is None:
+        return None
+    if dialecto == "sqlite":
+        return literal(fecha.strftime("%Y-%m-%d %H:%M:%S.") + f"{fecha.microsecond // 1000:03d}", String)
+    return literal(fecha, DateTime)
+
+
+# ---------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------
+def feed_perfil(perfil_id, antes=None, limite=20):
+    """Página del feed de un perfil.
+
+    `antes` es el cursor devuelto por la página anterior. Retorna
+    ``(publicaciones, cursor_siguiente)``; el cursor es None en la última página.
+    """
+    dialecto = db.engine.dialect.name
+    feed = _consulta_union(perfil_id, dialecto, date.today())
+
+    fecha_col = type_coerce(feed.c.fecha, DateTime) if dialecto == "sqlite" else feed.c.fecha
+    stmt = select(
+        feed.c.tipo, fecha_col.label("fecha"), feed.c.id, feed.c.titulo,
+        feed.c.descripcion, feed.c.imagen, feed.c.inicio, feed.c.fin,
+        feed.c.lugar, feed.c.vigente,
+    )
+
+    cursor = decodificar_cursor(antes) if antes else None
+    if cursor:
+        fecha, tipo, id_ = cursor
+        stmt = stmt.where(despues_de(
+            (feed.c.fecha, feed.c.tipo, feed.c.id),
+            (_param_fecha(fecha, dialecto), literal(tipo, String), literal(id_)),
+        ))
+
+    stmt = stmt.order_by(*orden_descendente(feed.c.fecha, feed.c.tipo, feed.c.id)).limit(limite + 1)
+    filas = [Publicacion(*f) for f in db.session.execute(stmt)]
+
+    siguiente = codificar_cursor(filas[limite - 1]) if len(filas) > limite else None
+    return filas[:limite], siguiente
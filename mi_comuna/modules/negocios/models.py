@@ -1,10 +1,16 @@
+from datetime import datetime
 from mi_comuna.extensions import db
+from mi_comuna.invalidation import con_historial, etiquetas, valores
+from mi_comuna.normalize import columnas_normalizadas
+from mi_comuna.storage import rastrear
+from .utils import slugs_automaticos
 
 class Categoria(db.Model):
     __tablename__ = "categoria"
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False, unique=True)
+    slug = db.Column(db.String(120), nullable=False, unique=True, index=True)  # se genera al escribir
     icono = db.Column(db.String(100), nullable=True)  # opcional para UI
 
     # Relación uno-a-muchos con Negocio
@@ -16,6 +22,7 @@ class Negocio(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(120), nullable=False)
+    slug = db.Column(db.String(120), nullable=False, unique=True, index=True)  # URL de detalle
     descripcion = db.Column(db.Text, nullable=True)
     direccion = db.Column(db.String(255), nullable=False)
     telefono = db.Column(db.String(50), nullable=True)
@@ -23,7 +30,15 @@ class Negocio(db.Model):
     redes = db.Column(db.String(255), nullable=True)
     horarios = db.Column(db.String(120), nullable=True)  # 👈 cambia "horario" → "horarios"
     imagen = db.Column(db.String(255), nullable=True)
-    estado = db.Column(db.String(20), default="pendiente")
+    estado = db.Column(db.String(20), default="pendiente", index=True)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Columnas sombra sin tildes ni mayúsculas (se llenan al escribir): documento
+    # del tsvector en PostgreSQL y LIKE de respaldo sin índice de texto completo
+    nombre_norm = db.Column(db.String(120))
+    descripcion_norm = db.Column(db.Text)
+    direccion_norm = db.Column(db.String(255))
 
     categoria_id = db.Column(db.Integer, db.ForeignKey("categoria.id"), nullable=False)
     usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False, unique=True)
@@ -34,6 +49,26 @@ class Negocio(db.Model):
     @property
     def imagen_url(self):
         """Devuelve la URL completa o una imagen por defecto."""
-        from flask import url_for
-        return url_for("static", filename=self.imagen) if self.imagen else url_for("static", filename="img/logo.png")
+        from mi_comuna.storage import media_url
+        return media_url(self.imagen, "img/logo.png")
+
+
+columnas_normalizadas(Negocio, ("nombre", "descripcion", "direccion"))
+rastrear(Negocio, "imagen")
+slugs_automaticos(Categoria)
+# /negocios/registrar y /negocios/categoria/... son rutas fijas del blueprint
+slugs_automaticos(Negocio, reservados={"registrar", "categoria"})
+
+
+@etiquetas(Negocio, masivos=("home", "categoria:*"))
+def _tags_negocio(negocio):
+    # Destacados de la portada, el listado de su categoría (y la anterior si
+    # cambió) y la página de detalle bajo su slug actual y el anterior
+    return {
+        "home",
+        *(f"categoria:{c}:list" for c in valores(negocio, "categoria_id")),
+        *(f"negocio:slug:{s}" for s in valores(negocio, "slug")),
+    }
+
 
+con_historial(Negocio.categoria_id, Negocio.slug)
@@ -0,0 +1,137 @@
+# mi_comuna/modules/negocios/queries.py
+from collections import namedtuple
+from itertools import groupby
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from mi_comuna.cache import TTLCache
+from mi_comuna.extensions import db
+from mi_comuna.invalidation import suscribir
+from .models import Negocio, Categoria
+
+
+# Filas livianas e inmutables: se pueden compartir entre requests sin
+# arrastrar objetos ORM ligados a una sesión ya cerrada.
+CategoriaRow = namedtuple("CategoriaRow", "id nombre icono slug")
+NegocioRow = namedtuple("NegocioRow", "id nombre slug descripcion imagen categoria_id")
+BloqueCategoria = namedtuple("BloqueCategoria", "categoria slug negocios")
+
+
+# ---------- Top N por categoría (una sola consulta) ----------
+def _consultar_top_por_categoria(limite):
+    """Top `limite` negocios aprobados por categoría usando ROW_NUMBER().
+
+    Funciona en SQLite (>= 3.25) y PostgreSQL: una sola ida a la base de datos,
+    sin importar cuántas categorías existan.
+    """
+    ranked = (
+        select(
+            Negocio.id,
+            Negocio.nombre,
+            Negocio.slug,
+            Negocio.descripcion,
+            Negocio.imagen,
+            Negocio.categoria_id,
+            func.row_number()
+            .over(partition_by=Negocio.categoria_id, order_by=Negocio.id.desc())
+            .label("rn"),
+        )
+        .where(Negocio.estado == "aprobado")
+        .subquery()
+    )
+    stmt = (
+        select(
+            Categoria.id,
+            Categoria.nombre,
+            Categoria.icono,
+            Categoria.slug,
+            ranked.c.id,
+            ranked.c.nombre,
+            ranked.c.slug,
+            ranked.c.descripcion,
+            ranked.c.imagen,
+            ranked.c.categoria_id,
+        )
+        .join(ranked, ranked.c.categoria_id == Categoria.id)
+        .where(ranked.c.rn <= limite)
+        .order_by(Categoria.nombre.asc(), Categoria.id.asc(), ranked.c.rn.asc())
+    )
+    filas = db.session.execute(stmt).all()
+
+    bloques = []
+    for cat, grupo in groupby(filas, key=lambda f: tuple(f[:4])):
+        categoria = CategoriaRow(*cat)
+        negocios = tuple(NegocioRow(*f[4:]) for f in grupo)
+        bloques.append(BloqueCategoria(categoria, categoria.slug, negocios))
+    return tuple(bloques)
+
+
+# Se invalida tras cada commit que toque Negocio o Categoria; el TTL acota
+# la desactualización en los demás workers de gunicorn.
+_top_cache = TTLCache(maxsize=8)
+
+
+def top_por_categoria(limite=None):
+    """Bloques (categoria, slug, negocios) para la portada de negocios."""
+    cfg = current_app.config
+    limite = limite or cfg.get("NEGOCIOS_TOP_POR_CATEGORIA", 3)
+    ttl = cfg.get("NEGOCIOS_TOP_CACHE_TTL", 300)
+    if ttl <= 0:
+        return _consultar_top_por_categoria(limite)
+    return _top_cache.get_or_set(limite, lambda: _consultar_top_por_categoria(limite), ttl)
+
+
+def invalidar_top_por_categoria():
+    _top_cache.clear()
+
+
+# Aprobar / rechazar / eliminar negocios (también en lote) y cambios de categoría
+suscribir("negocios_top", lambda tags: invalidar_top_por_categoria(), tablas={"negocio", "categoria"})
+
+
+# ---------- Categorías: datos de referencia compartidos entre requests ----------
+# Cambian muy rara vez: se cargan una vez por worker como tuplas inmutables
+# (con índices por id y por slug) y se descartan tras cualquier commit que
+# toque la tabla categoria.
+_categorias_cache = TTLCache(maxsize=1)
+
+
+def _consultar_categorias():
+    filas = db.session.execute(
+        select(Categoria.id, Categoria.nombre, Categoria.icono, Categoria.slug).order_by(Categoria.nombre.asc())
+    ).all()
+    lista = tuple(CategoriaRow(*f) for f in filas)
+    return lista, {c.id: c for c in lista}, {c.slug: c for c in lista}
+
+
+def _categorias():
+    ttl = current_app.config.get("CATEGORIAS_CACHE_TTL", 3600)
+    if ttl <= 0:
+        return _consultar_categorias()
+    return _categorias_cache.get_or_set("categorias", _consultar_categorias, ttl)
+
+
+def categorias():
+    """Todas las categorías (CategoriaRow) ordenadas por nombre."""
+    return _categorias()[0]
+
+
+def categoria_por_id(categoria_id):
+    return _categorias()[1].get(categoria_id)
+
+
+def categoria_por_slug(slug):
+    return _categorias()[2].get(slug)
+
+
+def opciones_categorias():
+    """``choices`` para un SelectField de WTForms."""
+    return [(c.id, c.nombre) for c in categorias()]
+
+
+def invalidar_categorias():
+    _categorias_cache.clear()
+
+
+suscribir("categorias", lambda tags: invalidar_categorias(), tablas={"categoria"})
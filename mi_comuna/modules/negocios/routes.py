@@ -1,64 +1,69 @@
 # mi_comuna/modules/negocios/routes.py
-import os, re, uuid
-from datetime import date, datetime
-from flask import render_template, redirect, url_for, flash, request, current_app
+import re
+
+from flask import abort, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from sqlalchemy.orm import joinedload
-from sqlalchemy import or_
-from werkzeug.utils import secure_filename
+from sqlalchemy import false, or_, select
 
 from mi_comuna.extensions import db
+from mi_comuna.conditional import condicional
+from mi_comuna.normalize import normalizar
+from mi_comuna.pagecache import pagina_cacheada
+from mi_comuna.storage import guardar_imagen
 from . import negocios_bp
 from .models import Negocio, Categoria
-from mi_comuna.modules.ciudadano.models import PerfilEmpresa, EventoCiudadano, AvisoCiudadano, NoticiaEmpresa, OfertaCiudadano
-
-
-def slugify(text):
-    text = re.sub(r"[^\w\s-]", "", text, flags=re.UNICODE).strip().lower()
-    return re.sub(r"[-\s]+", "-", text)
-
-
-def save_image(file_storage):
-    if not file_storage or file_storage.filename == "":
-        return None
-    allowed = {"png", "jpg", "jpeg", "webp", "gif"}
-    ext = file_storage.filename.rsplit(".", 1)[-1].lower()
-    if ext not in allowed:
-        raise ValueError("Formato de imagen no permitido")
-    filename = secure_filename(file_storage.filename)
-    unique = f"{uuid.uuid4().hex}_{filename}"
-    upload_root = current_app.config.get("UPLOAD_FOLDER") or os.path.join("mi_comuna", "static", "uploads")
-    os.makedirs(upload_root, exist_ok=True)
-    path = os.path.join(upload_root, unique)
-    file_storage.save(path)
-    return f"uploads/{unique}"
+from .queries import categoria_por_id, categoria_por_slug, categorias as categorias_ref, opciones_categorias
+from .queries import top_por_categoria as consultar_top_por_categoria
+from .feed import feed_perfil
+from . import search
+from mi_comuna.modules.ciudadano.models import (
+    AvisoCiudadano, EventoCiudadano, NoticiaEmpresa, OfertaCiudadano, PerfilEmpresa
+)
+from mi_comuna.modules.ciudadano.queries import perfil_actual
+from mi_comuna.storage.models import Variante
 
 
 # ---------- Listado principal ----------
 @negocios_bp.route("/", methods=["GET"], endpoint="lista_negocios")
+@condicional(Negocio, Categoria, Variante)
+@pagina_cacheada("negocio", "categoria", "blob_variante")
 def lista_negocios():
     q = request.args.get("q", "", type=str).strip()
     categoria_id = request.args.get("categoria", type=int)
     page = request.args.get("page", 1, type=int)
     per_page = min(request.args.get("per_page", 9, type=int), 30)
 
-    categorias = Categoria.query.order_by(Categoria.nombre.asc()).all()
+    categorias = categorias_ref()
     query = Negocio.query.options(joinedload(Negocio.categoria)).filter_by(estado="aprobado")
 
+    orden = [Negocio.nombre.asc()]
     if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Negocio.nombre.ilike(like),
-                Negocio.descripcion.ilike(like),
-                Negocio.direccion.ilike(like),
+        ranking = search.ranking(q)
+        if ranking is not None:
+            # 🔎 Índice de texto completo (FTS5 / tsvector), ordenado por relevancia
+            query = query.join(ranking, ranking.c.negocio_id == Negocio.id)
+            orden.insert(0, ranking.c.score.asc())
+        elif search.disponible():
+            # Sin términos que el índice pueda encontrar (p.ej. "!!")
+            query = query.filter(false())
+        else:
+            # Sin índice de texto completo (SQLite sin FTS5, otros motores): LIKE
+            # sobre *_norm, "cafe" encuentra "Café". Recorre toda la tabla de
+            # negocios: un B-tree no sirve para '%q%'
+            like = f"%{normalizar(q)}%"
+            query = query.filter(
+                or_(
+                    Negocio.nombre_norm.like(like),
+                    Negocio.descripcion_norm.like(like),
+                    Negocio.direccion_norm.like(like),
+                )
             )
-        )
     if categoria_id:
         query = query.filter(Negocio.categoria_id == categoria_id)
 
     if q or categoria_id:
-        pag = query.order_by(Negocio.nombre.asc()).paginate(page=page, per_page=per_page, error_out=False)
+        pag = query.order_by(*orden).paginate(page=page, per_page=per_page, error_out=False)
         return render_template(
             "negocios/lista.html",
             categorias=categorias,
@@ -69,17 +74,8 @@ def lista_negocios():
             top_por_categoria=None,
         )
 
-    top_por_categoria = []
-    for cat in categorias:
-        top = (
-            Negocio.query.options(joinedload(Negocio.categoria))
-            .filter_by(categoria_id=cat.id, estado="aprobado")
-            .order_by(Negocio.id.desc())
-            .limit(3)
-            .all()
-        )
-        if top:
-            top_por_categoria.append({"categoria": cat, "slug": slugify(cat.nombre), "negocios": top})
+    # 🏅 Top 3 por categoría en una sola consulta (ROW_NUMBER), cacheado
+    top_por_categoria = consultar_top_por_categoria()
 
     return render_template(
         "negocios/lista.html",
@@ -93,12 +89,30 @@ def lista_negocios():
 
 
 # ---------- Por categoría con slug ----------
-@negocios_bp.route("/categoria/<int:cat_id>-<slug>", methods=["GET"], endpoint="por_categoria")
-def por_categoria(cat_id, slug):
-    cat = Categoria.query.get_or_404(cat_id)
-    expected_slug = slugify(cat.nombre)
-    if slug != expected_slug:
-        return redirect(url_for("negocios.por_categoria", cat_id=cat.id, slug=expected_slug), code=301)
+_SLUG_LEGADO = re.compile(r"^(\d+)-")
+
+
+def _tag_lista_categoria(slug):
+    cat = categoria_por_slug(slug)
+    return f"categoria:{cat.id}:list" if cat else "categoria"
+
+
+@negocios_bp.route("/categoria/<slug>", methods=["GET"], endpoint="por_categoria")
+@condicional(lambda slug: [
+    (Negocio, Negocio.categoria_id == select(Categoria.id).where(Categoria.slug == slug).scalar_subquery()),
+    Categoria,
+    Variante,
+])
+@pagina_cacheada("categoria", _tag_lista_categoria, "negocio:*", "blob_variante")
+def por_categoria(slug):
+    cat = categoria_por_slug(slug)
+    if cat is None:
+        # URLs antiguas /categoria/<id>-<slug>: redirección permanente
+        legado = _SLUG_LEGADO.match(slug)
+        cat = categoria_por_id(int(legado.group(1))) if legado else None
+        if cat is None:
+            abort(404)
+        return redirect(url_for("negocios.por_categoria", slug=cat.slug, **request.args), code=301)
 
     page = request.args.get("page", 1, type=int)
     per_page = min(request.args.get("per_page", 12, type=int), 30)
@@ -110,17 +124,44 @@ def por_categoria(cat_id, slug):
     )
     pag = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    categorias = Categoria.query.order_by(Categoria.nombre.asc()).all()
+    categorias = categorias_ref()
     return render_template("negocios/por_categoria.html", categoria=cat, categorias=categorias, negocios=pag.items, pag=pag)
 
 
-# ---------- Detalle ----------
 # ---------- Detalle de negocio ----------
-from datetime import datetime, date
-
-@negocios_bp.route("/<int:id>", methods=["GET"], endpoint="detalle")
-def detalle(id):
-    negocio = Negocio.query.get_or_404(id)
+def _fuentes_detalle(slug):
+    """Negocio, su perfil y las publicaciones del feed (para el ETag)."""
+    perfil_id = (
+        select(PerfilEmpresa.id)
+        .join(Negocio, Negocio.usuario_id == PerfilEmpresa.usuario_id)
+        .where(Negocio.slug == slug)
+        .scalar_subquery()
+    )
+    return [
+        (Negocio, Negocio.slug == slug),
+        (PerfilEmpresa, PerfilEmpresa.id == perfil_id),
+        *((modelo, modelo.perfil_id == perfil_id)
+          for modelo in (AvisoCiudadano, EventoCiudadano, NoticiaEmpresa, OfertaCiudadano)),
+    ]
+
+
+@negocios_bp.route("/<int:id>", methods=["GET"], endpoint="detalle_legado")
+def detalle_legado(id):
+    """URLs antiguas por id: redirección permanente a la URL con slug."""
+    slug = db.session.execute(select(Negocio.slug).where(Negocio.id == id)).scalar()
+    if slug is None:
+        abort(404)
+    return redirect(url_for("negocios.detalle", slug=slug, **request.args), code=301)
+
+
+@negocios_bp.route("/<slug>", methods=["GET"], endpoint="detalle")
+@condicional(_fuentes_detalle)
+@pagina_cacheada(
+    "negocio:slug:{slug}", "categoria", "perfil_empresa", "aviso_ciudadano", "evento_ciudadano",
+    "noticia_empresa", "oferta_ciudadano",
+)
+def detalle(slug):
+    negocio = Negocio.query.filter_by(slug=slug).first_or_404()
 
     # 🔹 Buscar el perfil asociado al negocio
     perfil = None
@@ -128,93 +169,15 @@ def detalle(id):
         perfil = PerfilEmpresa.query.filter_by(usuario_id=negocio.usuario_id).first()
 
     if not perfil:
-        return render_template("negocios/detalle.html", negocio=negocio, perfil=None, feed=[])
-
-    feed = []
-
-    # --- 📢 Avisos ---
-    for a in getattr(perfil, "avisos", []):
-        feed.append({
-            "tipo": "aviso",
-            "fecha": getattr(a, "creado_en", None),
-            "titulo": a.titulo or "Aviso",
-            "descripcion": a.descripcion or "",
-            "imagen": a.imagen,
-            "extra": {
-                "inicio": getattr(a, "fecha_inicio", None),
-                "fin": getattr(a, "fecha_fin", None)
-            }
-        })
-
-    # --- 🎉 Eventos ---
-    for e in getattr(perfil, "eventos", []):
-        feed.append({
-            "tipo": "evento",
-            "fecha": getattr(e, "fecha_inicio", None),
-            "titulo": e.titulo or "Evento",
-            "descripcion": e.descripcion or "",
-            "imagen": e.imagen,
-            "extra": {
-                "fecha": getattr(e, "fecha_inicio", None),
-                "lugar": getattr(e, "lugar", None)
-            }
-        })
-
-    # --- 📰 Noticias ---
-    for n in getattr(perfil, "noticias", []):
-        feed.append({
-            "tipo": "noticia",
-            "fecha": getattr(n, "fecha_publicacion", None),
-            "titulo": n.titulo or "Noticia",
-            "descripcion": n.contenido or "",
-            "imagen": n.imagen,
-            "extra": {
-                "fecha": getattr(n, "fecha_publicacion", None)
-            }
-        })
-
-    # --- 💸 Ofertas ---
-    for o in getattr(perfil, "ofertas", []):
-        vigente_flag = None
-        try:
-            vigente_flag = o.vigente() if callable(o.vigente) else bool(o.vigente)
-        except Exception:
-            vigente_flag = None
-
-        feed.append({
-            "tipo": "oferta",
-            "fecha": getattr(o, "fecha_inicio", None),
-            "titulo": o.titulo or "Oferta",
-            "descripcion": o.descripcion or "",
-            "imagen": o.imagen,
-            "extra": {
-                "inicio": getattr(o, "fecha_inicio", None),
-                "fin": getattr(o, "fecha_fin", None),
-                "vigente": vigente_flag
-            }
-        })
-
-    # --- 🧩 Normalizar TODAS las fechas a datetime ---
-    def normalize_fecha(value):
-        """Convierte cualquier tipo de fecha en datetime seguro."""
-        if not value:
-            return datetime.utcnow()
-        if isinstance(value, datetime):
-            return value
-        if isinstance(value, date):
-            return datetime.combine(value, datetime.min.time())
-        return datetime.utcnow()
-
-    for item in feed:
-        item["fecha"] = normalize_fecha(item.get("fecha"))
-
-    # --- 🔹 Ordenar por fecha descendente (más recientes primero)
-    feed.sort(key=lambda x: x["fecha"], reverse=True)
-
-    return render_template("negocios/detalle.html", negocio=negocio, perfil=perfil, feed=feed)
-
+        return render_template("negocios/detalle.html", negocio=negocio, perfil=None, feed=[], siguiente=None)
 
+    # 📰 Avisos, eventos, noticias y ofertas en una sola consulta, paginada por keyset
+    per_page = max(1, min(request.args.get("per_page", 20, type=int), 50))
+    feed, siguiente = feed_perfil(perfil.id, antes=request.args.get("antes"), limite=per_page)
 
+    if request.args.get("parcial"):
+        return render_template("negocios/_feed.html", negocio=negocio, feed=feed, siguiente=siguiente)
+    return render_template("negocios/detalle.html", negocio=negocio, perfil=perfil, feed=feed, siguiente=siguiente)
 
 
 # ---------- Registrar ----------
@@ -228,17 +191,17 @@ def registrar():
         return redirect(url_for("ciudadano.dashboard"))
 
     form = NegocioForm()
-    categorias_db = Categoria.query.order_by(Categoria.nombre.asc()).all()
-    form.categoria_id.choices = [(c.id, c.nombre) for c in categorias_db]
+    categorias_db = categorias_ref()
+    form.categoria_id.choices = opciones_categorias()
 
     if form.validate_on_submit():
         try:
-            imagen_rel = save_image(form.imagen.data) if form.imagen.data else None
+            imagen_rel = guardar_imagen(form.imagen.data) if form.imagen.data else None
         except ValueError as e:
             flash(str(e), "danger")
             return render_template("negocios/register.html", form=form, categorias=categorias_db)
 
-        perfil = PerfilEmpresa.query.filter_by(usuario_id=current_user.id).first()
+        perfil = perfil_actual()
         if not perfil:
             perfil = PerfilEmpresa(
                 usuario_id=current_user.id,
@@ -0,0 +1,224 @@
+# mi_comuna/modules/negocios/search.py
+"""Índice de texto completo para negocios.
+
+- SQLite: tabla virtual FTS5 ``negocio_fts`` (rowid = negocio.id), ranking BM25.
+- PostgreSQL: tabla ``negocio_fts`` con columna tsvector e índice GIN, ranking ts_rank.
+  El documento sale de las columnas ``*_norm`` y la consulta se normaliza igual,
+  así "cafe" encuentra "Café" sin la extensión ``unaccent``.
+
+El índice se mantiene sincronizado con hooks after_insert/after_update/after_delete
+sobre ``Negocio`` que escriben en la misma conexión (y transacción) del flush.
+Si el motor no soporta el índice, la búsqueda vuelve al ILIKE de siempre.
+"""
+import re
+
+import click
+from flask import current_app
+from sqlalchemy import bindparam, event, inspect, text, Float, Integer
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from mi_comuna.extensions import db
+from mi_comuna.normalize import normalizar
+from . import negocios_bp
+from .models import Negocio
+
+TABLA = "negocio_fts"
+
+# Pesos por columna: nombre > descripción > dirección
+_PESOS = (10.0, 2.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+
+def _motor():
+    """Dialecto con índice disponible ("sqlite" | "postgresql"), o None si no hay índice.
+
+    Se guarda por aplicación (``app.extensions``): dos apps en el mismo proceso
+    (p.ej. los tests de SQLite y de PostgreSQL) no comparten el estado.
+    """
+    return current_app.extensions.get("negocios_search")
+
+
+def disponible():
+    """True si la app tiene índice de texto completo (FTS5 o tsvector)."""
+    return _motor() is not None
+
+
+# ---------------------------------------------------------------------
+# DDL por dialecto
+# ---------------------------------------------------------------------
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5("
+    "nombre, descripcion, direccion, tokenize='unicode61 remove_diacritics 2')",
+)
+
+_SQLITE_DOC = "SELECT id, nombre, coalesce(descripcion, ''), direccion FROM negocio"
+_SQLITE_UPSERT = (
+    f"DELETE FROM {TABLA} WHERE rowid = :id",
+    f"INSERT INTO {TABLA} (rowid, nombre, descripcion, direccion) {_SQLITE_DOC} WHERE id = :id",
+)
+
+
+def _pg_documento(config):
+    return (
+        f"setweight(to_tsvector('{config}', coalesce(nombre_norm, '')), 'A') || "
+        f"setweight(to_tsvector('{config}', coalesce(descripcion_norm, '')), 'B') || "
+        f"setweight(to_tsvector('{config}', coalesce(direccion_norm, '')), 'C')"
+    )
+
+
+_PG_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {TABLA} ("
+    "negocio_id INTEGER PRIMARY KEY REFERENCES negocio(id) ON DELETE CASCADE, "
+    "documento tsvector NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLA}_documento ON {TABLA} USING GIN (documento)",
+)
+
+
+def _ts_config():
+    config = current_app.config.get("SEARCH_TS_CONFIG", "spanish")
+    if not re.fullmatch(r"\w+", config):
+        raise ValueError(f"SEARCH_TS_CONFIG inválido: {config!r}")
+    return config
+
+
+# ---------------------------------------------------------------------
+# Creación y reconstrucción del índice
+# ---------------------------------------------------------------------
+def init_app(app):
+    """Crea el índice si no existe (idempotente) y lo puebla la primera vez."""
+    app.extensions["negocios_search"] = None
+    with app.app_context():
+        dialecto = db.engine.dialect.name
+        if dialecto not in ("sqlite", "postgresql"):
+            return
+        try:
+            with db.engine.begin() as conn:
+                if not inspect(conn).has_table("negocio"):
+                    # Base vacía antes de `flask db upgrade`: la migración crea el índice.
+                    app.logger.warning("Tabla negocio inexistente; índice de búsqueda no disponible.")
+                    return
+                existia = _existe(conn, dialecto)
+                for sql in _SQLITE_DDL if dialecto == "sqlite" else _PG_DDL:
+                    conn.execute(text(sql))
+                app.extensions["negocios_search"] = dialecto
+                if not existia:
+                    _reconstruir(conn)
+        except (OperationalError, ProgrammingError):
+            # p.ej. SQLite compilado sin FTS5, o una base aún sin las columnas
+            # *_norm (el `flask db upgrade` que las agrega arma el índice): ILIKE.
+            app.logger.warning("Índice de texto completo no disponible; se usará ILIKE.")
+            app.extensions["negocios_search"] = None
+
+
+def _existe(conn, dialecto):
+    if dialecto == "sqlite":
+        sql = "SELECT 1 FROM sqlite_master WHERE name = :t"
+    elif dialecto == "postgresql":
+        sql = "SELECT 1 FROM pg_class WHERE relname = :t"
+    else:
+        return False
+    return conn.execute(text(sql), {"t": TABLA}).first() is not None
+
+
+def _reconstruir(conn):
+    """Vacía el índice y lo vuelve a poblar desde la tabla negocio."""
+    conn.execute(text(f"DELETE FROM {TABLA}"))
+    if _motor() == "sqlite":
+        conn.execute(text(f"INSERT INTO {TABLA} (rowid, nombre, descripcion, direccion) {_SQLITE_DOC}"))
+        conn.execute(text(f"INSERT INTO {TABLA} ({TABLA}) VALUES ('optimize')"))
+    elif _motor() == "postgresql":
+        conn.execute(text(
+            f"INSERT INTO {TABLA} (negocio_id, documento) "
+            f"SELECT id, {_pg_documento(_ts_config())} FROM negocio"
+        ))
+
+
+def reconstruir_indice():
+    with db.engine.begin() as conn:
+        _reconstruir(conn)
+
+
+@negocios_bp.cli.command("reindex")
+def reindex_command():
+    """Reconstruye desde cero el índice de búsqueda de negocios."""
+    if _motor() is None:
+        click.echo("⚠️ El motor actual no soporta índice de texto completo.")
+        return
+    reconstruir_indice()
+    total = db.session.execute(text(f"SELECT count(*) FROM {TABLA}")).scalar()
+    click.echo(f"✅ Índice '{TABLA}' reconstruido ({total} negocios).")
+
+
+# ---------------------------------------------------------------------
+# Sincronización con hooks del ORM
+# ---------------------------------------------------------------------
+@event.listens_for(Negocio, "after_insert")
+@event.listens_for(Negocio, "after_update")
+def _indexar(mapper, connection, target):
+    if _motor() == "sqlite":
+        for sql in _SQLITE_UPSERT:
+            connection.execute(text(sql), {"id": target.id})
+    elif _motor() == "postgresql":
+        connection.execute(
+            text(
+                f"INSERT INTO {TABLA} (negocio_id, documento) "
+                f"SELECT id, {_pg_documento(_ts_config())} FROM negocio WHERE id = :id "
+                "ON CONFLICT (negocio_id) DO UPDATE SET documento = EXCLUDED.documento"
+            ),
+            {"id": target.id},
+        )
+
+
+@event.listens_for(Negocio, "after_delete")
+def _desindexar(mapper, connection, target):
+    if _motor() == "sqlite":
+        connection.execute(text(f"DELETE FROM {TABLA} WHERE rowid = :id"), {"id": target.id})
+    elif _motor() == "postgresql":
+        connection.execute(text(f"DELETE FROM {TABLA} WHERE negocio_id = :id"), {"id": target.id})
+
+
+def desindexar_ids(connection, ids):
+    """Quita del índice varios negocios a la vez (DELETE masivo sin hooks del ORM)."""
+    if _motor() is None or not ids:
+        return
+    columna = "rowid" if _motor() == "sqlite" else "negocio_id"
+    connection.execute(
+        text(f"DELETE FROM {TABLA} WHERE {columna} IN :ids").bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(ids)},
+    )
+
+
+# ---------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------
+def _tokens(q):
+    return _TOKEN_RE.findall(normalizar(q))[:8]
+
+
+def ranking(q):
+    """Subconsulta (negocio_id, score) para `q`; menor score = más relevante.
+
+    Devuelve None si no hay índice disponible (la vista recurre al LIKE sobre
+    ``*_norm``) o si la consulta no tiene términos (``"!!"``: nada que buscar).
+    """
+    tokens = _tokens(q)
+    if _motor() is None or not tokens:
+        return None
+
+    if _motor() == "sqlite":
+        # Cada término entre comillas (sin sintaxis FTS5 del usuario) y como prefijo.
+        match = " ".join('"{}"*'.format(t.replace('"', "")) for t in tokens)
+        pesos = ", ".join(str(p) for p in _PESOS)
+        stmt = text(
+            f"SELECT rowid AS negocio_id, bm25({TABLA}, {pesos}) AS score "
+            f"FROM {TABLA} WHERE {TABLA} MATCH :q"
+        ).bindparams(q=match)
+    else:
+        tsquery = " & ".join(f"{t}:*" for t in tokens)
+        stmt = text(
+            f"SELECT f.negocio_id, -ts_rank(f.documento, to_tsquery('{_ts_config()}', :q)) AS score "
+            f"FROM {TABLA} f WHERE f.documento @@ to_tsquery('{_ts_config()}', :q)"
+        ).bindparams(q=tsquery)
+
+    return stmt.columns(negocio_id=Integer, score=Float).subquery("fts")
@@ -0,0 +1,56 @@
+import re
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from mi_comuna.normalize import normalizar
+
+LARGO_SLUG = 100
+_PENDIENTES = "slugs_pendientes"
+
+
+def slugify(text):
+    """"Comida Rápida" → "comida-rapida": ASCII, minúsculas y guiones."""
+    text = re.sub(r"[^a-z0-9\s-]", "", normalizar(text or ""))
+    return re.sub(r"[-\s]+", "-", text).strip("-")[:LARGO_SLUG].rstrip("-")
+
+
+def slugs_automaticos(modelo, origen="nombre", reservados=()):
+    """Mantiene `modelo.slug` único, derivado de `origen`, en cada insert/update.
+
+    Si el slug ya existe se agrega un sufijo (``-2``, ``-3``...). Los slugs
+    solo numéricos o en `reservados` (rutas fijas del blueprint) llevan el
+    nombre de la tabla como prefijo para no chocar con esas rutas.
+    """
+    tabla = modelo.__table__
+
+    def _asignar(mapper, connection, target):
+        if target.slug and not inspect(target).attrs[origen].history.has_changes():
+            return
+        base = slugify(getattr(target, origen)) or tabla.name
+        if base.isdigit() or base in reservados:
+            base = f"{tabla.name}-{base}"
+
+        condicion = or_(tabla.c.slug == base, tabla.c.slug.like(f"{base}-%"))
+        if target.id is not None:
+            condicion = condicion & (tabla.c.id != target.id)
+        usados = set(connection.execute(select(tabla.c.slug).where(condicion)).scalars())
+        # Filas del mismo flush que todavía no llegaron a la base de datos
+        session = object_session(target)
+        pendientes = session.info.setdefault(_PENDIENTES, set()) if session is not None else set()
+        usados |= {s for t, s in pendientes if t == tabla.name}
+
+        slug, n = base, 2
+        while slug in usados:
+            slug, n = f"{base}-{n}", n + 1
+        target.slug = slug
+        pendientes.add((tabla.name, slug))
+
+    event.listen(modelo, "before_insert", _asignar)
+    event.listen(modelo, "before_update", _asignar)
+    return modelo
+
+
+@event.listens_for(Session, "after_flush")
+def _limpiar_pendientes(session, flush_context):
+    session.info.pop(_PENDIENTES, None)
@@ -0,0 +1,33 @@
+# mi_comuna/normalize.py
+"""Normalización de texto en español para búsquedas.
+
+"Café" → "cafe", "NIÑO" → "nino": NFKD + eliminación de diacríticos + casefold.
+Los modelos guardan el resultado en columnas sombra ``*_norm`` al escribir.
+No llevan índice B-tree (no sirve para ``LIKE '%q%'``): en PostgreSQL son el
+texto del tsvector de búsqueda, sin depender de la extensión ``unaccent``, y
+donde no hay índice de texto completo las usa el LIKE de respaldo.
+"""
+import unicodedata
+
+from sqlalchemy import event
+
+
+def normalizar(texto):
+    """Devuelve `texto` sin tildes, en minúsculas y con espacios colapsados."""
+    if texto is None:
+        return None
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+def columnas_normalizadas(modelo, campos):
+    """Mantiene `<campo>_norm` sincronizado con `<campo>` en cada insert/update."""
+
+    def _sincronizar(mapper, connection, target):
+        for campo in campos:
+            setattr(target, f"{campo}_norm", normalizar(getattr(target, campo)))
+
+    event.listen(modelo, "before_insert", _sincronizar)
+    event.listen(modelo, "before_update", _sincronizar)
+    return modelo
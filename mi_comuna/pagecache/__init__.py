@@ -0,0 +1,140 @@
+# mi_comuna/pagecache/__init__.py
+"""Caché de páginas completas para visitantes anónimos.
+
+Las vistas públicas se decoran con ``@pagina_cacheada("tabla", ...)``: la
+respuesta se guarda con clave ruta + query string normalizada + idioma + día,
+asociada a los tags indicados (ver ``mi_comuna.invalidation``; admiten
+``{arg}`` con los argumentos de la vista, p. ej. ``negocio:{id}``, o son
+funciones que reciben esos argumentos y devuelven el tag). Los
+usuarios autenticados y los requests con mensajes flash pendientes nunca
+usan la caché; para ellos está la caché de fragmentos (``fragmentos.py``).
+
+Las páginas se purgan cuando el bus de invalidación publica alguno de sus
+tags tras un commit. Backend en proceso (LRU) o compartido (Redis), ver
+``backends.py``.
+"""
+import hashlib
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, has_app_context, request, session
+from flask_login import current_user
+
+from mi_comuna.invalidation import con_comodines, suscribir
+from .backends import Pagina, crear_backend
+
+# Parámetros de campañas que no cambian el HTML
+_IGNORADOS = ("utm_", "fbclid", "gclid")
+
+# Se incrementa en cada invalidación: una página que se estaba renderizando
+# mientras tanto podría tener datos viejos y no se guarda.
+_estado = {"generacion": 0}
+
+
+def init_app(app):
+    from . import fragmentos
+    from .cli import pagecache_cli
+    app.extensions["pagecache"] = crear_backend(app)
+    app.cli.add_command(pagecache_cli)
+    fragmentos.init_app(app)
+
+
+def backend():
+    return current_app.extensions["pagecache"]
+
+
+# ---------------------------------------------------------------------
+# Clave y condiciones
+# ---------------------------------------------------------------------
+def clave_pagina():
+    """Ruta + query normalizada + idioma + día, como hash corto."""
+    cfg = current_app.config
+    args = sorted(
+        (k, v) for k, v in request.args.items(multi=True)
+        if v != "" and not k.startswith(_IGNORADOS)
+    )
+    idioma = request.accept_languages.best_match(
+        cfg.get("LANGUAGES", ()), default=cfg.get("DEFAULT_LANGUAGE", "es")
+    )
+    # Avisos vigentes y eventos dependen de la fecha: las páginas cambian a medianoche
+    crudo = f"{idioma}|{date.today().isoformat()}|{request.path}?{urlencode(args)}"
+    return hashlib.sha1(crudo.encode("utf-8")).hexdigest()
+
+
+def _request_cacheable():
+    return (
+        current_app.config.get("PAGE_CACHE", True)
+        and request.method in ("GET", "HEAD")
+        and not current_user.is_authenticated
+        and "_flashes" not in session
+    )
+
+
+def _respuesta_cacheable(resp):
+    return (
+        resp.status_code == 200
+        and not resp.is_streamed
+        and not resp.direct_passthrough
+        # Vistas que escriben la sesión (p. ej. un token CSRF) son por visitante
+        and not session.modified
+        and "Set-Cookie" not in resp.headers
+        and not ({"private", "no-store"} & set(resp.cache_control.keys()))
+    )
+
+
+# ---------------------------------------------------------------------
+# Decorador
+# ---------------------------------------------------------------------
+def _formatear(tag, kwargs):
+    return tag(**kwargs) if callable(tag) else tag.format(**kwargs)
+
+
+def pagina_cacheada(*tags, ttl=None):
+    """Cachea la vista para anónimos; `tags` son los datos de los que depende."""
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if not _request_cacheable():
+                return vista(*args, **kwargs)
+
+            almacen = backend()
+            clave = clave_pagina()
+            pagina = almacen.get(clave)
+            if pagina is not None:
+                resp = current_app.response_class(pagina.cuerpo, status=pagina.status, headers=pagina.headers)
+                resp.headers["X-Page-Cache"] = "HIT"
+                return resp
+
+            generacion = _estado["generacion"]
+            resp = current_app.make_response(vista(*args, **kwargs))
+            if _respuesta_cacheable(resp) and generacion == _estado["generacion"]:
+                headers = [(k, v) for k, v in resp.headers.items() if k.lower() != "content-length"]
+                almacen.set(
+                    clave, Pagina(resp.status_code, headers, resp.get_data()),
+                    ttl or current_app.config.get("PAGE_CACHE_TTL", 300), con_comodines(_formatear(t, kwargs) for t in tags),
+                )
+            resp.headers["X-Page-Cache"] = "MISS"
+            return resp
+
+        return envoltura
+
+    return decorador
+
+
+def invalidar(*tags):
+    """Borra las páginas asociadas a `tags`."""
+    _estado["generacion"] += 1
+    return backend().invalidar(tags)
+
+
+# ---------------------------------------------------------------------
+# Invalidación tras el commit (bus de mi_comuna.invalidation)
+# ---------------------------------------------------------------------
+def _purgar(tags):
+    if has_app_context() and "pagecache" in current_app.extensions:
+        invalidar(*tags)
+
+
+suscribir("pagecache", _purgar)
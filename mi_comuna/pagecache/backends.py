@@ -0,0 +1,171 @@
+# mi_comuna/pagecache/backends.py
+"""Backends de la caché de páginas y de fragmentos.
+
+Ambos exponen la misma interfaz:
+
+- ``get(clave)`` → el valor guardado (``Pagina``, texto de un fragmento) o None.
+- ``set(clave, valor, ttl, tags)`` guarda el valor asociado a sus tags.
+- ``invalidar(tags)`` borra los valores de esos tags; devuelve cuántos.
+- ``limpiar()`` borra todo.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+Pagina = namedtuple("Pagina", "status headers cuerpo")
+
+# Formato en Redis: nada de pickle desde un almacén de red
+_PAGINA, _TEXTO = b"P", b"T"
+
+
+def serializar(valor):
+    """``Pagina`` → ``P`` + JSON [status, headers] + ``\n`` + cuerpo; texto → ``T`` + UTF-8."""
+    if isinstance(valor, Pagina):
+        cabecera = json.dumps([valor.status, [list(h) for h in valor.headers]], separators=(",", ":"))
+        return _PAGINA + cabecera.encode("utf-8") + b"\n" + bytes(valor.cuerpo)
+    if isinstance(valor, str):
+        return _TEXTO + valor.encode("utf-8")
+    raise TypeError(f"No se puede guardar {type(valor).__name__} en la caché compartida")
+
+
+def deserializar(datos):
+    """Inverso de ``serializar``; None si `datos` no tiene un formato conocido."""
+    tipo, resto = datos[:1], datos[1:]
+    try:
+        if tipo == _PAGINA:
+            cabecera, cuerpo = resto.split(b"\n", 1)
+            status, headers = json.loads(cabecera)
+            return Pagina(status, [tuple(h) for h in headers], cuerpo)
+        if tipo == _TEXTO:
+            return resto.decode("utf-8")
+    except ValueError:
+        pass
+    return None
+
+
+class MemoriaBackend:
+    """LRU en proceso con TTL por entrada e índice tag → claves.
+
+    Cada worker de gunicorn tiene su copia y solo ve las invalidaciones de
+    sus propios commits: el TTL acota la desactualización entre procesos.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()  # clave → (valor, expira, tags)
+        self._por_tag = {}
+        self._lock = threading.Lock()
+
+    def _quitar(self, clave):
+        _, _, tags = self._datos.pop(clave)
+        for tag in tags:
+            claves = self._por_tag.get(tag)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_tag[tag]
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            if entrada[1] <= time.monotonic():
+                self._quitar(clave)
+                return None
+            self._datos.move_to_end(clave)
+            return entrada[0]
+
+    def set(self, clave, valor, ttl, tags=()):
+        with self._lock:
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (valor, time.monotonic() + ttl, frozenset(tags))
+            for tag in tags:
+                self._por_tag.setdefault(tag, set()).add(clave)
+            while len(self._datos) > self.maxsize:
+                self._quitar(next(iter(self._datos)))
+
+    def invalidar(self, tags):
+        with self._lock:
+            claves = set().union(*(self._por_tag.get(t, ()) for t in tags))
+            for clave in claves:
+                self._quitar(clave)
+            return len(claves)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._por_tag.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
+
+
+class RedisBackend:
+    """Caché compartida entre workers en Redis (o algo que hable su protocolo).
+
+    `cliente` permite inyectar un cliente ya configurado o un doble local
+    (p. ej. fakeredis) para pruebas; si es None se crea con redis-py desde
+    `url`. Cada tag es un SET con las claves de sus entradas. Los valores se
+    guardan con ``serializar`` (requiere Redis 7 por ``EXPIRE NX/GT``).
+    """
+
+    def __init__(self, url=None, cliente=None, prefijo="pagecache:"):
+        if cliente is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("PAGE_CACHE_BACKEND='redis' requiere redis (pip install redis).") from e
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.prefijo = prefijo
+
+    def _clave(self, clave):
+        return f"{self.prefijo}p:{clave}"
+
+    def _tag(self, tag):
+        return f"{self.prefijo}t:{tag}"
+
+    def get(self, clave):
+        datos = self.cliente.get(self._clave(clave))
+        return deserializar(datos) if datos is not None else None
+
+    def set(self, clave, valor, ttl, tags=()):
+        pipe = self.cliente.pipeline()
+        pipe.set(self._clave(clave), serializar(valor), ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag(tag), self._clave(clave))
+            # El SET del tag vive al menos tanto como su entrada más larga:
+            # NX le pone TTL si no tenía y GT solo lo alarga
+            pipe.expire(self._tag(tag), ttl, nx=True)
+            pipe.expire(self._tag(tag), ttl, gt=True)
+        pipe.execute()
+
+    def invalidar(self, tags):
+        claves = set()
+        for tag in tags:
+            claves |= self.cliente.smembers(self._tag(tag))
+        self.cliente.delete(*claves, *(self._tag(t) for t in tags))
+        return len(claves)
+
+    def limpiar(self):
+        claves = list(self.cliente.scan_iter(match=f"{self.prefijo}*"))
+        if claves:
+            self.cliente.delete(*claves)
+
+    def __len__(self):
+        return sum(1 for _ in self.cliente.scan_iter(match=f"{self.prefijo}p:*"))
+
+
+def crear_backend(app, prefijo="pagecache:", maxsize=None):
+    """Instancia el backend según ``PAGE_CACHE_BACKEND`` ("memory" | "redis")."""
+    cfg = app.config
+    tipo = cfg.get("PAGE_CACHE_BACKEND", "memory")
+    if tipo == "memory":
+        return MemoriaBackend(maxsize or cfg.get("PAGE_CACHE_MAXSIZE", 512))
+    if tipo == "redis":
+        return RedisBackend(cfg["PAGE_CACHE_REDIS_URL"], prefijo=prefijo)
+    raise ValueError(f"PAGE_CACHE_BACKEND desconocido: {tipo!r}")
@@ -0,0 +1,23 @@
+# mi_comuna/pagecache/cli.py
+"""Comandos ``flask pagecache ...``."""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from . import backend, invalidar
+
+pagecache_cli = AppGroup("pagecache", help="Caché de páginas para anónimos.")
+
+
+@pagecache_cli.command("clear")
+@click.option("--tag", "tags", multiple=True, help="Solo las páginas de estas tablas (repetible).")
+def clear_command(tags):
+    """Vacía las cachés de páginas y fragmentos (p. ej. tras desplegar plantillas nuevas)."""
+    fragmentos = current_app.extensions["fragmentos"]
+    if tags:
+        n = invalidar(*tags) + fragmentos.invalidar(tags)
+        click.echo(f"✅ {n} página(s) y fragmento(s) invalidado(s).")
+    else:
+        backend().limpiar()
+        fragmentos.limpiar()
+        click.echo("✅ Cachés de páginas y fragmentos vaciadas.")
@@ -0,0 +1,96 @@
+# mi_comuna/pagecache/fragmentos.py
+"""Caché de fragmentos de plantilla: ``{% cache clave, ttl, tags=[...] %}``.
+
+    {% cache ("negocio-feed", negocio.id), 600, tags=["perfil_empresa:3:feed"] %}
+      ... bloque costoso ...
+    {% endcache %}
+
+`clave` es un texto o una tupla (el primer elemento nombra el fragmento en
+las métricas); `ttl` es opcional (``FRAGMENT_CACHE_TTL``). Usa el mismo tipo
+de backend que la caché de páginas y se purga con los mismos tags del bus de
+invalidación, así que también ahorra trabajo a los usuarios autenticados,
+que no pasan por la caché de páginas. La clave no incluye al usuario: solo
+envolver bloques que no dependan de él (o ponerlo en la clave).
+"""
+import hashlib
+import threading
+from collections import Counter
+
+from flask import current_app, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from mi_comuna.invalidation import con_comodines, suscribir
+from .backends import crear_backend
+
+_aciertos = Counter()
+_fallos = Counter()
+_lock = threading.Lock()
+
+
+def init_app(app):
+    app.extensions["fragmentos"] = crear_backend(
+        app, prefijo="fragmentos:", maxsize=app.config.get("FRAGMENT_CACHE_MAXSIZE", 1024)
+    )
+    app.jinja_env.add_extension(CacheExtension)
+
+
+def estadisticas():
+    """{fragmento: (aciertos, fallos)} de este proceso."""
+    with _lock:
+        return {nombre: (_aciertos[nombre], _fallos[nombre]) for nombre in _aciertos | _fallos}
+
+
+def _contar(contador, nombre):
+    with _lock:
+        contador[nombre] += 1
+
+
+class CacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        clave = parser.parse_expression()
+        ttl = nodes.Const(None)
+        etiquetas = nodes.List([])
+        while parser.stream.skip_if("comma"):
+            if parser.stream.current.test("name:tags") and parser.stream.look().test("assign"):
+                next(parser.stream)
+                next(parser.stream)
+                etiquetas = parser.parse_expression()
+            else:
+                ttl = parser.parse_expression()
+        cuerpo = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_renderizar", [clave, ttl, etiquetas]), [], [], cuerpo
+        ).set_lineno(lineno)
+
+    def _renderizar(self, clave, ttl, etiquetas, caller):
+        if not has_app_context() or not current_app.config.get("FRAGMENT_CACHE", True):
+            return caller()
+
+        partes = clave if isinstance(clave, (tuple, list)) else (clave,)
+        nombre = str(partes[0])
+        digest = hashlib.sha1(repr(tuple(partes)).encode("utf-8")).hexdigest()
+        almacen = current_app.extensions["fragmentos"]
+
+        html = almacen.get(digest)
+        if html is not None:
+            _contar(_aciertos, nombre)
+            return Markup(html)
+
+        _contar(_fallos, nombre)
+        html = caller()
+        almacen.set(digest, str(html), ttl or current_app.config.get("FRAGMENT_CACHE_TTL", 600),
+                    con_comodines(etiquetas))
+        return html
+
+
+def _purgar(tags):
+    if has_app_context() and "fragmentos" in current_app.extensions:
+        current_app.extensions["fragmentos"].invalidar(tags)
+
+
+suscribir("fragmentos", _purgar)
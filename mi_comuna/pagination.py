@@ -0,0 +1,99 @@
+# mi_comuna/pagination.py
+"""Paginación por keyset ("cargar más") para listados ordenados por columna + id.
+
+A diferencia de OFFSET, cada página cuesta lo mismo sin importar cuán atrás
+esté: se filtra por ``(columna, id) < cursor`` sobre un índice y se ordena
+descendente. El cursor viaja en la URL como ``<valor iso>~<id>``, con ``null``
+en lugar del valor cuando la columna es NULL (esas filas van al final).
+"""
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import and_, literal, or_, tuple_
+
+Pagina = namedtuple("Pagina", "items siguiente")
+
+# Valor NULL dentro de un cursor (ninguna fecha ISO, entero ni tipo se escribe así)
+NULO = "null"
+
+
+def _codificar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _decodificar(texto, tipo):
+    if tipo is datetime:
+        return datetime.fromisoformat(texto)
+    if tipo is date:
+        return date.fromisoformat(texto)
+    return tipo(texto)
+
+
+def codificar_valores(*valores):
+    """Cursor ``valor~valor~...`` con fechas en ISO y NULL como ``null``."""
+    return "~".join(NULO if v is None else _codificar(v) for v in valores)
+
+
+def decodificar_valores(cursor, *tipos):
+    """Tupla con un valor por cada tipo de `tipos`, o None si el cursor está
+    ausente o mal formado."""
+    if not cursor:
+        return None
+    partes = cursor.split("~")
+    if len(partes) != len(tipos):
+        return None
+    try:
+        return tuple(None if p == NULO else _decodificar(p, t) for p, t in zip(partes, tipos))
+    except (ValueError, TypeError):
+        return None
+
+
+def orden_descendente(*columnas):
+    """ORDER BY descendente con los NULL de la primera columna al final (en
+    SQLite y PostgreSQL por igual; las demás no admiten NULL)."""
+    primera, *resto = columnas
+    return [primera.desc().nulls_last(), *(c.desc() for c in resto)]
+
+
+def despues_de(columnas, valores):
+    """Filas que siguen al cursor `valores` en ``orden_descendente(*columnas)``.
+
+    `valores` son expresiones SQL, salvo el primero, que es None si la
+    última fila vista tenía NULL en la primera columna.
+    """
+    (primera, *resto), (valor, *resto_valores) = columnas, valores
+    if valor is None:
+        return and_(primera.is_(None), tuple_(*resto) < tuple_(*resto_valores))
+    return or_(primera.is_(None), tuple_(primera, *resto) < tuple_(valor, *resto_valores))
+
+
+def paginar_keyset(query, columna, id_columna=None, antes=None, limite=20):
+    """Página descendente de `query` por (columna, id), con los NULL de `columna` al final.
+
+    Si `id_columna` es None, `columna` debe ser única y no nula (p.ej. la clave
+    primaria). `antes` es el cursor devuelto en ``Pagina.siguiente`` de la
+    página previa; ``siguiente`` es None cuando no quedan más filas.
+    """
+    columnas = (columna,) if id_columna is None else (columna, id_columna)
+    cursor = decodificar_valores(antes, *(c.type.python_type for c in columnas))
+    if cursor is not None and id_columna is None:
+        if cursor[0] is None:
+            return Pagina([], None)
+        query = query.filter(columna < literal(cursor[0], columna.type))
+    elif cursor is not None:
+        valor, id_ = cursor
+        if id_ is None:
+            return Pagina([], None)
+        query = query.filter(despues_de(
+            columnas,
+            (None if valor is None else literal(valor, columna.type), literal(id_, id_columna.type)),
+        ))
+
+    filas = query.order_by(*orden_descendente(*columnas)).limit(limite + 1).all()
+    if len(filas) <= limite:
+        return Pagina(filas, None)
+
+    ultima = filas[limite - 1]
+    return Pagina(filas[:limite], codificar_valores(*(getattr(ultima, c.key) for c in columnas)))
@@ -0,0 +1,87 @@
+# mi_comuna/ratelimit/__init__.py
+"""Límite de intentos con baldes de tokens (login, registro).
+
+    @limitar("login", ip="RATELIMIT_LOGIN_IP", email="RATELIMIT_LOGIN_EMAIL")
+
+Cada POST a la vista consume un token del balde de su IP y otro del de su
+email normalizado; la configuración de cada uno es ``(capacidad, segundos)``:
+hasta `capacidad` intentos seguidos, que se recuperan en `segundos`. Si algún
+balde está vacío se responde 429 con ``Retry-After`` antes de ejecutar la
+vista, es decir, sin consultar la base de datos ni calcular hashes.
+
+La IP es ``request.remote_addr``: detrás de un proxy hace falta ProxyFix.
+Backend en proceso o compartido (Redis), ver ``backends.py``.
+"""
+import math
+import threading
+from collections import Counter
+from functools import wraps
+
+from flask import abort, current_app, render_template, request
+from werkzeug.exceptions import TooManyRequests
+
+from .backends import crear_backend
+
+_permitidos = Counter()
+_rechazados = Counter()
+_lock = threading.Lock()
+
+_CLAVES = {
+    "ip": lambda: request.remote_addr or "-",
+    "email": lambda: (request.form.get("email") or "").strip().lower() or None,
+}
+
+
+def init_app(app):
+    app.extensions["ratelimit"] = crear_backend(app)
+    app.register_error_handler(TooManyRequests, _demasiados_intentos)
+
+
+def backend():
+    return current_app.extensions["ratelimit"]
+
+
+def estadisticas():
+    """{"<vista>:<dimensión>": (permitidos, rechazados)} de este proceso."""
+    with _lock:
+        return {nombre: (_permitidos[nombre], _rechazados[nombre]) for nombre in _permitidos | _rechazados}
+
+
+def _contar(contador, nombre):
+    with _lock:
+        contador[nombre] += 1
+
+
+def limitar(nombre, **reglas):
+    """Decorador: consume un token de cada balde de `reglas` en los POST."""
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if request.method == "POST" and current_app.config.get("RATELIMIT", True):
+                for dimension, opcion in reglas.items():
+                    valor = _CLAVES[dimension]()
+                    if valor is None:
+                        continue
+                    capacidad, segundos = current_app.config[opcion]
+                    metrica = f"{nombre}:{dimension}"
+                    permitido, espera = backend().consumir(
+                        f"{metrica}:{valor}", capacidad, capacidad / segundos
+                    )
+                    if not permitido:
+                        _contar(_rechazados, metrica)
+                        current_app.logger.warning("Límite %s alcanzado por %s", metrica, valor)
+                        abort(429, retry_after=max(1, math.ceil(espera)))
+                    _contar(_permitidos, metrica)
+            return vista(*args, **kwargs)
+
+        return envoltura
+
+    return decorador
+
+
+def _demasiados_intentos(e):
+    resp = current_app.make_response((render_template("errors/429.html", espera=e.retry_after), 429))
+    if e.retry_after is not None:
+        resp.headers["Retry-After"] = str(e.retry_after)
+    return resp
@@ -0,0 +1,128 @@
+# mi_comuna/ratelimit/backends.py
+"""Almacenes de baldes de tokens.
+
+Ambos exponen ``consumir(clave, capacidad, tasa)`` → ``(permitido, espera)``:
+saca un token del balde `clave` (hasta `capacidad` tokens, se recarga a
+`tasa` tokens por segundo) y, si estaba vacío, cuántos segundos faltan para
+el próximo.
+"""
+import threading
+import time
+import zlib
+
+from flask import current_app, has_app_context
+
+
+class MemoriaBackend:
+    """Baldes en proceso, repartidos en `shards` diccionarios con su propio lock.
+
+    Un balde que volvió a llenarse es igual a uno nuevo: se descarta al
+    recorrer su shard (cada `barrido` operaciones), así la memoria queda
+    acotada a los clientes activos. Cada worker de gunicorn lleva su cuenta.
+    """
+
+    def __init__(self, shards=16, barrido=256):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._barrido = barrido
+        self._operaciones = [0] * shards
+
+    def _shard(self, clave):
+        return zlib.crc32(clave.encode("utf-8")) % len(self._shards)
+
+    def consumir(self, clave, capacidad, tasa):
+        ahora = time.monotonic()
+        i = self._shard(clave)
+        baldes, lock = self._shards[i]
+        with lock:
+            tokens, ultimo, _ = baldes.get(clave, (capacidad, ahora, 0))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * tasa)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            # Momento en que el balde vuelve a estar lleno
+            baldes[clave] = (tokens, ahora, ahora + (capacidad - tokens) / tasa)
+
+            self._operaciones[i] += 1
+            if self._operaciones[i] >= self._barrido:
+                self._operaciones[i] = 0
+                for k in [k for k, (_, _, lleno) in baldes.items() if lleno <= ahora]:
+                    del baldes[k]
+        return permitido, 0 if permitido else (1 - tokens) / tasa
+
+    def limpiar(self):
+        for baldes, lock in self._shards:
+            with lock:
+                baldes.clear()
+
+    def __len__(self):
+        return sum(len(baldes) for baldes, _ in self._shards)
+
+
+# Atómico en el servidor: leer, recargar, consumir y guardar el balde
+_SCRIPT = """
+local capacidad = tonumber(ARGV[1])
+local tasa = tonumber(ARGV[2])
+local ahora = tonumber(ARGV[3])
+local balde = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(balde[1]) or capacidad
+local ultimo = tonumber(balde[2]) or ahora
+tokens = math.min(capacidad, tokens + math.max(0, ahora - ultimo) * tasa)
+local permitido = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  permitido = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(ahora))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacidad - tokens) / tasa * 1000) + 1000)
+return {permitido, tostring(tokens)}
+"""
+
+
+class RedisBackend:
+    """Baldes compartidos entre workers en Redis (o algo que hable su protocolo).
+
+    `cliente` permite inyectar un cliente ya configurado o un doble local
+    (p. ej. fakeredis con Lua) para pruebas; si es None se crea con redis-py
+    desde `url`. Si Redis no responde se usa `respaldo` (por defecto un
+    ``MemoriaBackend``): el límite pasa a ser por worker, pero sigue activo.
+    """
+
+    def __init__(self, url=None, cliente=None, prefijo="ratelimit:", respaldo=None):
+        if cliente is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("RATELIMIT_BACKEND='redis' requiere redis (pip install redis).") from e
+            cliente = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.cliente = cliente
+        self.prefijo = prefijo
+        self.respaldo = respaldo or MemoriaBackend()
+        self._script = cliente.register_script(_SCRIPT)
+
+    def consumir(self, clave, capacidad, tasa):
+        try:
+            permitido, tokens = self._script(
+                keys=[f"{self.prefijo}{clave}"], args=[capacidad, tasa, repr(time.time())]
+            )
+        except Exception:
+            if has_app_context():
+                current_app.logger.warning("Redis no disponible para límites; se usa la memoria del worker")
+            return self.respaldo.consumir(clave, capacidad, tasa)
+        permitido = bool(int(permitido))
+        return permitido, 0 if permitido else (1 - float(tokens)) / tasa
+
+    def limpiar(self):
+        claves = list(self.cliente.scan_iter(match=f"{self.prefijo}*"))
+        if claves:
+            self.cliente.delete(*claves)
+        self.respaldo.limpiar()
+
+
+def crear_backend(app):
+    """Instancia el backend según ``RATELIMIT_BACKEND`` ("memory" | "redis")."""
+    tipo = app.config.get("RATELIMIT_BACKEND", "memory")
+    if tipo == "memory":
+        return MemoriaBackend()
+    if tipo == "redis":
+        return RedisBackend(app.config["RATELIMIT_REDIS_URL"])
+    raise ValueError(f"RATELIMIT_BACKEND desconocido: {tipo!r}")
@@ -0,0 +1,285 @@
+# mi_comuna/storage/__init__.py
+"""Almacenamiento de archivos subidos direccionado por contenido.
+
+Cada subida se escribe en un temporal mientras se calcula su SHA-256; si ya
+existe un ``Blob`` con ese digest se reutiliza su archivo en vez de guardar
+otra copia. El archivo se publica en el backend configurado (disco local o
+S3) bajo una clave fragmentada ``ab/cd/<sha256>.ext``.
+
+Las columnas que guardan rutas de archivos se registran con :func:`rastrear`
+y mantienen ``Blob.refs`` al día con hooks del ORM; los blobs que quedan sin
+referencias se borran del backend después del commit.
+
+En la base de datos se guarda ``<UPLOAD_URL_PREFIX>/<clave>``; las plantillas
+la resuelven con ``media_url(ruta)``.
+"""
+import hashlib
+import os
+import re
+from collections import Counter
+
+from flask import current_app, request, url_for
+from sqlalchemy import bindparam, delete, event, func, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from mi_comuna.extensions import db
+from .backends import CACHE_CONTROL, LocalBackend, crear_backend
+from .models import Blob, Variante
+
+EXTENSIONES = {"png", "jpg", "jpeg", "webp", "gif"}
+
+_BLOQUE = 64 * 1024
+_DELTAS = "storage_deltas"
+_LIBERAR = "storage_liberar"
+# <sha256>.ext para blobs y <sha256>_<variante>.ext para sus variantes
+_NOMBRE_BLOB = re.compile(r"[0-9a-f]{64}(?:_\w+)?\.\w+")
+
+# (modelo, nombre de columna) con rutas de archivos subidos
+_rastreadas = []
+
+
+def init_app(app):
+    from .cli import uploads_cli
+    from .imagenes import media_img
+    app.extensions["storage"] = almacen = crear_backend(app)
+    app.add_template_global(media_url)
+    app.add_template_global(media_img)
+    app.cli.add_command(uploads_cli)
+    if isinstance(almacen, LocalBackend) and not almacen.url_base:
+        app.after_request(_cache_inmutable)
+
+
+def backend():
+    return current_app.extensions["storage"]
+
+
+# ---------------------------------------------------------------------
+# Rutas y URLs
+# ---------------------------------------------------------------------
+def _prefijo():
+    return current_app.config.get("UPLOAD_URL_PREFIX", "uploads")
+
+
+def es_subida(ruta):
+    return bool(ruta) and ruta.startswith(_prefijo() + "/")
+
+
+def clave_de(ruta):
+    """``uploads/ab/cd/<sha>.png`` → ``ab/cd/<sha>.png``."""
+    return ruta.split("/", 1)[1]
+
+
+def _clave_nueva(sha, ext):
+    niveles = current_app.config.get("STORAGE_SHARD_DEPTH", 2)
+    return "/".join([sha[2 * i:2 * i + 2] for i in range(niveles)] + [f"{sha}.{ext}"])
+
+
+def media_url(ruta, defecto=None):
+    """URL pública de una ruta guardada en la BD (o de `defecto` en /static).
+
+    Las subidas anteriores al almacén por contenido siguen sirviéndose desde
+    /static hasta que se migren con ``flask uploads dedup``.
+    """
+    if not ruta:
+        return url_for("static", filename=defecto) if defecto else ""
+    if es_subida(ruta) and _NOMBRE_BLOB.fullmatch(ruta.rsplit("/", 1)[-1]):
+        return backend().url(clave_de(ruta))
+    return url_for("static", filename=ruta)
+
+
+def _cache_inmutable(resp):
+    """Los blobs en disco salen por /static: mismo Cache-Control que en S3."""
+    if request.endpoint != "static" or resp.status_code not in (200, 304):
+        return resp
+    nombre = (request.view_args or {}).get("filename", "")
+    if es_subida(nombre) and _NOMBRE_BLOB.fullmatch(nombre.rsplit("/", 1)[-1]):
+        resp.headers["Cache-Control"] = CACHE_CONTROL
+    return resp
+
+
+# ---------------------------------------------------------------------
+# Guardado
+# ---------------------------------------------------------------------
+def guardar_imagen(file_storage):
+    """Guarda una imagen subida y devuelve su ruta (``uploads/...``).
+
+    Lanza ValueError si la extensión no está permitida.
+    """
+    if not file_storage or not file_storage.filename:
+        return None
+    ext = file_storage.filename.rsplit(".", 1)[-1].lower()
+    if ext not in EXTENSIONES:
+        raise ValueError("Formato de imagen no permitido")
+    return guardar_stream(file_storage.stream, ext)
+
+
+def guardar_stream(stream, ext):
+    """Copia `stream` calculando su SHA-256 y lo deduplica contra los blobs existentes."""
+    fd, temporal = backend().temporal()
+    try:
+        digest = hashlib.sha256()
+        tamano = 0
+        with os.fdopen(fd, "wb") as destino:
+            for bloque in iter(lambda: stream.read(_BLOQUE), b""):
+                digest.update(bloque)
+                destino.write(bloque)
+                tamano += len(bloque)
+        return _ingresar(temporal, digest.hexdigest(), ext, tamano)
+    finally:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+
+
+def _ingresar(temporal, sha, ext, tamano):
+    # Reclama el blob en la transacción de la sesión: el UPDATE bloquea la
+    # fila hasta el commit, así un recolectar() concurrente espera y, cuando
+    # sigue, refs ya cuenta esta referencia. Si la borró antes, se vuelve a crear.
+    tabla = Blob.__table__
+    for intento in range(3):
+        ruta = db.session.execute(
+            update(tabla).where(tabla.c.sha256 == sha).values(refs=tabla.c.refs).returning(tabla.c.ruta)
+        ).scalar()
+        if ruta is not None:
+            break
+        ruta = f"{_prefijo()}/{_clave_nueva(sha, ext)}"
+        try:
+            # En un savepoint: si otra subida del mismo contenido insertó la
+            # fila primero, solo se deshace este INSERT y se reclama la suya
+            with db.session.begin_nested():
+                db.session.add(Blob(sha256=sha, ruta=ruta, tamano=tamano, refs=0))
+            break
+        except IntegrityError:
+            if intento == 2:
+                raise
+    # Con la fila tomada, el archivo ya no puede desaparecer: se comprueba ahora
+    clave = clave_de(ruta)
+    if not backend().existe(clave):
+        backend().guardar(clave, temporal)
+    return ruta
+
+
+# ---------------------------------------------------------------------
+# Conteo de referencias
+# ---------------------------------------------------------------------
+def rastrear(modelo, *columnas):
+    """Mantiene ``Blob.refs`` para las columnas de `modelo` que guardan rutas."""
+    _rastreadas.extend((modelo, c) for c in columnas)
+
+    def _al_insertar(mapper, connection, target):
+        _acumular(target, [(getattr(target, c), 1) for c in columnas])
+
+    def _al_actualizar(mapper, connection, target):
+        estado = inspect(target)
+        pares = []
+        for c in columnas:
+            historia = estado.attrs[c].history
+            pares += [(r, 1) for r in historia.added] + [(r, -1) for r in historia.deleted]
+        _acumular(target, pares)
+
+    def _al_borrar(mapper, connection, target):
+        _acumular(target, [(getattr(target, c), -1) for c in columnas])
+
+    event.listen(modelo, "after_insert", _al_insertar)
+    event.listen(modelo, "after_update", _al_actualizar)
+    event.listen(modelo, "after_delete", _al_borrar)
+
+
+def _acumular(target, pares):
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault(_DELTAS, Counter())
+    for ruta, n in pares:
+        if ruta:
+            deltas[ruta] += n
+
+
+def _aplicar(session, deltas):
+    conn = session.connection()
+    liberar = session.info.setdefault(_LIBERAR, set())
+    for ruta, n in deltas.items():
+        if n:
+            conn.execute(update(Blob.__table__).where(Blob.ruta == ruta).values(refs=Blob.refs + n))
+        if n < 0:
+            liberar.add(ruta)
+
+
+def descontar(session, rutas):
+    """Libera referencias de filas borradas con un DELETE masivo (sin hooks del ORM)."""
+    _aplicar(session, Counter({r: -n for r, n in Counter(r for r in rutas if r).items()}))
+
+
+@event.listens_for(Session, "after_flush")
+def _aplicar_tras_flush(session, flush_context):
+    deltas = session.info.pop(_DELTAS, None)
+    if deltas:
+        _aplicar(session, deltas)
+
+
+@event.listens_for(Session, "after_commit")
+def _recolectar_tras_commit(session):
+    rutas = session.info.pop(_LIBERAR, None)
+    if rutas:
+        recolectar(rutas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_tras_rollback(session):
+    session.info.pop(_DELTAS, None)
+    session.info.pop(_LIBERAR, None)
+
+
+def recolectar(rutas=None):
+    """Borra los blobs sin referencias (de `rutas`, o todos), sus variantes y
+    sus archivos en el backend.
+
+    Los archivos se borran antes del commit, con las filas todavía bloqueadas:
+    una subida del mismo contenido espera y luego vuelve a crear blob y archivo.
+    Devuelve (cantidad de archivos, bytes liberados).
+    """
+    tabla, tabla_v = Blob.__table__, Variante.__table__
+    condicion = tabla.c.refs <= 0
+    if rutas is not None:
+        condicion &= tabla.c.ruta.in_(list(rutas))
+    with db.engine.begin() as conn:
+        # Las variantes se leen antes: en PostgreSQL el ON DELETE CASCADE las borra con el blob
+        variantes = conn.execute(
+            select(tabla_v.c.blob_sha, tabla_v.c.ruta, tabla_v.c.tamano)
+            .where(tabla_v.c.blob_sha.in_(select(tabla.c.sha256).where(condicion)))
+        ).all()
+        borrados = conn.execute(delete(tabla).where(condicion).returning(tabla.c.sha256, tabla.c.ruta, tabla.c.tamano)).all()
+        shas = {sha for sha, _, _ in borrados}
+        if shas:
+            conn.execute(delete(tabla_v).where(tabla_v.c.blob_sha.in_(shas)))
+
+        archivos = [(ruta, tamano) for _, ruta, tamano in borrados]
+        archivos += [(ruta, tamano) for sha, ruta, tamano in variantes if sha in shas]
+        for ruta, _ in archivos:
+            backend().borrar(clave_de(ruta))
+    return len(archivos), sum(tamano for _, tamano in archivos)
+
+
+def referencias():
+    """Counter ruta → cantidad de filas que la usan en las columnas rastreadas."""
+    total = Counter()
+    for modelo, c in _rastreadas:
+        columna = getattr(modelo, c)
+        filas = db.session.execute(
+            select(columna, func.count()).where(columna.isnot(None)).group_by(columna)
+        )
+        for ruta, n in filas:
+            total[ruta] += n
+    return total
+
+
+def recontar():
+    """Recalcula ``Blob.refs`` desde cero a partir de las columnas rastreadas."""
+    tabla = Blob.__table__
+    conteo = referencias()
+    db.session.execute(update(tabla).values(refs=0))
+    if conteo:
+        db.session.execute(
+            update(tabla).where(tabla.c.ruta == bindparam("r")).values(refs=bindparam("n")),
+            [{"r": ruta, "n": n} for ruta, n in conteo.items()],
+        )
@@ -0,0 +1,168 @@
+# mi_comuna/storage/backends.py
+"""Backends de almacenamiento para los blobs subidos.
+
+Todos exponen la misma interfaz:
+
+- ``temporal()`` → (fd, ruta) de un archivo temporal donde escribir la subida.
+- ``guardar(clave, temporal)`` publica el temporal bajo ``clave`` (atómico).
+- ``existe(clave)``, ``abrir(clave)``, ``borrar(clave)``.
+- ``listar()`` → iterador de (clave, tamaño, mtime) para la recolección.
+- ``url(clave)`` → URL pública del archivo.
+
+Las claves son direccionadas por contenido (``ab/cd/<sha256>.ext``): un
+archivo nunca cambia bajo la misma clave, así que se sirve como inmutable
+(``CACHE_CONTROL``). S3 lo guarda en cada objeto; los archivos locales que
+salen por /static reciben el encabezado en ``storage._cache_inmutable``, y con
+``UPLOAD_URL_BASE`` lo pone el servidor que los publique.
+"""
+import mimetypes
+import os
+import tempfile
+
+from flask import url_for
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+PREFIJO_TEMPORAL = ".subida-"
+
+
+class LocalBackend:
+    """Archivos en disco bajo `raiz`.
+
+    Si `url_base` es None, `raiz` debe estar dentro de /static y se sirve con
+    ``url_for('static', filename='<url_prefijo>/<clave>')``.
+    """
+
+    def __init__(self, raiz, url_prefijo="uploads", url_base=None):
+        self.raiz = raiz
+        self.url_prefijo = url_prefijo
+        self.url_base = url_base
+        self.tmp_dir = raiz
+
+    def _ruta(self, clave):
+        return os.path.join(self.raiz, *clave.split("/"))
+
+    def temporal(self):
+        os.makedirs(self.raiz, exist_ok=True)
+        # En el mismo sistema de archivos que el destino: os.replace es atómico
+        return tempfile.mkstemp(prefix=PREFIJO_TEMPORAL, dir=self.raiz)
+
+    def guardar(self, clave, temporal):
+        destino = self._ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(temporal, destino)
+
+    def existe(self, clave):
+        return os.path.exists(self._ruta(clave))
+
+    def abrir(self, clave):
+        return open(self._ruta(clave), "rb")
+
+    def borrar(self, clave):
+        try:
+            os.unlink(self._ruta(clave))
+        except FileNotFoundError:
+            pass
+
+    def listar(self):
+        for directorio, _, archivos in os.walk(self.raiz):
+            for nombre in archivos:
+                if nombre.startswith(PREFIJO_TEMPORAL):
+                    continue
+                ruta = os.path.join(directorio, nombre)
+                estado = os.stat(ruta)
+                clave = os.path.relpath(ruta, self.raiz).replace(os.sep, "/")
+                yield clave, estado.st_size, estado.st_mtime
+
+    def url(self, clave):
+        if self.url_base:
+            return f"{self.url_base.rstrip('/')}/{clave}"
+        return url_for("static", filename=f"{self.url_prefijo}/{clave}")
+
+
+class S3Backend:
+    """Bucket S3 o compatible (MinIO, R2, Spaces...).
+
+    `cliente` permite inyectar un cliente ya configurado o un doble local
+    para pruebas; si es None se crea con boto3 y `opciones_cliente`
+    (endpoint_url, region_name, credenciales).
+    """
+
+    def __init__(self, bucket, prefijo="", url_publica=None, cliente=None, tmp_dir=None, **opciones_cliente):
+        if cliente is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("STORAGE_BACKEND='s3' requiere boto3 (pip install boto3).") from e
+            cliente = boto3.client("s3", **{k: v for k, v in opciones_cliente.items() if v})
+        self.cliente = cliente
+        self.bucket = bucket
+        self.prefijo = prefijo.strip("/") + "/" if prefijo.strip("/") else ""
+        self.url_publica = url_publica
+        self.tmp_dir = tmp_dir or tempfile.gettempdir()
+
+    def _key(self, clave):
+        return f"{self.prefijo}{clave}"
+
+    def temporal(self):
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return tempfile.mkstemp(prefix=PREFIJO_TEMPORAL, dir=self.tmp_dir)
+
+    def guardar(self, clave, temporal):
+        # upload_file hace multipart en streaming; el objeto aparece completo o no aparece
+        tipo = mimetypes.guess_type(clave)[0] or "application/octet-stream"
+        try:
+            self.cliente.upload_file(
+                temporal, self.bucket, self._key(clave),
+                ExtraArgs={"ContentType": tipo, "CacheControl": CACHE_CONTROL},
+            )
+        finally:
+            os.unlink(temporal)
+
+    def existe(self, clave):
+        try:
+            self.cliente.head_object(Bucket=self.bucket, Key=self._key(clave))
+            return True
+        except Exception as e:
+            codigo = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if codigo in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def abrir(self, clave):
+        return self.cliente.get_object(Bucket=self.bucket, Key=self._key(clave))["Body"]
+
+    def borrar(self, clave):
+        self.cliente.delete_object(Bucket=self.bucket, Key=self._key(clave))
+
+    def listar(self):
+        paginas = self.cliente.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefijo)
+        for pagina in paginas:
+            for obj in pagina.get("Contents", []):
+                yield obj["Key"][len(self.prefijo):], obj["Size"], obj["LastModified"].timestamp()
+
+    def url(self, clave):
+        if self.url_publica:
+            return f"{self.url_publica.rstrip('/')}/{self._key(clave)}"
+        endpoint = self.cliente.meta.endpoint_url.rstrip("/")
+        return f"{endpoint}/{self.bucket}/{self._key(clave)}"
+
+
+def crear_backend(app):
+    """Instancia el backend según ``STORAGE_BACKEND`` ("local" | "s3")."""
+    cfg = app.config
+    tipo = cfg.get("STORAGE_BACKEND", "local")
+    if tipo == "local":
+        raiz = cfg.get("UPLOAD_FOLDER") or os.path.join(app.static_folder, "uploads")
+        return LocalBackend(raiz, cfg.get("UPLOAD_URL_PREFIX", "uploads"), cfg.get("UPLOAD_URL_BASE"))
+    if tipo == "s3":
+        return S3Backend(
+            cfg["S3_BUCKET"],
+            prefijo=cfg.get("S3_PREFIX", ""),
+            url_publica=cfg.get("S3_PUBLIC_URL"),
+            tmp_dir=cfg.get("UPLOAD_TMP_FOLDER"),
+            endpoint_url=cfg.get("S3_ENDPOINT_URL"),
+            region_name=cfg.get("S3_REGION"),
+            aws_access_key_id=cfg.get("S3_ACCESS_KEY_ID"),
+            aws_secret_access_key=cfg.get("S3_SECRET_ACCESS_KEY"),
+        )
+    raise ValueError(f"STORAGE_BACKEND desconocido: {tipo!r}")
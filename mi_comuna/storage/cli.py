@@ -0,0 +1,118 @@
+# mi_comuna/storage/cli.py
+"""Comandos ``flask uploads ...`` para mantener el almacén de subidas."""
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import update
+
+from mi_comuna.extensions import db
+from . import (
+    _NOMBRE_BLOB, _rastreadas, backend, clave_de, es_subida, guardar_stream,
+    recolectar, recontar, referencias,
+)
+from .backends import PREFIJO_TEMPORAL
+from .models import Blob, Variante
+
+uploads_cli = AppGroup("uploads", help="Almacén de archivos subidos.")
+
+
+def _archivo_legado(ruta):
+    """Las subidas antiguas (uuid_nombre.ext) viven en disco bajo UPLOAD_FOLDER."""
+    raiz = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.static_folder, "uploads")
+    return os.path.join(raiz, *clave_de(ruta).split("/"))
+
+
+def _mb(n):
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+@uploads_cli.command("dedup")
+def dedup_command():
+    """Migra las subidas antiguas (uuid_nombre.ext) al almacén por contenido.
+
+    También sirve para subirlas al bucket al cambiar a STORAGE_BACKEND=s3.
+    """
+    blobs = set(db.session.scalars(db.select(Blob.ruta)))
+    antiguos = {}
+    for ruta in referencias():
+        if ruta in blobs or not es_subida(ruta):
+            continue
+        archivo = _archivo_legado(ruta)
+        if not os.path.isfile(archivo):
+            click.echo(f"⚠️ No existe {archivo}; se omite.")
+            continue
+        with open(archivo, "rb") as f:
+            nueva = guardar_stream(f, ruta.rsplit(".", 1)[-1].lower())
+        # UPDATE masivo: los hooks no corren, las referencias se recuentan al final
+        for modelo, c in _rastreadas:
+            db.session.execute(
+                update(modelo).where(getattr(modelo, c) == ruta).values({c: nueva}),
+                execution_options={"synchronize_session": False},
+            )
+        antiguos[archivo] = os.path.getsize(archivo)
+
+    db.session.flush()
+    recontar()
+    db.session.commit()
+
+    # Los archivos viejos se borran solo cuando las filas ya apuntan al blob
+    for archivo in antiguos:
+        os.unlink(archivo)
+    nuevos = db.session.scalars(db.select(Blob.tamano).where(Blob.ruta.not_in(blobs))).all()
+    liberado = sum(antiguos.values()) - sum(nuevos)
+    click.echo(f"✅ {len(antiguos)} archivo(s) migrado(s) a {len(nuevos)} blob(s); {_mb(liberado)} liberados.")
+
+
+@uploads_cli.command("gc")
+@click.option("--min-edad", default=3600, show_default=True,
+              help="Segundos mínimos de antigüedad para borrar archivos sin registro.")
+def gc_command(min_edad):
+    """Recuenta referencias y borra blobs huérfanos y temporales abandonados."""
+    recontar()
+    db.session.commit()
+    n, liberado = recolectar()
+
+    # Archivos que nunca llegaron a commit (formulario inválido, error, etc.)
+    registradas = {clave_de(r) for r in db.session.scalars(db.select(Blob.ruta))}
+    registradas |= {clave_de(r) for r in db.session.scalars(db.select(Variante.ruta))}
+    limite = time.time() - min_edad
+    almacen = backend()
+    for clave, tamano, mtime in list(almacen.listar()):
+        if _NOMBRE_BLOB.fullmatch(clave.rsplit("/", 1)[-1]) and clave not in registradas and mtime < limite:
+            almacen.borrar(clave)
+            liberado += tamano
+            n += 1
+
+    if os.path.isdir(almacen.tmp_dir):
+        for nombre in os.listdir(almacen.tmp_dir):
+            archivo = os.path.join(almacen.tmp_dir, nombre)
+            if nombre.startswith(PREFIJO_TEMPORAL) and os.path.getmtime(archivo) < limite:
+                liberado += os.path.getsize(archivo)
+                os.unlink(archivo)
+                n += 1
+    click.echo(f"✅ {n} archivo(s) eliminado(s); {_mb(liberado)} liberados.")
+
+
+@uploads_cli.command("variantes")
+@click.option("--todas", is_flag=True, help="Revisa todos los blobs, no solo los que no tienen variantes.")
+def variantes_command(todas):
+    """Genera (en este proceso) las variantes de imagen que falten."""
+    from .imagenes import disponible, procesar
+
+    if not disponible():
+        click.echo("⚠️ Procesamiento de imágenes desactivado o Pillow no instalado.")
+        return
+    consulta = db.select(Blob.sha256)
+    if not todas:
+        consulta = consulta.where(~Blob.variantes.any())
+    shas = db.session.scalars(consulta).all()
+    total = 0
+    for sha in shas:
+        try:
+            total += procesar(sha)
+        except Exception as e:
+            click.echo(f"⚠️ {sha[:12]}: {e}")
+    click.echo(f"✅ {total} variante(s) generada(s) para {len(shas)} blob(s).")
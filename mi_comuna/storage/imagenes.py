@@ -0,0 +1,237 @@
+# mi_comuna/storage/imagenes.py
+"""Variantes redimensionadas de las imágenes subidas.
+
+Cuando se confirma un ``Blob`` nuevo se encola un trabajo en un pool de hilos
+(fuera del request) que genera, para cada ancho de ``IMAGE_VARIANTS`` menor
+que el original, una copia WebP y otra en el formato original, sin EXIF.
+Las variantes se registran en ``blob_variante`` y las plantillas las usan con
+``media_img(...)``, que arma un ``<picture>`` con ``srcset``/``sizes``.
+
+Pillow es opcional: sin él no se generan variantes y se sirve el original.
+"""
+import io
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from flask import current_app
+from markupsafe import Markup
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from mi_comuna.cache import TTLCache
+from mi_comuna.extensions import db
+from . import _prefijo, backend, clave_de, media_url
+from .models import Blob, Variante
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow no instalado
+    Image = ImageOps = None
+
+# Formato de salida "original" según la extensión subida (GIF → PNG estático)
+_FORMATO_ORIGINAL = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp", "gif": "png"}
+_EXTENSION = {"jpeg": "jpg", "png": "png", "webp": "webp"}
+
+_NUEVOS = "storage_blobs_nuevos"
+
+InfoImagen = namedtuple("InfoImagen", "ancho alto variantes")
+VarianteRow = namedtuple("VarianteRow", "nombre formato ancho alto ruta")
+
+# Las variantes de un blob no cambian una vez generadas: TTL largo si hay,
+# corto mientras el trabajo sigue pendiente.
+_info_cache = TTLCache(maxsize=4096)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def disponible():
+    return Image is not None and current_app.config.get("IMAGE_PROCESSING", "thread") != "off"
+
+
+# ---------------------------------------------------------------------
+# Encolado tras el commit
+# ---------------------------------------------------------------------
+@event.listens_for(Blob, "after_insert")
+def _blob_nuevo(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_NUEVOS, set()).add(target.sha256)
+
+
+@event.listens_for(Session, "after_commit")
+def _encolar_tras_commit(session):
+    shas = session.info.pop(_NUEVOS, None)
+    if shas:
+        encolar(shas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_tras_rollback(session):
+    session.info.pop(_NUEVOS, None)
+
+
+def _obtener_pool(app):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=app.config.get("IMAGE_WORKERS", 2),
+                thread_name_prefix="imagenes",
+            )
+        return _pool
+
+
+def encolar(shas):
+    """Programa la generación de variantes (``IMAGE_PROCESSING``: thread | sync | off)."""
+    if not disponible():
+        return
+    app = current_app._get_current_object()
+    sincrono = app.config.get("IMAGE_PROCESSING", "thread") == "sync"
+    for sha in shas:
+        if sincrono:
+            _procesar_en_app(app, sha)
+        else:
+            _obtener_pool(app).submit(_procesar_en_app, app, sha)
+
+
+def _procesar_en_app(app, sha):
+    with app.app_context():
+        try:
+            procesar(sha)
+        except Exception:
+            app.logger.exception("No se pudieron generar las variantes del blob %s", sha)
+
+
+# ---------------------------------------------------------------------
+# Generación
+# ---------------------------------------------------------------------
+def procesar(sha):
+    """Genera las variantes que falten del blob `sha`. Idempotente.
+
+    Usa su propia sesión: corre en un hilo del pool o dentro de after_commit.
+    Devuelve la cantidad de variantes nuevas.
+    """
+    anchos = current_app.config.get("IMAGE_VARIANTS", {})
+    with Session(db.engine) as session:
+        blob = session.get(Blob, sha)
+        if blob is None:
+            return 0
+        ruta_blob = blob.ruta
+        clave = clave_de(ruta_blob)
+        base, ext = clave.rsplit(".", 1)
+        formatos = tuple(dict.fromkeys(("webp", _FORMATO_ORIGINAL.get(ext.lower(), "png"))))
+        hechas = {(v.nombre, v.formato) for v in blob.variantes}
+
+        with closing(backend().abrir(clave)) as f:
+            original = Image.open(io.BytesIO(f.read()))
+            original.load()
+        # Aplica la orientación EXIF antes de descartar los metadatos
+        original = ImageOps.exif_transpose(original)
+        blob.ancho, blob.alto = original.size
+
+        nuevas = 0
+        for nombre, ancho in sorted(anchos.items(), key=lambda v: v[1]):
+            # Nunca se agranda: el original ya cubre ese ancho
+            if ancho >= original.width:
+                continue
+            alto = max(1, round(original.height * ancho / original.width))
+            copia = None
+            for formato in formatos:
+                if (nombre, formato) in hechas:
+                    continue
+                if copia is None:
+                    copia = original.resize((ancho, alto), Image.LANCZOS)
+                ruta = f"{_prefijo()}/{base}_{nombre}.{_EXTENSION[formato]}"
+                tamano = _escribir(copia, formato, clave_de(ruta))
+                session.add(Variante(
+                    blob_sha=sha, nombre=nombre, formato=formato,
+                    ancho=ancho, alto=alto, tamano=tamano, ruta=ruta,
+                ))
+                nuevas += 1
+        session.commit()
+
+    _info_cache.delete(ruta_blob)
+    return nuevas
+
+
+def _escribir(imagen, formato, clave):
+    """Codifica `imagen` sin metadatos y la publica en el backend."""
+    if formato == "jpeg" and imagen.mode != "RGB":
+        imagen = imagen.convert("RGB")
+    elif imagen.mode not in ("RGB", "RGBA", "L"):
+        imagen = imagen.convert("RGBA")
+
+    opciones = {"optimize": True}
+    if formato in ("jpeg", "webp"):
+        opciones["quality"] = current_app.config.get("IMAGE_QUALITY", 80)
+    if formato == "jpeg":
+        opciones["progressive"] = True
+
+    fd, temporal = backend().temporal()
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            imagen.save(destino, format=formato.upper(), **opciones)
+        tamano = os.path.getsize(temporal)
+        backend().guardar(clave, temporal)
+        return tamano
+    finally:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+
+
+# ---------------------------------------------------------------------
+# Consulta y helper de plantillas
+# ---------------------------------------------------------------------
+def info_imagen(ruta):
+    """InfoImagen (ancho, alto, variantes) de una ruta de blob, cacheada."""
+    info = _info_cache.get(ruta)
+    if info is None:
+        filas = db.session.execute(
+            select(Blob.ancho, Blob.alto, Variante.nombre, Variante.formato,
+                   Variante.ancho, Variante.alto, Variante.ruta)
+            .outerjoin(Variante, Variante.blob_sha == Blob.sha256)
+            .where(Blob.ruta == ruta)
+            .order_by(Variante.ancho.asc())
+        ).all()
+        variantes = tuple(VarianteRow(*f[2:]) for f in filas if f[2] is not None)
+        info = InfoImagen(filas[0][0] if filas else None, filas[0][1] if filas else None, variantes)
+        _info_cache.set(ruta, info, 3600 if variantes else 30)
+    return info
+
+
+def _srcset(pares):
+    return ", ".join(f"{url} {ancho}w" for url, ancho in pares)
+
+
+def media_img(ruta, alt="", clase="", sizes="100vw", variante="card", defecto=None):
+    """``<picture>`` con variantes WebP y fallback en el formato original.
+
+    Sin variantes (imagen antigua, pendiente o sin Pillow) devuelve un
+    ``<img>`` simple con ``media_url(ruta, defecto)``.
+    """
+    info = info_imagen(ruta) if ruta else None
+    if not info or not info.variantes:
+        return Markup('<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async">').format(
+            media_url(ruta, defecto), alt, clase
+        )
+
+    webp = [(media_url(v.ruta), v.ancho) for v in info.variantes if v.formato == "webp"]
+    originales = [v for v in info.variantes if v.formato != "webp"] or list(info.variantes)
+    fallback = next((v for v in originales if v.nombre == variante), originales[-1])
+    pares = [(media_url(v.ruta), v.ancho) for v in originales]
+    if info.ancho:
+        pares.append((media_url(ruta), info.ancho))
+
+    return Markup(
+        '<picture class="contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="lazy" decoding="async">'
+        '</picture>'
+    ).format(
+        _srcset(webp), sizes,
+        media_url(fallback.ruta), _srcset(pares), sizes, fallback.ancho, fallback.alto, alt, clase,
+    )
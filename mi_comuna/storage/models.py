@@ -0,0 +1,46 @@
+# mi_comuna/storage/models.py
+from datetime import datetime
+
+from mi_comuna.extensions import db
+
+
+class Blob(db.Model):
+    """Archivo subido, identificado por el SHA-256 de su contenido.
+
+    ``refs`` cuenta cuántas columnas (imagen, logo…) apuntan a ``ruta``;
+    cuando llega a 0 tras un commit, el archivo se borra del disco.
+    """
+    __tablename__ = "blob"
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    ruta = db.Column(db.String(255), nullable=False, unique=True)
+    tamano = db.Column(db.Integer, nullable=False)
+    refs = db.Column(db.Integer, nullable=False, default=0)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Dimensiones del original; se completan al generar las variantes
+    ancho = db.Column(db.Integer, nullable=True)
+    alto = db.Column(db.Integer, nullable=True)
+
+    variantes = db.relationship("Variante", backref="blob", cascade="all, delete-orphan", lazy=True)
+
+    def __repr__(self):
+        return f"<Blob {self.sha256[:12]} refs={self.refs}>"
+
+
+class Variante(db.Model):
+    """Copia redimensionada de un blob (thumb/card/hero) en un formato dado."""
+    __tablename__ = "blob_variante"
+    __table_args__ = (db.UniqueConstraint("blob_sha", "nombre", "formato"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    blob_sha = db.Column(db.String(64), db.ForeignKey("blob.sha256", ondelete="CASCADE"), nullable=False, index=True)
+    nombre = db.Column(db.String(20), nullable=False)
+    formato = db.Column(db.String(10), nullable=False)  # webp | jpeg | png
+    ancho = db.Column(db.Integer, nullable=False)
+    alto = db.Column(db.Integer, nullable=False)
+    tamano = db.Column(db.Integer, nullable=False)
+    ruta = db.Column(db.String(255), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Variante {self.blob_sha[:12]} {self.nombre}.{self.formato}>"
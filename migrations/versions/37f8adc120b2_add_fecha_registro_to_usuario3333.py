@@ -44,7 +44,7 @@ def upgrade():
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
     with op.batch_alter_table('noticia_empresa', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('fecha_publicacion', sa.DATETIME(), nullable=True))
+        batch_op.add_column(sa.Column('fecha_publicacion', sa.DateTime(), nullable=True))
         batch_op.drop_index(batch_op.f('ix_noticia_empresa_creado_en'))
         batch_op.create_index(batch_op.f('ix_noticia_empresa_perfil_id'), ['perfil_id'], unique=False)
         batch_op.create_index(batch_op.f('ix_noticia_empresa_fecha_publicacion'), ['fecha_publicacion'], unique=False)
@@ -64,7 +64,7 @@ def downgrade():
     sa.Column('imagen', sa.VARCHAR(length=255), nullable=True),
     sa.Column('fecha_inicio', sa.DATE(), nullable=True),
     sa.Column('fecha_fin', sa.DATE(), nullable=True),
-    sa.Column('creado_en', sa.DATETIME(), nullable=True),
+    sa.Column('creado_en', sa.DateTime(), nullable=True),
     sa.Column('perfil_id', sa.INTEGER(), nullable=False),
     sa.ForeignKeyConstraint(['perfil_id'], ['perfil_empresa.id'], ondelete='CASCADE'),
     sa.PrimaryKeyConstraint('id')
@@ -46,7 +46,7 @@ def downgrade():
         batch_op.create_index(batch_op.f('ix_oferta_ciudadano_creado_en'), ['creado_en'], unique=False)
 
     with op.batch_alter_table('noticia_empresa', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('creado_en', sa.DATETIME(), nullable=True))
+        batch_op.add_column(sa.Column('creado_en', sa.DateTime(), nullable=True))
         batch_op.drop_index(batch_op.f('ix_noticia_empresa_perfil_id'))
         batch_op.drop_index(batch_op.f('ix_noticia_empresa_fecha_publicacion'))
         batch_op.create_index(batch_op.f('ix_noticia_empresa_creado_en'), ['creado_en'], unique=False)
@@ -1,7 +1,7 @@
 """Agregar campo imagen a Noticia, Aviso y Evento3
 
 Revision ID: 842b9799c928
-Revises: 
+Revises: 5e0b7c2a91d4
 Create Date: 2025-10-11 18:33:46.573288
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '842b9799c928'
-down_revision = None
+down_revision = '5e0b7c2a91d4'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,57 @@
+"""Variantes de imagen (blob_variante) y dimensiones del blob
+
+Revision ID: a6d09e3c4f71
+Revises: f3b8c61d2e94
+Create Date: 2026-10-18 16:21:37.552903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d09e3c4f71'
+down_revision = 'f3b8c61d2e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() llama a db.create_all(): blob pudo crearse ya con ancho/alto
+    # y blob_variante puede existir
+    inspector = sa.inspect(op.get_bind())
+    existentes = {c['name'] for c in inspector.get_columns('blob')}
+    nuevas = [c for c in ('ancho', 'alto') if c not in existentes]
+    if nuevas:
+        with op.batch_alter_table('blob', schema=None) as batch_op:
+            for nombre in nuevas:
+                batch_op.add_column(sa.Column(nombre, sa.Integer(), nullable=True))
+
+    if inspector.has_table('blob_variante'):
+        return
+    op.create_table('blob_variante',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('blob_sha', sa.String(length=64), nullable=False),
+    sa.Column('nombre', sa.String(length=20), nullable=False),
+    sa.Column('formato', sa.String(length=10), nullable=False),
+    sa.Column('ancho', sa.Integer(), nullable=False),
+    sa.Column('alto', sa.Integer(), nullable=False),
+    sa.Column('tamano', sa.Integer(), nullable=False),
+    sa.Column('ruta', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['blob_sha'], ['blob.sha256'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('blob_sha', 'nombre', 'formato'),
+    sa.UniqueConstraint('ruta')
+    )
+    with op.batch_alter_table('blob_variante', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_blob_variante_blob_sha'), ['blob_sha'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blob_variante', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blob_variante_blob_sha'))
+
+    op.drop_table('blob_variante')
+    with op.batch_alter_table('blob', schema=None) as batch_op:
+        batch_op.drop_column('alto')
+        batch_op.drop_column('ancho')
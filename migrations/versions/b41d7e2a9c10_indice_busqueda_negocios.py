@@ -0,0 +1,49 @@
+"""Índice de texto completo para negocios (FTS5 / tsvector)
+
+Revision ID: b41d7e2a9c10
+Revises: 73af8860326a
+Create Date: 2026-10-18 10:12:03.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41d7e2a9c10'
+down_revision = '73af8860326a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS negocio_fts USING fts5("
+            "nombre, descripcion, direccion, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute("DELETE FROM negocio_fts")
+        op.execute(
+            "INSERT INTO negocio_fts (rowid, nombre, descripcion, direccion) "
+            "SELECT id, nombre, coalesce(descripcion, ''), direccion FROM negocio"
+        )
+    elif dialecto == "postgresql":
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS negocio_fts ("
+            "negocio_id INTEGER PRIMARY KEY REFERENCES negocio(id) ON DELETE CASCADE, "
+            "documento tsvector NOT NULL)"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_negocio_fts_documento ON negocio_fts USING GIN (documento)")
+        op.execute(
+            "INSERT INTO negocio_fts (negocio_id, documento) "
+            "SELECT id, "
+            "setweight(to_tsvector('spanish', coalesce(nombre, '')), 'A') || "
+            "setweight(to_tsvector('spanish', coalesce(descripcion, '')), 'B') || "
+            "setweight(to_tsvector('spanish', coalesce(direccion, '')), 'C') "
+            "FROM negocio ON CONFLICT (negocio_id) DO NOTHING"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS negocio_fts")
@@ -0,0 +1,42 @@
+"""Índices de listados del ciudadano en orden DESC NULLS LAST (PostgreSQL)
+
+Revision ID: b5d1f7a3c920
+Revises: e1c4b8a2d6f3
+Create Date: 2026-10-18 21:48:13.604187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d1f7a3c920'
+down_revision = 'e1c4b8a2d6f3'
+branch_labels = None
+depends_on = None
+
+INDICES = (
+    ('aviso_ciudadano', 'creado_en'),
+    ('evento_ciudadano', 'creado_en'),
+    ('noticia_empresa', 'fecha_publicacion'),
+    ('oferta_ciudadano', 'creado_en'),
+)
+
+
+def _recrear(ops):
+    # SQLite no admite NULLS LAST en un índice, pero recorre el ascendente en
+    # ese orden; en PostgreSQL el ascendente al revés deja los NULL primero
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for tabla, columna in INDICES:
+        nombre = f'ix_{tabla}_perfil_id_{columna}'
+        op.drop_index(nombre, table_name=tabla)
+        op.create_index(nombre, tabla, ['perfil_id', columna, 'id'], unique=False, postgresql_ops=ops(columna))
+
+
+def upgrade():
+    _recrear(lambda columna: {columna: 'DESC NULLS LAST', 'id': 'DESC'})
+
+
+def downgrade():
+    _recrear(lambda columna: {})
@@ -0,0 +1,37 @@
+"""actualizado_en en noticia, aviso, evento y negocio (GET condicional)
+
+Revision ID: c58e2b7d9a13
+Revises: a6d09e3c4f71
+Create Date: 2026-10-18 19:04:11.382517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58e2b7d9a13'
+down_revision = 'a6d09e3c4f71'
+branch_labels = None
+depends_on = None
+
+TABLAS = ('noticia', 'aviso', 'evento', 'negocio')
+
+
+def upgrade():
+    for tabla in TABLAS:
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('actualizado_en', sa.DateTime(), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{tabla}_actualizado_en'), ['actualizado_en'], unique=False)
+
+    # Filas existentes: la fecha de creación si se conoce, si no el momento de la migración
+    op.execute("UPDATE negocio SET actualizado_en = COALESCE(creado_en, CURRENT_TIMESTAMP)")
+    for tabla in ('noticia', 'aviso', 'evento'):
+        op.execute(f"UPDATE {tabla} SET actualizado_en = CURRENT_TIMESTAMP")
+
+
+def downgrade():
+    for tabla in reversed(TABLAS):
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{tabla}_actualizado_en'))
+            batch_op.drop_column('actualizado_en')
@@ -0,0 +1,93 @@
+"""Columnas *_norm para búsqueda sin tildes en negocio (y tsvector sobre ellas)
+
+Revision ID: c7e5a1d3f208
+Revises: b41d7e2a9c10
+Create Date: 2026-10-18 11:02:47.905113
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e5a1d3f208'
+down_revision = 'b41d7e2a9c10'
+branch_labels = None
+depends_on = None
+
+LOTE = 1000
+
+
+def _normalizar(texto):
+    # Copia congelada de mi_comuna.normalize.normalizar
+    if texto is None:
+        return None
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+def _backfill():
+    """Rellena las columnas *_norm por lotes de LOTE filas (keyset por id)."""
+    bind = op.get_bind()
+    seleccion = sa.text(
+        "SELECT id, nombre, descripcion, direccion FROM negocio "
+        "WHERE id > :ultimo ORDER BY id LIMIT :lote"
+    )
+    actualizacion = sa.text(
+        "UPDATE negocio SET nombre_norm = :nombre_norm, "
+        "descripcion_norm = :descripcion_norm, direccion_norm = :direccion_norm "
+        "WHERE id = :id"
+    )
+    ultimo = 0
+    while True:
+        filas = bind.execute(seleccion, {"ultimo": ultimo, "lote": LOTE}).all()
+        if not filas:
+            break
+        bind.execute(actualizacion, [
+            {
+                "id": f.id,
+                "nombre_norm": _normalizar(f.nombre),
+                "descripcion_norm": _normalizar(f.descripcion),
+                "direccion_norm": _normalizar(f.direccion),
+            }
+            for f in filas
+        ])
+        ultimo = filas[-1].id
+
+
+def _reindexar(sufijo):
+    """Recalcula el tsvector desde `nombre{sufijo}`, etc. (FTS5 ya quita las tildes)."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    documento = " || ".join(
+        f"setweight(to_tsvector('spanish', coalesce({campo}{sufijo}, '')), '{peso}')"
+        for campo, peso in (("nombre", "A"), ("descripcion", "B"), ("direccion", "C"))
+    )
+    op.execute(
+        "INSERT INTO negocio_fts (negocio_id, documento) "
+        f"SELECT id, {documento} FROM negocio "
+        "ON CONFLICT (negocio_id) DO UPDATE SET documento = EXCLUDED.documento"
+    )
+
+
+def upgrade():
+    # Sin índices B-tree: no sirven para LIKE '%q%'; la búsqueda va por negocio_fts
+    with op.batch_alter_table('negocio', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('nombre_norm', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('descripcion_norm', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('direccion_norm', sa.String(length=255), nullable=True))
+
+    _backfill()
+    _reindexar("_norm")
+
+
+def downgrade():
+    _reindexar("")
+
+    with op.batch_alter_table('negocio', schema=None) as batch_op:
+        batch_op.drop_column('direccion_norm')
+        batch_op.drop_column('descripcion_norm')
+        batch_op.drop_column('nombre_norm')
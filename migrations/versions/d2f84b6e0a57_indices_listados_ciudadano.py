@@ -0,0 +1,35 @@
+"""Índices compuestos (perfil_id, fecha, id) para listados del ciudadano
+
+Revision ID: d2f84b6e0a57
+Revises: c7e5a1d3f208
+Create Date: 2026-10-18 12:31:10.662489
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f84b6e0a57'
+down_revision = 'c7e5a1d3f208'
+branch_labels = None
+depends_on = None
+
+INDICES = (
+    ('aviso_ciudadano', 'creado_en'),
+    ('evento_ciudadano', 'creado_en'),
+    ('noticia_empresa', 'fecha_publicacion'),
+    ('oferta_ciudadano', 'creado_en'),
+)
+
+
+def upgrade():
+    for tabla, columna in INDICES:
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{tabla}_perfil_id_{columna}', ['perfil_id', columna, 'id'], unique=False)
+
+
+def downgrade():
+    for tabla, columna in INDICES:
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{tabla}_perfil_id_{columna}')
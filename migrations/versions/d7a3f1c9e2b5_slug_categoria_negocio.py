@@ -0,0 +1,78 @@
+"""Slug único e indexado en categoria y negocio
+
+Revision ID: d7a3f1c9e2b5
+Revises: c58e2b7d9a13
+Create Date: 2026-10-18 18:41:09.227516
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f1c9e2b5'
+down_revision = 'c58e2b7d9a13'
+branch_labels = None
+depends_on = None
+
+LOTE = 1000
+LARGO_SLUG = 100
+# Rutas fijas del blueprint de negocios (ver slugs_automaticos en models.py)
+RESERVADOS = {'categoria': set(), 'negocio': {'registrar', 'categoria'}}
+
+
+def _slugify(texto):
+    # Copia congelada de mi_comuna.modules.negocios.utils.slugify
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    texto = " ".join("".join(c for c in descompuesto if not unicodedata.combining(c)).casefold().split())
+    texto = re.sub(r"[^a-z0-9\s-]", "", texto)
+    return re.sub(r"[-\s]+", "-", texto).strip("-")[:LARGO_SLUG].rstrip("-")
+
+
+def _backfill(tabla):
+    """Asigna slugs únicos por lotes de LOTE filas (keyset por id)."""
+    bind = op.get_bind()
+    seleccion = sa.text(
+        f"SELECT id, nombre FROM {tabla} WHERE id > :ultimo ORDER BY id LIMIT :lote"
+    )
+    actualizacion = sa.text(f"UPDATE {tabla} SET slug = :slug WHERE id = :id")
+    usados = set()
+    ultimo = 0
+    while True:
+        filas = bind.execute(seleccion, {"ultimo": ultimo, "lote": LOTE}).all()
+        if not filas:
+            break
+        cambios = []
+        for f in filas:
+            base = _slugify(f.nombre) or tabla
+            if base.isdigit() or base in RESERVADOS[tabla]:
+                base = f"{tabla}-{base}"
+            slug, n = base, 2
+            while slug in usados:
+                slug, n = f"{base}-{n}", n + 1
+            usados.add(slug)
+            cambios.append({"id": f.id, "slug": slug})
+        bind.execute(actualizacion, cambios)
+        ultimo = filas[-1].id
+
+
+def upgrade():
+    for tabla in RESERVADOS:
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('slug', sa.String(length=120), nullable=True))
+
+        _backfill(tabla)
+
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.alter_column('slug', existing_type=sa.String(length=120), nullable=False)
+            batch_op.create_index(batch_op.f(f'ix_{tabla}_slug'), ['slug'], unique=True)
+
+
+def downgrade():
+    for tabla in RESERVADOS:
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{tabla}_slug'))
+            batch_op.drop_column('slug')
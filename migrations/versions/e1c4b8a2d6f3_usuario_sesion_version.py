@@ -0,0 +1,26 @@
+"""sesion_version en usuario (caché de sesiones de Flask-Login)
+
+Revision ID: e1c4b8a2d6f3
+Revises: d7a3f1c9e2b5
+Create Date: 2026-10-18 20:12:36.541908
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1c4b8a2d6f3'
+down_revision = 'd7a3f1c9e2b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('usuario', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sesion_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('usuario', schema=None) as batch_op:
+        batch_op.drop_column('sesion_version')
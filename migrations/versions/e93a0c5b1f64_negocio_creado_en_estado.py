@@ -0,0 +1,38 @@
+"""Negocio.creado_en e índice por estado para la cola de moderación
+
+Revision ID: e93a0c5b1f64
+Revises: d2f84b6e0a57
+Create Date: 2026-10-18 13:47:29.120054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a0c5b1f64'
+down_revision = 'd2f84b6e0a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('negocio', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('creado_en', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_negocio_creado_en'), ['creado_en'], unique=False)
+        batch_op.create_index(batch_op.f('ix_negocio_estado'), ['estado'], unique=False)
+
+    # Negocios existentes: el registro de su dueño es la mejor cota conocida
+    # (el negocio no puede ser anterior); si falta, el momento de la migración
+    op.execute(
+        "UPDATE negocio SET creado_en = COALESCE("
+        "(SELECT usuario.fecha_registro FROM usuario WHERE usuario.id = negocio.usuario_id), "
+        "CURRENT_TIMESTAMP) WHERE creado_en IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('negocio', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_negocio_estado'))
+        batch_op.drop_index(batch_op.f('ix_negocio_creado_en'))
+        batch_op.drop_column('creado_en')
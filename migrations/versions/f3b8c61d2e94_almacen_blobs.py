@@ -0,0 +1,35 @@
+"""Tabla blob: almacén de subidas direccionado por contenido
+
+Revision ID: f3b8c61d2e94
+Revises: e93a0c5b1f64
+Create Date: 2026-10-18 15:02:11.408317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8c61d2e94'
+down_revision = 'e93a0c5b1f64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() llama a db.create_all(): la tabla puede existir ya
+    if sa.inspect(op.get_bind()).has_table('blob'):
+        return
+    op.create_table('blob',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('ruta', sa.String(length=255), nullable=False),
+    sa.Column('tamano', sa.Integer(), nullable=False),
+    sa.Column('refs', sa.Integer(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256'),
+    sa.UniqueConstraint('ruta')
+    )
+
+
+def downgrade():
+    op.drop_table('blob')
@@ -0,0 +1,25 @@
+// Configuración de `flask assets css` (Tailwind v3).
+// Las rutas de `content` son relativas a la raíz del repositorio.
+module.exports = {
+  content: [
+    "mi_comuna/templates/**/*.html",
+    "mi_comuna/modules/*/templates/**/*.html",
+  ],
+  safelist: [
+    // Colores armados en Jinja: border-{{m.color}}-500, bg-{{m.color}}-50, text-{{m.color}}-600
+    { pattern: /^(border|bg|text)-(blue|green|yellow|purple|red|indigo|orange|pink)-(50|500|600)$/ },
+    // <picture> que genera media_img() desde Python
+    "contents",
+  ],
+  theme: {
+    extend: {
+      fontFamily: {
+        sans: ["Inter", "ui-sans-serif", "system-ui", "sans-serif"],
+      },
+      animation: {
+        "pulse-slow": "pulse 3s cubic-bezier(0.4, 0, 0.6, 1) infinite",
+      },
+    },
+  },
+  plugins: [],
+};
@@ -0,0 +1,65 @@
+# tests/conftest.py
+"""Fixtures comunes: la app sobre una base SQLite temporal.
+
+``Config`` lee el entorno al importarse, por eso se ajusta antes de importar
+``mi_comuna``: hash de contraseñas barato y sin hilos, sin variantes de
+imágenes ni mantenimiento de SQLite, y tablas con ``create_all()`` en vez
+de migraciones.
+"""
+import os
+import tempfile
+import uuid
+
+import pytest
+
+_DIR = tempfile.mkdtemp(prefix="mi_comuna-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DIR}/test.db"
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+os.environ["PASSWORD_HASH_EXECUTOR"] = "sync"
+os.environ["IMAGE_PROCESSING"] = "off"
+os.environ["SQLITE_MAINTENANCE_INTERVAL"] = "0"
+os.environ["DB_CREATE_ALL"] = "1"
+
+from mi_comuna import create_app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def _baldes_llenos(app):
+    """Cada test parte con los límites de /login y /register sin consumir."""
+    from mi_comuna import ratelimit
+    with app.app_context():
+        ratelimit.backend().limpiar()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def crear_usuario(app):
+    """Crea un usuario con email único; devuelve (id, email, contraseña)."""
+    from mi_comuna.extensions import db
+    from mi_comuna.modules.auth.models import Usuario
+
+    def crear(rol="ciudadano", password="secreto1"):
+        email = f"{uuid.uuid4().hex[:12]}@test.cl"
+        with app.app_context():
+            usuario = Usuario(nombre=email.split("@")[0], email=email, rol=rol)
+            usuario.set_password(password)
+            db.session.add(usuario)
+            db.session.commit()
+            return usuario.id, email, password
+
+    return crear
+
+
+def login(client, email, password):
+    return client.post("/login", data={"email": email, "password": password})
@@ -0,0 +1,39 @@
+# tests/test_admin_lote.py
+"""Moderación en lote: a dónde vuelve el formulario (parámetro ``next``)."""
+import pytest
+
+from tests.conftest import login
+
+COLA = "/admin/negocios"
+
+
+@pytest.fixture
+def admin(app, crear_usuario):
+    client = app.test_client()
+    _, email, password = crear_usuario(rol="admin")
+    login(client, email, password)
+    return client
+
+
+@pytest.mark.parametrize("siguiente", [
+    "https://evil.com/",
+    "//evil.com",
+    "///evil.com",
+    "/\\evil.com",
+    "\\\\evil.com",
+    "/\t/evil.com",
+    "/\n/evil.com",
+    "javascript:alert(1)",
+    "evil.com",
+    "",
+])
+def test_next_externo_vuelve_a_la_cola(admin, siguiente):
+    resp = admin.post("/admin/negocios/lote", data={"accion": "aprobar", "next": siguiente})
+    assert resp.status_code == 302
+    assert resp.headers["Location"] == COLA
+
+
+def test_next_local_conserva_los_filtros(admin):
+    volver = f"{COLA}?estado=pendiente&q=caf%C3%A9&antes=abc"
+    resp = admin.post("/admin/negocios/lote", data={"accion": "aprobar", "next": volver})
+    assert resp.headers["Location"] == volver
@@ -0,0 +1,48 @@
+# tests/test_busqueda.py
+"""Búsqueda de negocios: índice FTS5 sobre SQLite y el LIKE de respaldo."""
+import re
+import uuid
+
+import pytest
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.negocios.models import Categoria, Negocio
+
+
+def _nombres(resp):
+    return set(re.findall(r'mb-1">([^<]+)<', resp.get_data(as_text=True)))
+
+
+@pytest.fixture
+def negocio(app, crear_usuario):
+    usuario_id, _, _ = crear_usuario()
+    sufijo = uuid.uuid4().hex[:8]
+    with app.app_context():
+        categoria = Categoria(nombre=f"Cafés {sufijo}")
+        db.session.add(categoria)
+        db.session.flush()
+        db.session.add(Negocio(
+            nombre=f"Café Ñandú {sufijo}", direccion="Av. Niño 12", estado="aprobado",
+            categoria_id=categoria.id, usuario_id=usuario_id,
+        ))
+        db.session.commit()
+    return f"Café Ñandú {sufijo}", sufijo
+
+
+def test_indice_sin_tildes(app, client, negocio):
+    nombre, sufijo = negocio
+    assert app.extensions["negocios_search"] == "sqlite"
+    assert nombre in _nombres(client.get(f"/negocios/?q=cafe+nandu+{sufijo}"))
+    assert nombre in _nombres(client.get(f"/negocios/?q=NIÑO+{sufijo}"))
+
+
+def test_consulta_sin_terminos_no_recorre_la_tabla(client, negocio):
+    resp = client.get("/negocios/?q=%21%21")
+    assert resp.status_code == 200
+    assert _nombres(resp) == set()
+
+
+def test_like_de_respaldo_sin_indice(app, client, negocio, monkeypatch):
+    nombre, sufijo = negocio
+    monkeypatch.setitem(app.extensions, "negocios_search", None)
+    assert nombre in _nombres(client.get(f"/negocios/?q=NANDU+{sufijo}"))
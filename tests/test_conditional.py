@@ -0,0 +1,88 @@
+# tests/test_conditional.py
+"""GET condicional: 304 con If-None-Match / If-Modified-Since y cuándo cambia el ETag."""
+import uuid
+from datetime import datetime
+
+import pytest
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.inicio.models import Noticia
+from tests.conftest import login
+
+EDITADA = datetime(2026, 2, 3, 4, 5, 6)
+
+
+@pytest.fixture
+def noticia(app):
+    with app.app_context():
+        noticia = Noticia(titulo=f"Noticia {uuid.uuid4().hex[:8]}", contenido="c", actualizado_en=EDITADA)
+        db.session.add(noticia)
+        db.session.commit()
+        return noticia.id
+
+
+def _editar(app, noticia_id, **campos):
+    with app.app_context():
+        noticia = db.session.get(Noticia, noticia_id)
+        for nombre, valor in campos.items():
+            setattr(noticia, nombre, valor)
+        db.session.commit()
+
+
+def test_get_repetido_responde_304(client, noticia):
+    url = f"/noticia/{noticia}"
+    resp = client.get(url)
+    assert resp.status_code == 200
+    etag, ultima = resp.headers["ETag"], resp.headers["Last-Modified"]
+    assert etag.startswith('W/"')
+    assert ultima == "Tue, 03 Feb 2026 04:05:06 GMT"
+    assert "no-cache" in resp.headers["Cache-Control"]
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.data == b""
+    assert resp.headers["ETag"] == etag
+
+    assert client.get(url, headers={"If-Modified-Since": ultima}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": "Mon, 02 Feb 2026 00:00:00 GMT"}).status_code == 200
+    # Con ETag manda el ETag: uno viejo obliga a responder aunque la fecha coincida
+    assert client.get(url, headers={"If-None-Match": 'W/"viejo"', "If-Modified-Since": ultima}).status_code == 200
+
+
+def test_el_etag_cambia_tras_un_commit(app, client, noticia):
+    url = f"/noticia/{noticia}"
+    etag = client.get(url).headers["ETag"]
+
+    _editar(app, noticia, titulo="Otro título")
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert b"Otro t" in resp.data
+    assert resp.headers["ETag"] != etag
+    assert client.get(url, headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+
+def test_el_listado_cambia_con_altas_y_bajas(app, client, noticia):
+    etag = client.get("/noticias").headers["ETag"]
+    with app.app_context():
+        db.session.delete(db.session.get(Noticia, noticia))
+        db.session.commit()
+    resp = client.get("/noticias", headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+
+
+def test_el_etag_depende_del_usuario(app, crear_usuario, noticia):
+    url = f"/noticia/{noticia}"
+    anonimo = app.test_client()
+    etag_anonimo = anonimo.get(url).headers["ETag"]
+
+    etags = []
+    for _ in range(2):
+        client = app.test_client()
+        _, email, password = crear_usuario()
+        login(client, email, password)
+        client.get("/")  # consume el flash del login
+        resp = client.get(url, headers={"If-None-Match": etag_anonimo})
+        assert resp.status_code == 200
+        assert "private" in resp.headers["Cache-Control"]
+        etags.append(resp.headers["ETag"])
+        assert client.get(url, headers={"If-None-Match": etags[-1]}).status_code == 304
+    assert len({etag_anonimo, *etags}) == 3
@@ -0,0 +1,130 @@
+# tests/test_feed.py
+"""Feed UNION ALL de negocios.detalle: orden, fechas NULL y bordes de página."""
+import re
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import update
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.ciudadano.models import (
+    AvisoCiudadano, EventoCiudadano, NoticiaEmpresa, OfertaCiudadano, PerfilEmpresa
+)
+from mi_comuna.modules.negocios.feed import feed_perfil
+from mi_comuna.modules.negocios.models import Categoria, Negocio
+
+MISMO_DIA = datetime(2026, 3, 1)
+
+
+@pytest.fixture
+def perfil(app, crear_usuario):
+    """Perfil con publicaciones de los cuatro tipos; devuelve (slug, perfil_id, sufijo, esperado)."""
+    usuario_id, _, _ = crear_usuario()
+    sufijo = uuid.uuid4().hex[:8]
+    with app.app_context():
+        categoria = Categoria(nombre=f"Cat {sufijo}")
+        db.session.add(categoria)
+        db.session.flush()
+        negocio = Negocio(nombre=f"Negocio {sufijo}", direccion="Calle 1", estado="aprobado",
+                          categoria_id=categoria.id, usuario_id=usuario_id)
+        perfil = PerfilEmpresa(usuario_id=usuario_id, nombre=f"Perfil {sufijo}")
+        db.session.add_all([negocio, perfil])
+        db.session.flush()
+
+        filas = []  # (fecha o None, tipo, objeto)
+        def agregar(tipo, fecha, obj):
+            db.session.add(obj)
+            filas.append((fecha, tipo, obj))
+
+        n = iter(range(100))
+        titulo = lambda: f"P{next(n):02d}-{sufijo}"  # noqa: E731
+        for _ in range(2):
+            # Cuatro tipos con la misma fecha: el desempate es (tipo, id)
+            agregar("aviso", MISMO_DIA, AvisoCiudadano(titulo=titulo(), descripcion="d", perfil_id=perfil.id,
+                                                       creado_en=MISMO_DIA))
+            agregar("noticia", MISMO_DIA, NoticiaEmpresa(titulo=titulo(), contenido="c" * 30, perfil_id=perfil.id,
+                                                         fecha_publicacion=MISMO_DIA))
+            agregar("evento", MISMO_DIA, EventoCiudadano(titulo=titulo(), descripcion="d", perfil_id=perfil.id,
+                                                         fecha_inicio=MISMO_DIA.date()))
+            agregar("oferta", MISMO_DIA, OfertaCiudadano(titulo=titulo(), descripcion="d", perfil_id=perfil.id,
+                                                         fecha_inicio=MISMO_DIA.date()))
+        agregar("aviso", datetime(2026, 5, 2, 9, 30), AvisoCiudadano(
+            titulo=titulo(), descripcion="d", perfil_id=perfil.id, creado_en=datetime(2026, 5, 2, 9, 30)))
+        agregar("evento", datetime(2025, 12, 24), EventoCiudadano(
+            titulo=titulo(), descripcion="d", perfil_id=perfil.id, fecha_inicio=date(2025, 12, 24)))
+        # Sin fecha (filas viejas; el default de creado_en no deja crearlas por el ORM):
+        # al final, ordenadas por (tipo, id)
+        agregar("aviso", None, AvisoCiudadano(titulo=titulo(), descripcion="d", perfil_id=perfil.id))
+        agregar("noticia", None, NoticiaEmpresa(titulo=titulo(), contenido="c" * 30, perfil_id=perfil.id))
+        agregar("oferta", None, OfertaCiudadano(titulo=titulo(), descripcion="d", perfil_id=perfil.id))
+        db.session.flush()
+        for columna in (AvisoCiudadano.creado_en, NoticiaEmpresa.fecha_publicacion, OfertaCiudadano.creado_en):
+            modelo = columna.class_
+            ids = [obj.id for fecha, _, obj in filas if fecha is None and isinstance(obj, modelo)]
+            db.session.execute(update(modelo).where(modelo.id.in_(ids)).values({columna: None}))
+        db.session.commit()
+
+        con_fecha = sorted((f for f in filas if f[0]), key=lambda f: (f[0], f[1], f[2].id), reverse=True)
+        sin_fecha = sorted((f for f in filas if not f[0]), key=lambda f: (f[1], f[2].id), reverse=True)
+        esperado = [(tipo, obj.id, obj.titulo) for _, tipo, obj in con_fecha + sin_fecha]
+        return negocio.slug, perfil.id, sufijo, esperado
+
+
+@pytest.mark.parametrize("limite", [1, 3, 4, 5, 20])
+def test_paginas_sin_duplicados_ni_huecos(app, perfil, limite):
+    _, perfil_id, _, esperado = perfil
+    vistos, cursor, paginas = [], None, 0
+    with app.app_context():
+        while True:
+            items, cursor = feed_perfil(perfil_id, antes=cursor, limite=limite)
+            assert len(items) <= limite
+            vistos += [(p.tipo, p.id, p.titulo) for p in items]
+            paginas += 1
+            if not cursor:
+                break
+    assert vistos == esperado
+    assert paginas == -(-len(esperado) // limite)
+
+
+def test_fechas_nulas_al_final(app, perfil):
+    _, perfil_id, _, esperado = perfil
+    with app.app_context():
+        items, _ = feed_perfil(perfil_id, limite=len(esperado))
+    fechas = [p.fecha for p in items]
+    assert fechas[-3:] == [None, None, None]
+    assert None not in fechas[:-3]
+
+
+def test_detalle_per_page_y_fragmento(client, perfil):
+    slug, _, sufijo, esperado = perfil
+
+    def titulos(resp):
+        # Cada título aparece más de una vez en la tarjeta (texto y alt)
+        return list(dict.fromkeys(re.findall(rf"P\d\d-{sufijo}", resp.get_data(as_text=True))))
+
+    # per_page=0 se acota a 1 en vez de romper la paginación
+    resp = client.get(f"/negocios/{slug}?per_page=0")
+    assert resp.status_code == 200
+    assert titulos(resp) == [esperado[0][2]]
+
+    vistos, antes = [], None
+    while True:
+        url = f"/negocios/{slug}?parcial=1&per_page=4" + (f"&antes={antes}" if antes else "")
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert b"<html" not in resp.data
+        vistos += titulos(resp)
+        siguiente = re.search(r"antes=([^&\"#]+)", resp.get_data(as_text=True))
+        if not siguiente:
+            break
+        antes = siguiente.group(1)
+    assert vistos == [t for _, _, t in esperado]
+
+
+def test_cursor_invalido_empieza_desde_el_principio(client, perfil):
+    slug, _, sufijo, esperado = perfil
+    for basura in ("xyz", "null~aviso~abc", "2026-99-99~aviso~1", "%00"):
+        resp = client.get(f"/negocios/{slug}?per_page=2&antes={basura}")
+        assert resp.status_code == 200
+        assert re.findall(rf"P\d\d-{sufijo}", resp.get_data(as_text=True))[0] == esperado[0][2]
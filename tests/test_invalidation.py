@@ -0,0 +1,53 @@
+# tests/test_invalidation.py
+"""Bus de invalidación: tags de UPDATE/DELETE masivos y efecto en la caché de páginas."""
+import uuid
+
+from mi_comuna.extensions import db
+from mi_comuna.invalidation import _TAGS
+from mi_comuna.modules.negocios.models import Categoria, Negocio
+from tests.conftest import login
+
+
+def _negocio(app, usuario_id, estado="pendiente"):
+    nombre = f"Negocio {uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        categoria = Categoria(nombre=f"Cat {uuid.uuid4().hex[:8]}")
+        db.session.add(categoria)
+        db.session.flush()
+        negocio = Negocio(nombre=nombre, direccion="Calle 1", categoria_id=categoria.id,
+                          usuario_id=usuario_id, estado=estado)
+        db.session.add(negocio)
+        db.session.commit()
+        return negocio.id, categoria.id, nombre
+
+
+def test_update_masivo_emite_tags_de_las_reglas(app, crear_usuario):
+    usuario_id, _, _ = crear_usuario()
+    negocio_id, _, _ = _negocio(app, usuario_id)
+    with app.app_context():
+        Negocio.query.filter(Negocio.id == negocio_id).update({Negocio.estado: "aprobado"})
+        tags = set(db.session.info[_TAGS])
+        db.session.rollback()
+    assert {"negocio", "negocio:*", "home", "categoria:*"} <= tags
+
+
+def test_aprobacion_en_lote_invalida_la_portada(app, crear_usuario):
+    usuario_id, _, _ = crear_usuario()
+    negocio_id, _, nombre = _negocio(app, usuario_id)
+    # Antes de llenar la caché: crear usuarios también invalida la portada
+    admin = app.test_client()
+    _, email, password = crear_usuario(rol="admin")
+    login(admin, email, password)
+
+    anonimo = app.test_client()
+    anonimo.get("/")
+    resp = anonimo.get("/")
+    assert resp.headers["X-Page-Cache"] == "HIT"
+    assert nombre.encode() not in resp.data
+
+    resp = admin.post("/admin/negocios/lote", data={"accion": "aprobar", "ids": [str(negocio_id)]})
+    assert resp.status_code == 302
+
+    resp = anonimo.get("/")
+    assert resp.headers["X-Page-Cache"] == "MISS"
+    assert nombre.encode() in resp.data
@@ -0,0 +1,79 @@
+# tests/test_pagecache_redis.py
+"""``RedisBackend`` de la caché de páginas contra fakeredis (mismo protocolo)."""
+import pickle
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from mi_comuna.extensions import db  # noqa: E402
+from mi_comuna.modules.negocios.models import Categoria  # noqa: E402
+from mi_comuna.pagecache.backends import Pagina, RedisBackend, deserializar, serializar  # noqa: E402
+
+
+@pytest.fixture
+def cliente():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def almacen(cliente):
+    return RedisBackend(cliente=cliente)
+
+
+def test_get_set_pagina_y_texto(almacen):
+    pagina = Pagina(200, [("Content-Type", "text/html; charset=utf-8"), ("Vary", "Cookie")], b"<h1>\xc3\xb1\n</h1>")
+    almacen.set("a", pagina, 60, ["negocio"])
+    almacen.set("b", "<p>fragmento ñ</p>", 60)
+    assert almacen.get("a") == pagina
+    assert almacen.get("b") == "<p>fragmento ñ</p>"
+    assert almacen.get("c") is None
+    assert len(almacen) == 2
+
+
+def test_no_carga_pickle(almacen, cliente):
+    cliente.set(almacen._clave("x"), pickle.dumps(Pagina(200, [], b"")))
+    assert almacen.get("x") is None
+    with pytest.raises(TypeError):
+        serializar({"no": "serializable"})
+    assert deserializar(b"Pno-json\n") is None
+
+
+def test_invalidacion_por_tag(almacen):
+    almacen.set("lista", "l", 60, ["negocio", "categoria"])
+    almacen.set("detalle", "d", 60, ["negocio:1"])
+    almacen.set("otra", "o", 60, ["noticia"])
+    assert almacen.invalidar(["negocio"]) == 1
+    assert almacen.get("lista") is None and almacen.get("detalle") == "d"
+    assert almacen.invalidar(["negocio:1", "negocio:2"]) == 1
+    assert almacen.get("otra") == "o"
+    almacen.limpiar()
+    assert len(almacen) == 0
+
+
+def test_ttl_de_entradas_y_tags(almacen, cliente):
+    almacen.set("larga", "l", 60, ["negocio"])
+    almacen.set("corta", "c", 1, ["negocio"])
+    # Una entrada más corta no acorta el SET del tag
+    assert 59 <= cliente.ttl(almacen._tag("negocio")) <= 60
+    time.sleep(1.1)
+    assert almacen.get("corta") is None
+    assert almacen.get("larga") == "l"
+    assert almacen.invalidar(["negocio"]) >= 1
+    assert almacen.get("larga") is None
+
+
+def test_app_con_backend_redis(app, client, almacen):
+    anterior = app.extensions["pagecache"]
+    app.extensions["pagecache"] = almacen
+    try:
+        assert client.get("/negocios/").headers["X-Page-Cache"] == "MISS"
+        resp = client.get("/negocios/")
+        assert resp.headers["X-Page-Cache"] == "HIT" and resp.status_code == 200
+        with app.app_context():
+            db.session.add(Categoria(nombre="Cafeterías"))
+            db.session.commit()
+        assert client.get("/negocios/").headers["X-Page-Cache"] == "MISS"
+    finally:
+        app.extensions["pagecache"] = anterior
@@ -0,0 +1,105 @@
+# tests/test_pagination.py
+"""Cursor keyset compartido (mi_comuna.pagination) y listados del ciudadano."""
+import re
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import update
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.ciudadano.models import AvisoCiudadano, PerfilEmpresa
+from mi_comuna.pagination import codificar_valores, decodificar_valores
+from tests.conftest import login
+
+MISMO_MOMENTO = datetime(2026, 4, 1, 12, 0, 0, 123456)
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = codificar_valores(MISMO_MOMENTO, "aviso", 7)
+    assert decodificar_valores(cursor, datetime, str, int) == (MISMO_MOMENTO, "aviso", 7)
+    assert decodificar_valores(codificar_valores(None, 3), datetime, int) == (None, 3)
+    assert decodificar_valores(codificar_valores(date(2026, 1, 2), 1), date, int) == (date(2026, 1, 2), 1)
+
+
+@pytest.mark.parametrize("basura", [
+    None, "", "xyz", "1~2~3", "2026-13-01T00:00:00~1", "2026-01-01T00:00:00~uno", "~", "null~null~null",
+])
+def test_cursor_mal_formado_es_none(basura):
+    assert decodificar_valores(basura, datetime, int) is None
+
+
+@pytest.fixture
+def ciudadano(app, client, crear_usuario):
+    """Ciudadano logueado con 4 avisos en el mismo instante y 3 sin fecha."""
+    usuario_id, email, password = crear_usuario()
+    sufijo = uuid.uuid4().hex[:8]
+    with app.app_context():
+        perfil = PerfilEmpresa(usuario_id=usuario_id, nombre=f"Perfil {sufijo}")
+        db.session.add(perfil)
+        db.session.flush()
+        avisos = [
+            AvisoCiudadano(titulo=f"A{i}-{sufijo}", descripcion="d", perfil_id=perfil.id, creado_en=MISMO_MOMENTO)
+            for i in range(7)
+        ]
+        db.session.add_all(avisos)
+        db.session.flush()
+        # Filas viejas sin fecha (el ORM pondría el default)
+        sin_fecha = [a.id for a in avisos[4:]]
+        db.session.execute(
+            update(AvisoCiudadano).where(AvisoCiudadano.id.in_(sin_fecha)).values(creado_en=None)
+        )
+        db.session.commit()
+        # creado_en DESC NULLS LAST, id DESC
+        esperado = [a.titulo for a in sorted(avisos[:4], key=lambda a: a.id, reverse=True)]
+        esperado += [a.titulo for a in sorted(avisos[4:], key=lambda a: a.id, reverse=True)]
+    login(client, email, password)
+    return sufijo, esperado
+
+
+def _titulos(resp, sufijo):
+    return list(dict.fromkeys(re.findall(rf"A\d-{sufijo}", resp.get_data(as_text=True))))
+
+
+@pytest.mark.parametrize("per_page", [1, 2, 3, 4, 5])
+def test_listado_sin_duplicados_ni_huecos(client, ciudadano, per_page):
+    sufijo, esperado = ciudadano
+    vistos, antes = [], None
+    for _ in range(len(esperado) + 1):
+        url = f"/ciudadano/avisos?parcial=1&per_page={per_page}" + (f"&antes={antes}" if antes else "")
+        resp = client.get(url)
+        assert resp.status_code == 200
+        # Solo los items, sin el layout
+        assert b"<html" not in resp.data
+        pagina = _titulos(resp, sufijo)
+        assert 0 < len(pagina) <= per_page
+        vistos += pagina
+        siguiente = re.search(r"antes=([^&\"#]+)", resp.get_data(as_text=True))
+        if not siguiente:
+            break
+        antes = siguiente.group(1)
+    assert vistos == esperado
+
+
+@pytest.mark.parametrize("basura", ["xyz", "null~abc", "2026-99-01T00:00:00~3", "1~2~3", "%FF%FE"])
+def test_cursor_alterado_da_la_primera_pagina(client, ciudadano, basura):
+    sufijo, esperado = ciudadano
+    resp = client.get(f"/ciudadano/avisos?per_page=2&antes={basura}")
+    assert resp.status_code == 200
+    assert _titulos(resp, sufijo) == esperado[:2]
+
+
+def test_pagina_completa_y_per_page_acotado(client, ciudadano):
+    sufijo, esperado = ciudadano
+    resp = client.get("/ciudadano/avisos?per_page=0")
+    assert resp.status_code == 200
+    assert b"<html" in resp.data
+    assert _titulos(resp, sufijo) == esperado[:1]
+    assert _titulos(client.get("/ciudadano/avisos?per_page=999"), sufijo) == esperado
+
+
+def test_cola_de_moderacion_con_cursor_alterado(client, crear_usuario):
+    _, email, password = crear_usuario(rol="admin")
+    login(client, email, password)
+    for basura in ("xyz", "null", "1~2"):
+        assert client.get(f"/admin/negocios?antes={basura}").status_code == 200
@@ -0,0 +1,80 @@
+# tests/test_passwords.py
+"""Rehash al iniciar sesión y 503 cuando el pool de hashes no da abasto."""
+import time
+
+import pytest
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.auth import passwords
+from mi_comuna.modules.auth.models import Usuario
+from tests.conftest import login
+
+NUEVO_METODO = "scrypt:1024:8:1"  # barato, pero distinto del pbkdf2 de conftest
+
+
+def _hash(app, usuario_id):
+    with app.app_context():
+        return db.session.get(Usuario, usuario_id).password_hash
+
+
+def test_login_recalcula_un_hash_de_otro_metodo(app, client, crear_usuario, monkeypatch):
+    usuario_id, email, password = crear_usuario()
+    anterior = _hash(app, usuario_id)
+    assert anterior.startswith("pbkdf2:sha256:1000$")
+
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", NUEVO_METODO)
+    # Contraseña incorrecta: no se toca el hash
+    login(client, email, "incorrecta")
+    assert _hash(app, usuario_id) == anterior
+
+    assert login(client, email, password).status_code == 302
+    nuevo = _hash(app, usuario_id)
+    assert nuevo.startswith(NUEVO_METODO + "$")
+    with app.app_context():
+        assert not passwords.requiere_rehash(nuevo)
+
+    # Con el hash al día se inicia sesión sin volver a calcularlo
+    otro = app.test_client()
+    assert login(otro, email, password).status_code == 302
+    assert _hash(app, usuario_id) == nuevo
+
+
+@pytest.fixture
+def cuenta(crear_usuario):
+    # Antes de pool_lento: crear el usuario también calcula un hash
+    return crear_usuario()
+
+
+@pytest.fixture
+def pool_lento(app, monkeypatch):
+    """Pool de un hilo cuyos hashes tardan más que PASSWORD_HASH_TIMEOUT."""
+    def lento(funcion):
+        def envuelta(*args):
+            time.sleep(0.3)
+            return funcion(*args)
+        return envuelta
+
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", "thread")
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_TIMEOUT", 0.05)
+    monkeypatch.setattr(passwords, "check_password_hash", lento(passwords.check_password_hash))
+    monkeypatch.setattr(passwords, "generate_password_hash", lento(passwords.generate_password_hash))
+    yield
+    # Que el hilo del pool termine antes del próximo test
+    time.sleep(0.35)
+
+
+def test_login_503_si_el_pool_esta_ocupado(client, cuenta, pool_lento):
+    _, email, password = cuenta
+    resp = login(client, email, password)
+    assert resp.status_code == 503
+    assert "demanda" in resp.get_data(as_text=True)
+    assert client.get("/ciudadano/perfil").status_code == 302
+
+
+def test_registro_503_si_el_pool_esta_ocupado(app, client, pool_lento):
+    resp = client.post("/register", data={
+        "nombre": "Nueva", "email": "nueva-503@test.cl", "password": "secreto1",
+    })
+    assert resp.status_code == 503
+    with app.app_context():
+        assert Usuario.query.filter_by(email="nueva-503@test.cl").first() is None
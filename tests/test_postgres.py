@@ -0,0 +1,365 @@
+# tests/test_postgres.py
+"""La app contra un PostgreSQL desechable (pgserver).
+
+La base parte vacía: ``flask db upgrade`` corre en otro proceso, como en un
+despliegue, primero hasta 73af8860326a (el esquema de antes del backlog)
+para sembrar filas que las migraciones siguientes deben completar (*_norm,
+slug, creado_en, tsvector) y después hasta head. Luego se recorren las rutas
+públicas, del ciudadano y del administrador sobre esa base. El mismo
+recorrido de migraciones se repite con un archivo SQLite vacío.
+"""
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+from mi_comuna import create_app
+from mi_comuna.extensions import db
+from mi_comuna.normalize import normalizar
+
+from .conftest import login
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANTES_DEL_BACKLOG = "73af8860326a"
+STATEMENT_TIMEOUT = 1000  # ms
+
+
+def _flask_db(url, *args):
+    # Como en un despliegue: sin el create_all() que conftest activa
+    env = {**os.environ, "DATABASE_URL": url, "DB_CREATE_ALL": "0"}
+    resultado = subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "mi_comuna:create_app", "db", *args],
+        cwd=RAIZ, env=env, capture_output=True, text=True,
+    )
+    assert resultado.returncode == 0, resultado.stderr[-4000:]
+
+
+def _sembrar(url):
+    """Filas con el esquema de 73af8860326a (sin columnas del backlog)."""
+    engine = sa.create_engine(url)
+    with engine.begin() as conn:
+        usuario_id = conn.execute(sa.text(
+            "INSERT INTO usuario (nombre, email, password_hash, rol, fecha_registro) "
+            "VALUES ('Dueña', 'duena@test.cl', :h, 'ciudadano', '2025-01-02 10:00') RETURNING id"
+        ), {"h": generate_password_hash("secreto1", "pbkdf2:sha256:1000")}).scalar()
+        categoria_id = conn.execute(sa.text(
+            "INSERT INTO categoria (nombre) VALUES ('Cafés y Té') RETURNING id"
+        )).scalar()
+        conn.execute(sa.text(
+            "INSERT INTO negocio (nombre, descripcion, direccion, estado, categoria_id, usuario_id) "
+            "VALUES ('Café del Centro', 'El mejor café de la comuna', 'Av. Niño 12', 'aprobado', :c, :u)"
+        ), {"c": categoria_id, "u": usuario_id})
+        conn.execute(sa.text(
+            "INSERT INTO perfil_empresa (usuario_id, nombre, direccion, creado_en) "
+            "VALUES (:u, 'Café del Centro', 'Av. Niño 12', '2025-01-02 10:00')"
+        ), {"u": usuario_id})
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def pg_url(tmp_path_factory):
+    pgserver = pytest.importorskip("pgserver")
+    pytest.importorskip("psycopg")
+    servidor = pgserver.get_server(str(tmp_path_factory.mktemp("pgdata")), cleanup_mode="stop")
+    servidor.psql("CREATE DATABASE mi_comuna_test;")
+    url = servidor.get_uri().replace("postgresql://", "postgresql+psycopg://", 1)
+    url = url.replace("/postgres?", "/mi_comuna_test?", 1)
+
+    _flask_db(url, "upgrade", ANTES_DEL_BACKLOG)
+    _sembrar(url)
+    _flask_db(url, "upgrade")
+    yield url
+    servidor.cleanup()
+
+
+@pytest.fixture(scope="module")
+def app(pg_url):
+    """Reemplaza la app SQLite de conftest en este módulo."""
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": pg_url,
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "PG_STATEMENT_TIMEOUT": STATEMENT_TIMEOUT,
+        "PG_APPLICATION_NAME": "mi_comuna_tests",
+        "DB_CREATE_ALL": False,
+        # Las cachés en proceso son del módulo, compartidas con la app SQLite
+        "PAGE_CACHE": False,
+        "FRAGMENT_CACHE": False,
+        "NEGOCIOS_TOP_CACHE_TTL": 0,
+        "CATEGORIAS_CACHE_TTL": 0,
+        "SESION_CACHE_TTL": 0,
+        "PERFIL_CACHE_TTL": 0,
+        "ADMIN_METRICS_TTL": 0,
+    })
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _scalar(app, sql, **params):
+    with app.app_context():
+        return db.session.execute(sa.text(sql), params).scalar()
+
+
+def _crear_negocio(app, crear_usuario, nombre, categoria="Cafés y Té", estado="aprobado", **campos):
+    from mi_comuna.modules.negocios.models import Categoria, Negocio
+
+    usuario_id, email, password = crear_usuario()
+    with app.app_context():
+        cat = Categoria.query.filter_by(nombre=categoria).first()
+        if cat is None:
+            cat = Categoria(nombre=categoria)
+            db.session.add(cat)
+            db.session.flush()
+        negocio = Negocio(
+            nombre=nombre, direccion=campos.pop("direccion", "Calle 1"), estado=estado,
+            categoria_id=cat.id, usuario_id=usuario_id, **campos,
+        )
+        db.session.add(negocio)
+        db.session.commit()
+        return negocio.id
+
+
+# ---------------------------------------------------------------------
+# Esquema y motor
+# ---------------------------------------------------------------------
+def test_upgrade_desde_cero_llega_a_head(app):
+    from alembic.script import ScriptDirectory
+
+    scripts = ScriptDirectory(os.path.join(RAIZ, "migrations"))
+    assert _scalar(app, "SELECT version_num FROM alembic_version") == scripts.get_current_head()
+
+    definicion = _scalar(
+        app, "SELECT indexdef FROM pg_indexes WHERE indexname = 'ix_aviso_ciudadano_perfil_id_creado_en'"
+    )
+    assert "creado_en DESC NULLS LAST, id DESC" in definicion
+    # Los *_norm del perfil se quitaron; los del negocio no llevan índice B-tree
+    with app.app_context():
+        inspector = sa.inspect(db.engine)
+        assert not any(c["name"].endswith("_norm") for c in inspector.get_columns("perfil_empresa"))
+        assert not any("_norm" in i["name"] for i in inspector.get_indexes("negocio"))
+
+
+def test_upgrade_sqlite_desde_cero(tmp_path):
+    url = f"sqlite:///{tmp_path}/vacia.db"
+    _flask_db(url, "upgrade", ANTES_DEL_BACKLOG)
+    _sembrar(url)
+    _flask_db(url, "upgrade")
+
+    from alembic.script import ScriptDirectory
+
+    engine = sa.create_engine(url)
+    with engine.connect() as conn:
+        version = conn.execute(sa.text("SELECT version_num FROM alembic_version")).scalar()
+        slug, nombre_norm, creado_en = conn.execute(sa.text(
+            "SELECT slug, nombre_norm, creado_en FROM negocio WHERE nombre = 'Café del Centro'"
+        )).one()
+    engine.dispose()
+    assert version == ScriptDirectory(os.path.join(RAIZ, "migrations")).get_current_head()
+    assert (slug, nombre_norm) == ("cafe-del-centro", "cafe del centro")
+    assert creado_en.startswith("2025-01-02 10:00")
+    _flask_db(url, "downgrade", "base")
+
+
+def test_opciones_de_conexion(app):
+    assert _scalar(app, "SHOW statement_timeout") == f"{STATEMENT_TIMEOUT // 1000}s"
+    assert _scalar(app, "SHOW application_name") == "mi_comuna_tests"
+    with app.app_context():
+        assert db.engine.pool.size() == app.config["GUNICORN_THREADS"]
+        assert db.engine.pool._pre_ping
+        # El servidor cancela la consulta: no queda un worker colgado
+        with pytest.raises(sa.exc.OperationalError, match="statement timeout"):
+            db.session.execute(sa.text("SELECT pg_sleep(:s)"), {"s": STATEMENT_TIMEOUT / 1000 + 0.5})
+        db.session.rollback()
+
+
+def _app_pgbouncer(pg_url, timeout):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": pg_url,
+        "DB_CREATE_ALL": False,
+        "PG_PGBOUNCER": True,
+        "PG_STATEMENT_TIMEOUT": timeout,
+    })
+
+
+def test_pgbouncer_timeout_por_transaccion(app, pg_url):
+    con_timeout = _app_pgbouncer(pg_url, STATEMENT_TIMEOUT)
+    assert "options" not in con_timeout.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"]
+    with con_timeout.app_context():
+        # Cada transacción lo fija de nuevo, también después de un ROLLBACK
+        for _ in range(2):
+            assert db.session.execute(sa.text("SHOW statement_timeout")).scalar() == "1s"
+            with pytest.raises(sa.exc.OperationalError, match="statement timeout"):
+                db.session.execute(sa.text("SELECT pg_sleep(:s)"), {"s": STATEMENT_TIMEOUT / 1000 + 0.5})
+            db.session.rollback()
+        db.engine.dispose()
+
+    sin_timeout = _app_pgbouncer(pg_url, 0)
+    resultado = sin_timeout.test_cli_runner().invoke(args=["postgres", "info"])
+    assert "statement_timeout = 0" in resultado.output and "ALTER ROLE" in resultado.output
+    assert "ALTER ROLE" not in app.test_cli_runner().invoke(args=["postgres", "info"]).output
+    with sin_timeout.app_context():
+        db.engine.dispose()
+
+
+def test_backfills_de_las_migraciones(app):
+    with app.app_context():
+        fila = db.session.execute(sa.text(
+            "SELECT n.slug, n.nombre_norm, n.descripcion_norm, n.direccion_norm, n.creado_en, "
+            "n.actualizado_en, c.slug FROM negocio n JOIN categoria c ON c.id = n.categoria_id "
+            "WHERE n.nombre = 'Café del Centro'"
+        )).one()
+    slug, nombre_norm, descripcion_norm, direccion_norm, creado_en, actualizado_en, slug_categoria = fila
+    assert (slug, slug_categoria) == ("cafe-del-centro", "cafes-y-te")
+    assert nombre_norm == normalizar("Café del Centro") == "cafe del centro"
+    assert descripcion_norm == normalizar("El mejor café de la comuna")
+    assert direccion_norm == normalizar("Av. Niño 12")
+    # negocio.creado_en sale de la fecha de registro del dueño
+    assert creado_en == datetime(2025, 1, 2, 10, 0)
+    assert actualizado_en == creado_en
+    # El documento tsvector se armó desde *_norm: sin tildes
+    assert _scalar(
+        app,
+        "SELECT count(*) FROM negocio_fts f JOIN negocio n ON n.id = f.negocio_id "
+        "WHERE n.slug = 'cafe-del-centro' AND f.documento @@ to_tsquery('spanish', 'nino')",
+    ) == 1
+
+
+# ---------------------------------------------------------------------
+# Rutas públicas
+# ---------------------------------------------------------------------
+def _nombres(resp):
+    return set(re.findall(r'mb-1">([^<]+)<', resp.get_data(as_text=True)))
+
+
+def test_busqueda_tsvector(app, client, crear_usuario):
+    _crear_negocio(app, crear_usuario, "Panadería Ñuñoa", categoria="Panaderías",
+                   descripcion="Pan amasado y CAFÉ de grano")
+    assert "Café del Centro" in _nombres(client.get("/negocios/?q=cafe"))
+    assert "Café del Centro" in _nombres(client.get("/negocios/?q=NIÑO"))
+    # Alta por el ORM: el hook escribe el documento en la misma transacción
+    assert "Panadería Ñuñoa" in _nombres(client.get("/negocios/?q=nunoa"))
+    assert _nombres(client.get("/negocios/?q=cafe")) >= {"Café del Centro", "Panadería Ñuñoa"}
+    assert client.get("/negocios/?q=%21%21").status_code == 200
+
+
+def test_top_por_categoria_row_number(app, client, crear_usuario):
+    from mi_comuna.modules.negocios.queries import top_por_categoria
+
+    ids = [_crear_negocio(app, crear_usuario, f"Ferretería {i}", categoria="Ferreterías") for i in range(4)]
+    _crear_negocio(app, crear_usuario, "Ferretería pendiente", categoria="Ferreterías", estado="pendiente")
+    with app.app_context():
+        bloques = {b.categoria.nombre: b for b in top_por_categoria(3)}
+    assert [n.id for n in bloques["Ferreterías"].negocios] == sorted(ids, reverse=True)[:3]
+    assert all(len(b.negocios) <= 3 for b in bloques.values())
+    assert list(bloques) == sorted(bloques)
+
+    resp = client.get("/negocios/")
+    assert resp.status_code == 200
+    assert f"Ferretería {len(ids) - 1}" in _nombres(resp)
+    assert "Ferretería 0" not in _nombres(resp)
+
+
+@pytest.mark.parametrize("ruta", [
+    "/", "/noticias", "/avisos", "/eventos", "/negocios/", "/negocios/cafe-del-centro",
+    "/negocios/categoria/cafes-y-te", "/login", "/register",
+])
+def test_rutas_publicas(client, ruta):
+    assert client.get(ruta).status_code == 200
+
+
+# ---------------------------------------------------------------------
+# Ciudadano
+# ---------------------------------------------------------------------
+def test_ciudadano_publica_lista_y_elimina(app, client):
+    from mi_comuna.modules.ciudadano.models import AvisoCiudadano, OfertaCiudadano
+
+    assert login(client, "duena@test.cl", "secreto1").status_code == 302
+    for i in range(3):
+        resp = client.post("/ciudadano/avisos", data={"titulo": f"Aviso {i}", "descripcion": "Detalle"})
+        assert resp.status_code == 302
+    client.post("/ciudadano/noticias", data={"titulo": "Nueva sucursal", "contenido": "x" * 40})
+    client.post("/ciudadano/eventos", data={"titulo": "Cata", "descripcion": "d", "fecha_inicio": "2026-11-02"})
+    # Sin fecha de inicio: la oferta va al final del listado (NULLS LAST)
+    client.post("/ciudadano/ofertas", data={"titulo": "2x1", "descripcion": "d"})
+    client.post("/ciudadano/ofertas", data={"titulo": "Happy hour", "descripcion": "d", "fecha_inicio": "2026-11-01"})
+
+    assert client.get("/ciudadano/dashboard").status_code == 200
+
+    # Listado paginado por keyset en la base: 2 + 1
+    primera = client.get("/ciudadano/avisos?per_page=2").get_data(as_text=True)
+    assert "Aviso 2" in primera and "Aviso 1" in primera and "Aviso 0" not in primera
+    antes = re.search(r"antes=([^&\"#]+)", primera).group(1)
+    segunda = client.get(f"/ciudadano/avisos?per_page=2&antes={antes}").get_data(as_text=True)
+    assert "Aviso 0" in segunda and "Aviso 2" not in segunda
+
+    ofertas = client.get("/ciudadano/ofertas").get_data(as_text=True)
+    assert ofertas.index("Happy hour") < ofertas.index("2x1")
+
+    # Feed del negocio: UNION ALL de las cuatro tablas
+    detalle = client.get("/negocios/cafe-del-centro").get_data(as_text=True)
+    for titulo in ("Aviso 2", "Nueva sucursal", "Cata", "Happy hour"):
+        assert titulo in detalle
+
+    # DELETE ... RETURNING imagen en una sola sentencia
+    with app.app_context():
+        aviso_id = db.session.scalars(sa.select(AvisoCiudadano.id).filter_by(titulo="Aviso 1")).one()
+        oferta_id = db.session.scalars(sa.select(OfertaCiudadano.id).filter_by(titulo="2x1")).one()
+    assert client.post(f"/ciudadano/avisos/{aviso_id}/eliminar").status_code == 302
+    assert client.post(f"/ciudadano/avisos/{aviso_id}/eliminar").status_code == 404
+    assert client.post(f"/ciudadano/ofertas/{oferta_id}/eliminar").status_code == 302
+    assert _scalar(app, "SELECT count(*) FROM aviso_ciudadano WHERE id = :id", id=aviso_id) == 0
+    assert "Aviso 1" not in client.get("/ciudadano/avisos").get_data(as_text=True)
+
+
+def test_ciudadano_no_elimina_publicaciones_ajenas(app, client, crear_usuario):
+    from mi_comuna.modules.ciudadano.models import AvisoCiudadano
+
+    with app.app_context():
+        ajeno = db.session.scalars(sa.select(AvisoCiudadano.id).limit(1)).first()
+    assert ajeno is not None
+    _, email, password = crear_usuario()
+    login(client, email, password)
+    client.post("/ciudadano/perfil", data={"nombre": "Otro perfil"})
+    assert client.post(f"/ciudadano/avisos/{ajeno}/eliminar").status_code == 404
+    assert _scalar(app, "SELECT count(*) FROM aviso_ciudadano WHERE id = :id", id=ajeno) == 1
+
+
+# ---------------------------------------------------------------------
+# Administración
+# ---------------------------------------------------------------------
+def test_admin_metricas_y_moderacion_en_lote(app, client, crear_usuario):
+    pendientes = [
+        _crear_negocio(app, crear_usuario, f"Kiosko {i}", categoria="Kioscos", estado="pendiente")
+        for i in range(3)
+    ]
+    _, email, password = crear_usuario(rol="admin")
+    login(client, email, password)
+
+    assert client.get("/admin/").status_code == 200
+    metricas = client.get("/admin/metricas.json").get_json()
+    assert metricas["total_negocios"] == _scalar(app, "SELECT count(*) FROM negocio")
+    assert metricas["pendientes"] == _scalar(app, "SELECT count(*) FROM negocio WHERE estado = 'pendiente'")
+    assert metricas["usuarios"] == _scalar(app, "SELECT count(*) FROM usuario")
+
+    cola = client.get("/admin/negocios?estado=pendiente&per_page=2").get_data(as_text=True)
+    assert "Kiosko 2" in cola and "Kiosko 1" in cola and "Kiosko 0" not in cola
+    for ruta in ("/admin/avisos", "/admin/noticias", "/admin/eventos", "/admin/negocios?desde=2020-01-01"):
+        assert client.get(ruta).status_code == 200
+
+    resp = client.post("/admin/negocios/lote", data={"accion": "aprobar", "ids": pendientes[:2]})
+    assert resp.status_code == 302
+    assert _scalar(
+        app, "SELECT count(*) FROM negocio WHERE id = ANY(:ids) AND estado = 'aprobado'", ids=pendientes[:2]
+    ) == 2
+    assert "Kiosko 1" in _nombres(client.get("/negocios/?q=kiosko"))
+
+    client.post("/admin/negocios/lote", data={"accion": "eliminar", "ids": pendientes})
+    assert _scalar(app, "SELECT count(*) FROM negocio WHERE id = ANY(:ids)", ids=pendientes) == 0
+    assert _scalar(app, "SELECT count(*) FROM negocio_fts WHERE negocio_id = ANY(:ids)", ids=pendientes) == 0
+    assert client.get("/admin/metricas.json").get_json()["pendientes"] == metricas["pendientes"] - 3
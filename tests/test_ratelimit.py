@@ -0,0 +1,90 @@
+# tests/test_ratelimit.py
+"""Baldes de tokens: script Lua (fakeredis), respaldo en memoria y 429 en /login."""
+import time
+
+import pytest
+
+from mi_comuna import ratelimit
+from mi_comuna.ratelimit.backends import MemoriaBackend, RedisBackend
+
+
+def _agotar(almacen, clave, capacidad, tasa):
+    return [almacen.consumir(clave, capacidad, tasa) for _ in range(capacidad + 1)]
+
+
+def test_memoria_capacidad_y_recarga():
+    almacen = MemoriaBackend()
+    *permitidos, (permitido, espera) = _agotar(almacen, "k", 3, 20.0)
+    assert all(p for p, _ in permitidos) and not permitido
+    assert 0 < espera <= 1 / 20.0
+    time.sleep(espera + 0.01)
+    assert almacen.consumir("k", 3, 20.0)[0]
+
+
+def test_memoria_barrido_descarta_baldes_llenos():
+    almacen = MemoriaBackend(shards=1, barrido=4)
+    for i in range(3):
+        almacen.consumir(f"k{i}", 1, 1000.0)
+    time.sleep(0.01)
+    almacen.consumir("otra", 1, 1000.0)  # 4.ª operación: barre el shard
+    assert len(almacen) == 1
+
+
+@pytest.fixture
+def fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # EVALSHA de fakeredis necesita Lua
+    return fakeredis
+
+
+def test_script_lua(fakeredis):
+    cliente = fakeredis.FakeRedis()
+    almacen = RedisBackend(cliente=cliente)
+    *permitidos, (permitido, espera) = _agotar(almacen, "login:ip:1.2.3.4", 5, 5 / 300)
+    assert all(p for p, _ in permitidos) and not permitido
+    assert 59 < espera <= 60
+    # El balde expira cuando volvería a estar lleno
+    assert 0 < cliente.pttl("ratelimit:login:ip:1.2.3.4") <= 301_000
+    # Otra clave tiene su propio balde
+    assert almacen.consumir("login:ip:5.6.7.8", 5, 5 / 300)[0]
+    assert len(almacen.respaldo) == 0
+
+    almacen.consumir("rapida", 1, 50.0)
+    assert not almacen.consumir("rapida", 1, 50.0)[0]
+    time.sleep(0.03)
+    assert almacen.consumir("rapida", 1, 50.0)[0]
+
+    almacen.limpiar()
+    assert not list(cliente.scan_iter("ratelimit:*"))
+
+
+def test_respaldo_en_memoria_sin_redis(fakeredis):
+    servidor = fakeredis.FakeServer()
+    servidor.connected = False
+    almacen = RedisBackend(cliente=fakeredis.FakeRedis(server=servidor))
+    *permitidos, (permitido, espera) = _agotar(almacen, "k", 2, 1.0)
+    assert all(p for p, _ in permitidos) and not permitido and espera > 0
+    assert len(almacen.respaldo) == 1
+
+
+@pytest.fixture
+def limpio(app):
+    with app.app_context():
+        ratelimit.backend().limpiar()
+    yield
+    with app.app_context():
+        ratelimit.backend().limpiar()
+
+
+def test_login_429_tras_cinco_intentos(app, client, limpio):
+    capacidad, segundos = app.config["RATELIMIT_LOGIN_EMAIL"]
+    datos = {"email": "Alguien@Test.cl ", "password": "incorrecta"}
+    for _ in range(capacidad):
+        assert client.post("/login", data=datos).status_code == 200
+    resp = client.post("/login", data={**datos, "email": "alguien@test.cl"})
+    assert resp.status_code == 429
+    assert 0 < int(resp.headers["Retry-After"]) <= segundos / capacidad
+    # Otro email desde la misma IP sigue pudiendo intentar
+    assert client.post("/login", data={**datos, "email": "otro@test.cl"}).status_code == 200
+    # Los GET no consumen tokens
+    assert client.get("/login").status_code == 200
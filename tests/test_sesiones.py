@@ -0,0 +1,91 @@
+# tests/test_sesiones.py
+"""Sesiones versionadas (``"<id>:<versión>"``) y el snapshot ``UsuarioSesion``."""
+import pytest
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.auth.models import Usuario, UsuarioSesion, _sesiones_cache, load_user
+from mi_comuna.modules.ciudadano.models import PerfilEmpresa
+from tests.conftest import login
+
+PROTEGIDA = "/ciudadano/perfil"
+
+
+def _logueado(app, crear_usuario, **kwargs):
+    usuario_id, email, password = crear_usuario(**kwargs)
+    client = app.test_client()
+    login(client, email, password)
+    assert client.get(PROTEGIDA).status_code == 200
+    return usuario_id, client
+
+
+def _modificar(app, usuario_id, cambio):
+    with app.app_context():
+        usuario = db.session.get(Usuario, usuario_id)
+        cambio(usuario)
+        db.session.commit()
+
+
+def test_set_password_cierra_las_sesiones_abiertas(app, crear_usuario):
+    usuario_id, client = _logueado(app, crear_usuario)
+    _, otro = _logueado(app, crear_usuario)
+
+    _modificar(app, usuario_id, lambda u: u.set_password("otra-clave"))
+    resp = client.get(PROTEGIDA)
+    assert resp.status_code == 302 and "/login" in resp.headers["Location"]
+    # Las sesiones de los demás usuarios siguen
+    assert otro.get(PROTEGIDA).status_code == 200
+
+
+def test_cambio_de_rol_cierra_la_sesion(app, crear_usuario):
+    usuario_id, client = _logueado(app, crear_usuario)
+    _modificar(app, usuario_id, lambda u: setattr(u, "rol", "admin"))
+    assert "/login" in client.get(PROTEGIDA).headers.get("Location", "")
+    # Cambiar el nombre no toca la versión
+    usuario_id, client = _logueado(app, crear_usuario)
+    _modificar(app, usuario_id, lambda u: setattr(u, "nombre", "Otro nombre"))
+    assert client.get(PROTEGIDA).status_code == 200
+
+
+@pytest.mark.parametrize("formato", ["{id}", "{id}:", "{id}:x", "{id}:1:1", "abc", ""])
+def test_id_sin_version_valida_se_rechaza(app, crear_usuario, formato):
+    usuario_id, _, _ = crear_usuario()
+    with app.test_request_context():
+        assert load_user(formato.format(id=usuario_id)) is None
+        assert load_user(f"{usuario_id}:99") is None
+        assert load_user(f"{usuario_id}:1").id == usuario_id
+
+
+def test_el_snapshot_se_descarta_tras_el_commit(app, crear_usuario):
+    usuario_id, _, _ = crear_usuario()
+    with app.test_request_context():
+        assert load_user(f"{usuario_id}:1").nombre != "Nuevo"
+        assert _sesiones_cache.get(usuario_id) is not None
+
+    # Suscriptor "sesiones": un commit sobre la fila del usuario
+    _modificar(app, usuario_id, lambda u: setattr(u, "nombre", "Nuevo"))
+    assert _sesiones_cache.get(usuario_id) is None
+    with app.test_request_context():
+        assert load_user(f"{usuario_id}:1").nombre == "Nuevo"
+
+    # ...y cualquier alta en perfil_empresa (perfil_id del snapshot)
+    with app.app_context():
+        db.session.add(PerfilEmpresa(usuario_id=usuario_id, nombre="Perfil"))
+        db.session.commit()
+    assert _sesiones_cache.get(usuario_id) is None
+    with app.test_request_context():
+        assert load_user(f"{usuario_id}:1").perfil_id is not None
+
+
+def test_atributos_sin_snapshot_van_al_usuario_del_orm(app, crear_usuario):
+    usuario_id, _, password = crear_usuario()
+    with app.test_request_context():
+        sesion = load_user(f"{usuario_id}:1")
+        assert isinstance(sesion, UsuarioSesion)
+        assert sesion.check_password(password)
+        assert sesion.fecha_registro == db.session.get(Usuario, usuario_id).fecha_registro
+        # El Usuario completo se carga una vez por request
+        assert sesion.usuario is sesion.usuario
+        with pytest.raises(AttributeError):
+            sesion._no_existe
+        with pytest.raises(AttributeError):
+            sesion.no_existe
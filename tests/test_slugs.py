@@ -0,0 +1,107 @@
+# tests/test_slugs.py
+"""Slugs únicos de negocios y categorías, y redirecciones desde las URLs por id."""
+import uuid
+
+import pytest
+
+from mi_comuna.extensions import db
+from mi_comuna.modules.auth.models import Usuario
+from mi_comuna.modules.negocios.models import Categoria, Negocio
+from mi_comuna.modules.negocios.utils import LARGO_SLUG, slugify
+
+
+@pytest.mark.parametrize("texto, slug", [
+    ("Comida Rápida", "comida-rapida"),
+    ("  Café -- & Té!! ", "cafe-te"),
+    ("Ñandú 24/7", "nandu-247"),
+    ("¡¡!!", ""),
+    (None, ""),
+])
+def test_slugify(texto, slug):
+    assert slugify(texto) == slug
+
+
+def test_slugify_recorta_sin_guion_final():
+    slug = slugify("a" * (LARGO_SLUG - 1) + " bbb")
+    assert len(slug) <= LARGO_SLUG and not slug.endswith("-")
+
+
+@pytest.fixture
+def categoria(app):
+    with app.app_context():
+        categoria = Categoria(nombre=f"Rubro {uuid.uuid4().hex[:8]}")
+        db.session.add(categoria)
+        db.session.commit()
+        return categoria.id
+
+
+def _negocios(categoria_id, *nombres):
+    """Crea los negocios en un solo flush (cada uno con su dueño) y devuelve sus slugs."""
+    negocios = []
+    for nombre in nombres:
+        dueno = Usuario(nombre="Dueño", email=f"{uuid.uuid4().hex[:12]}@test.cl", password_hash="x")
+        db.session.add(dueno)
+        db.session.flush()
+        negocios.append(Negocio(nombre=nombre, direccion="Calle 1", categoria_id=categoria_id,
+                                usuario_id=dueno.id, estado="aprobado"))
+    db.session.add_all(negocios)
+    db.session.commit()
+    return [n.slug for n in negocios]
+
+
+def test_colisiones_llevan_sufijo(app, categoria):
+    base = f"Almacén {uuid.uuid4().hex[:6]}"
+    esperado = slugify(base)
+    with app.app_context():
+        # En el mismo flush y contra filas ya guardadas
+        assert _negocios(categoria, base, base.upper()) == [esperado, f"{esperado}-2"]
+        # "<base> 4" ocupa "<base>-4": no es un sufijo de colisión pero se respeta
+        assert _negocios(categoria, f"{base} 4", base, base) == [f"{esperado}-4", f"{esperado}-3", f"{esperado}-5"]
+
+
+def test_renombrar_recalcula_el_slug(app, categoria):
+    base = f"Ferretería {uuid.uuid4().hex[:6]}"
+    with app.app_context():
+        slug, = _negocios(categoria, base)
+        negocio = Negocio.query.filter_by(slug=slug).one()
+        negocio.direccion = "Calle 2"
+        db.session.commit()
+        assert negocio.slug == slug
+        # Su propio slug no cuenta como colisión
+        negocio.nombre = base + " "
+        db.session.commit()
+        assert negocio.slug == slug
+        negocio.nombre = base + " Nueva"
+        db.session.commit()
+        assert negocio.slug == slugify(base) + "-nueva"
+
+
+def test_nombres_reservados_y_numericos(app, categoria):
+    numero = str(uuid.uuid4().int)[:9]
+    with app.app_context():
+        slugs = _negocios(categoria, numero, "Registrar", "Categoría", "!!!")
+    # /negocios/<int> es la ruta legada y /registrar, /categoria/... son fijas
+    assert slugs[:3] == [f"negocio-{numero}", "negocio-registrar", "negocio-categoria"]
+    assert slugs[3].startswith("negocio")
+
+
+def test_la_url_vieja_por_id_redirige(app, client, categoria):
+    with app.app_context():
+        slug, = _negocios(categoria, f"Panadería {uuid.uuid4().hex[:6]}")
+        negocio_id = Negocio.query.filter_by(slug=slug).one().id
+    resp = client.get(f"/negocios/{negocio_id}?per_page=5")
+    assert resp.status_code == 301
+    assert resp.headers["Location"] == f"/negocios/{slug}?per_page=5"
+    assert client.get(resp.headers["Location"]).status_code == 200
+    assert client.get("/negocios/999999999").status_code == 404
+
+
+def test_la_url_vieja_de_categoria_redirige(app, client, categoria):
+    with app.app_context():
+        slug = db.session.get(Categoria, categoria).slug
+    resp = client.get(f"/negocios/categoria/{categoria}-nombre-viejo?page=2")
+    assert resp.status_code == 301
+    assert resp.headers["Location"] == f"/negocios/categoria/{slug}?page=2"
+    assert client.get(f"/negocios/categoria/{slug}").status_code == 200
+    assert client.get("/negocios/categoria/999999999-x").status_code == 404
+    assert client.get("/negocios/categoria/no-existe").status_code == 404
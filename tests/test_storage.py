@@ -0,0 +1,164 @@
+# tests/test_storage.py
+"""Almacén por contenido: deduplicación, conteo de referencias y ``uploads gc``."""
+import io
+import os
+import uuid
+
+import pytest
+
+from mi_comuna import storage
+from mi_comuna.extensions import db
+from mi_comuna.modules.ciudadano.models import AvisoCiudadano, PerfilEmpresa
+from mi_comuna.storage.backends import CACHE_CONTROL, LocalBackend
+from mi_comuna.storage.models import Blob
+
+
+@pytest.fixture
+def almacen(app, tmp_path, monkeypatch):
+    almacen = LocalBackend(str(tmp_path), "uploads")
+    monkeypatch.setitem(app.extensions, "storage", almacen)
+    return almacen
+
+
+@pytest.fixture
+def perfil_id(app, crear_usuario):
+    usuario_id, _, _ = crear_usuario()
+    with app.app_context():
+        perfil = PerfilEmpresa(usuario_id=usuario_id, nombre="Perfil")
+        db.session.add(perfil)
+        db.session.commit()
+        return perfil.id
+
+
+def _contenido():
+    # Distinto en cada test: los blobs de la base de la sesión no se cruzan
+    return b"\x89PNG" + uuid.uuid4().bytes * 100
+
+
+def _aviso(perfil_id, datos):
+    ruta = storage.guardar_stream(io.BytesIO(datos), "png")
+    aviso = AvisoCiudadano(titulo="t", descripcion="d", perfil_id=perfil_id, imagen=ruta)
+    db.session.add(aviso)
+    db.session.commit()
+    return aviso
+
+
+def _blob(ruta):
+    db.session.expire_all()
+    return db.session.scalars(db.select(Blob).filter_by(ruta=ruta)).first()
+
+
+def test_subidas_iguales_comparten_blob(app, almacen, perfil_id):
+    datos = _contenido()
+    with app.app_context():
+        a, b = _aviso(perfil_id, datos), _aviso(perfil_id, datos)
+        assert a.imagen == b.imagen
+        assert _blob(a.imagen).refs == 2
+        clave = storage.clave_de(a.imagen)
+    assert [c for c, _, _ in almacen.listar()] == [clave]
+    with open(os.path.join(almacen.raiz, *clave.split("/")), "rb") as f:
+        assert f.read() == datos
+
+
+def test_el_archivo_se_borra_con_la_ultima_referencia(app, almacen, perfil_id):
+    with app.app_context():
+        datos = _contenido()
+        a, b = _aviso(perfil_id, datos), _aviso(perfil_id, datos)
+        ruta, clave = a.imagen, storage.clave_de(a.imagen)
+
+        db.session.delete(a)
+        db.session.commit()
+        assert _blob(ruta).refs == 1
+        assert almacen.existe(clave)
+
+        db.session.delete(db.session.get(AvisoCiudadano, b.id))
+        db.session.commit()
+        assert _blob(ruta) is None
+        assert not almacen.existe(clave)
+
+
+def test_rollback_no_cambia_las_referencias(app, almacen, perfil_id):
+    with app.app_context():
+        datos = _contenido()
+        ruta = _aviso(perfil_id, datos).imagen
+
+        db.session.add(AvisoCiudadano(
+            titulo="t", descripcion="d", perfil_id=perfil_id,
+            imagen=storage.guardar_stream(io.BytesIO(datos), "png"),
+        ))
+        db.session.flush()
+        db.session.rollback()
+        assert _blob(ruta).refs == 1
+        assert almacen.existe(storage.clave_de(ruta))
+
+
+def test_reclamo_reintenta_si_otra_subida_inserto_el_blob(app, almacen, monkeypatch):
+    """El INSERT choca con el de otra subida (IntegrityError): se reclama la fila existente."""
+    datos = _contenido()
+    with app.app_context():
+        ruta = storage.guardar_stream(io.BytesIO(datos), "png")
+        db.session.commit()
+
+        # Simula la carrera: el primer UPDATE de reclamo no ve la fila ajena
+        original = db.session.execute
+        llamadas = []
+
+        def execute(stmt, *args, **kwargs):
+            if not llamadas and getattr(stmt, "is_update", False) and stmt.table.name == "blob":
+                llamadas.append(stmt)
+                return original(stmt.where(Blob.__table__.c.sha256 == "ninguno"), *args, **kwargs)
+            return original(stmt, *args, **kwargs)
+
+        monkeypatch.setattr(db.session, "execute", execute)
+        assert storage.guardar_stream(io.BytesIO(datos), "png") == ruta
+        monkeypatch.undo()
+        db.session.commit()
+        assert llamadas
+        assert db.session.scalar(db.select(db.func.count()).select_from(Blob).filter_by(ruta=ruta)) == 1
+
+
+def test_gc_borra_huerfanos(app, almacen, perfil_id):
+    with app.app_context():
+        en_uso = _aviso(perfil_id, _contenido()).imagen
+        # Blob que quedó sin referencias (p.ej. un DELETE masivo sin descontar)
+        sin_refs = storage.guardar_stream(io.BytesIO(_contenido()), "png")
+        db.session.commit()
+    # Archivo sin fila en la base (subida que nunca llegó a commit)
+    huerfano = "ab/cd/" + "ab" * 32 + ".png"
+    os.makedirs(os.path.join(almacen.raiz, "ab", "cd"), exist_ok=True)
+    with open(os.path.join(almacen.raiz, "ab", "cd", "ab" * 32 + ".png"), "wb") as f:
+        f.write(b"x")
+    fd, temporal = almacen.temporal()
+    os.close(fd)
+
+    resultado = app.test_cli_runner().invoke(args=["uploads", "gc", "--min-edad", "0"])
+    assert resultado.exit_code == 0, resultado.output
+    claves = {c for c, _, _ in almacen.listar()}
+    assert claves == {storage.clave_de(en_uso)}
+    assert huerfano not in claves and not os.path.exists(temporal)
+    with app.app_context():
+        assert _blob(sin_refs) is None
+        assert _blob(en_uso).refs == 1
+
+
+def test_blobs_locales_inmutables(app, client):
+    # La ruta /static de Flask sirve UPLOAD_FOLDER: el archivo va y se quita de ahí
+    carpeta = os.path.join(app.static_folder, "uploads", "ff", "fe")
+    archivo = os.path.join(carpeta, "fe" * 32 + ".png")
+    os.makedirs(carpeta)
+    with open(archivo, "wb") as f:
+        f.write(b"x")
+    try:
+        resp = client.get("/static/uploads/ff/fe/" + os.path.basename(archivo))
+        assert resp.status_code == 200
+        assert resp.headers["Cache-Control"] == CACHE_CONTROL
+        resp.close()
+    finally:
+        os.unlink(archivo)
+        os.rmdir(carpeta)
+        os.rmdir(os.path.dirname(carpeta))
+    # Los demás estáticos conservan el Cache-Control de Flask
+    resp = client.get("/static/img/agrodesk.png")
+    assert resp.status_code == 200
+    assert "immutable" not in resp.headers.get("Cache-Control", "")
+    resp.close()
@@ -0,0 +1,112 @@
+# tests/test_storage_s3.py
+"""S3Backend contra el S3 simulado de moto (sin red ni credenciales)."""
+import io
+import os
+import types
+
+import pytest
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+from mi_comuna import storage  # noqa: E402
+from mi_comuna.extensions import db  # noqa: E402
+from mi_comuna.storage.backends import CACHE_CONTROL, S3Backend, crear_backend  # noqa: E402
+
+BUCKET = "mi-comuna-tests"
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(variable, "prueba")
+    with moto.mock_aws():
+        cliente = boto3.client("s3", region_name="us-east-1")
+        cliente.create_bucket(Bucket=BUCKET)
+        yield cliente
+
+
+@pytest.fixture
+def s3(app, cliente, tmp_path, monkeypatch):
+    almacen = S3Backend(BUCKET, prefijo="uploads", cliente=cliente, tmp_dir=str(tmp_path))
+    monkeypatch.setitem(app.extensions, "storage", almacen)
+    return almacen
+
+
+def _temporal(almacen, datos):
+    fd, temporal = almacen.temporal()
+    with os.fdopen(fd, "wb") as f:
+        f.write(datos)
+    return temporal
+
+
+def test_guardar_existe_abrir_listar_borrar(s3, cliente):
+    clave = "ab/cd/" + "ab" * 32 + ".png"
+    assert not s3.existe(clave)
+
+    temporal = _temporal(s3, b"png")
+    s3.guardar(clave, temporal)
+    assert not os.path.exists(temporal)
+    assert s3.existe(clave)
+    assert s3.abrir(clave).read() == b"png"
+
+    cabecera = cliente.head_object(Bucket=BUCKET, Key=f"uploads/{clave}")
+    assert (cabecera["ContentType"], cabecera["CacheControl"]) == ("image/png", CACHE_CONTROL)
+    # Un objeto fuera del prefijo no es del almacén
+    cliente.put_object(Bucket=BUCKET, Key="otro/archivo.txt", Body=b"x")
+    assert [(c, t) for c, t, _ in s3.listar()] == [(clave, 3)]
+
+    s3.borrar(clave)
+    assert not s3.existe(clave)
+    assert list(s3.listar()) == []
+
+
+def test_guardar_quita_el_temporal_si_falla_la_subida(s3, monkeypatch):
+    def falla(*args, **kwargs):
+        raise ConnectionError("sin red")
+
+    monkeypatch.setattr(s3.cliente, "upload_file", falla)
+    temporal = _temporal(s3, b"png")
+    with pytest.raises(ConnectionError):
+        s3.guardar("ab/cd/x.png", temporal)
+    assert not os.path.exists(temporal)
+
+
+def test_url(cliente):
+    clave = "ab/cd/" + "ab" * 32 + ".png"
+    assert S3Backend(BUCKET, prefijo="uploads", cliente=cliente).url(clave) == (
+        f"https://s3.amazonaws.com/{BUCKET}/uploads/{clave}"
+    )
+    cdn = S3Backend(BUCKET, prefijo="/uploads/", url_publica="https://cdn.test/", cliente=cliente)
+    assert cdn.url(clave) == f"https://cdn.test/uploads/{clave}"
+
+
+def test_crear_backend_s3(cliente):
+    app = types.SimpleNamespace(static_folder="static", config={
+        "STORAGE_BACKEND": "s3", "S3_BUCKET": BUCKET, "S3_PREFIX": "media", "S3_REGION": "us-east-1",
+    })
+    almacen = crear_backend(app)
+    assert isinstance(almacen, S3Backend)
+    assert (almacen.bucket, almacen.prefijo) == (BUCKET, "media/")
+    assert not almacen.existe("nada.png")
+
+
+def test_subida_y_gc_en_el_bucket(app, s3, cliente, tmp_path):
+    with app.app_context():
+        ruta = storage.guardar_stream(io.BytesIO(b"\x89PNG-s3"), "png")
+        # La misma subida otra vez: un solo objeto
+        assert storage.guardar_stream(io.BytesIO(b"\x89PNG-s3"), "png") == ruta
+        db.session.commit()
+        assert storage.media_url(ruta).endswith(f"/{BUCKET}/{ruta}")
+    huerfano = "ef/ef/" + "ef" * 32 + ".png"
+    cliente.put_object(Bucket=BUCKET, Key=f"uploads/{huerfano}", Body=b"x")
+    assert {c for c, _, _ in s3.listar()} == {storage.clave_de(ruta), huerfano}
+    # Temporal abandonado por una subida que falló
+    abandonado = _temporal(s3, b"x")
+
+    resultado = app.test_cli_runner().invoke(args=["uploads", "gc", "--min-edad", "0"])
+    assert resultado.exit_code == 0, resultado.output
+    # El blob sin referencias (nadie lo usa) y el huérfano se borran del bucket
+    assert list(s3.listar()) == []
+    assert not os.path.exists(abandonado)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,75 @@
+# tests/test_tailwind.py
+"""Cobertura de clases de Tailwind: plantillas vs. CSS compilado y safelist."""
+import os
+import re
+
+import pytest
+
+from mi_comuna.assets import tailwind
+
+CONFIG_JS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tailwind.config.js")
+
+PLANTILLA = """\
+<style>.propia { color: red; }</style>
+<div class="flex p-4 propia group">
+  <button :class="open ? 'hidden' : 'block'" class="rounded-lg {% if x %}bg-red-500{% endif %}">
+  <span class='text-{{ m.color }}-600 font-bold'></span>
+</div>
+"""
+
+
+@pytest.fixture
+def plantilla(app, tmp_path, monkeypatch):
+    ruta = tmp_path / "ejemplo.html"
+    ruta.write_text(PLANTILLA, encoding="utf-8")
+    monkeypatch.setattr(tailwind, "plantillas", lambda: [str(ruta)])
+    with app.app_context():
+        yield ruta
+
+
+def test_clases_usadas_de_una_plantilla(plantilla):
+    usadas = tailwind.clases_usadas()
+    # Sin el :class de Alpine, las etiquetas {% %} (su contenido sí cuenta),
+    # las clases con {{ }}, las definidas en <style> ni los marcadores de Tailwind
+    assert set(usadas) == {"flex", "p-4", "rounded-lg", "bg-red-500", "font-bold"}
+    assert all(p == [os.path.relpath(plantilla, tailwind.current_app.root_path)] for p in usadas.values())
+
+
+def test_clases_faltantes_contra_un_css(app, plantilla, tmp_path, monkeypatch):
+    css = tmp_path / "static" / "css" / "app.css"
+    css.parent.mkdir(parents=True)
+    css.write_text(".flex{display:flex}.p-4{padding:1rem}.rounded-lg{border-radius:.5rem}", encoding="utf-8")
+    monkeypatch.setattr(app, "static_folder", str(tmp_path / "static"))
+    assert set(tailwind.clases_faltantes()) == {"bg-red-500", "font-bold"}
+
+
+def test_css_compilado_cubre_las_plantillas(app):
+    with app.app_context():
+        if not os.path.exists(os.path.join(app.static_folder, *tailwind.SALIDA.split("/"))):
+            pytest.skip("static/css/app.css no está compilado (`flask assets css`)")
+        faltantes = tailwind.clases_faltantes()
+    assert not faltantes, f"Clases sin CSS, recompilar con `flask assets css`: {sorted(faltantes)}"
+
+
+def _safelist():
+    with open(CONFIG_JS, encoding="utf-8") as f:
+        return [re.compile(p) for p in re.findall(r"pattern:\s*/(.+?)/[a-z]*\s*}", f.read())]
+
+
+def test_safelist_cubre_las_clases_armadas_en_jinja(app):
+    """Cada ``prefijo-{{ m.color }}-sufijo`` con los colores que define la
+    propia plantilla debe estar en el safelist, o el CSS purgado no lo tendrá."""
+    patrones = _safelist()
+    assert patrones
+    revisadas = 0
+    with app.app_context():
+        for ruta in tailwind.plantillas():
+            with open(ruta, encoding="utf-8") as f:
+                html = f.read()
+            colores = set(re.findall(r"""["']color["']\s*:\s*["'](\w+)["']""", html))
+            for clase in re.findall(r"[\w:-]*\{\{\s*m\.color\s*\}\}[\w-]*", html):
+                for color in colores:
+                    expandida = re.sub(r"\{\{\s*m\.color\s*\}\}", color, clase)
+                    assert any(p.fullmatch(expandida) for p in patrones), f"{expandida} ({ruta})"
+                    revisadas += 1
+    assert revisadas